@@ -4,7 +4,10 @@ MCP CLI Client Root Package
 Dit package maakt het mogelijk om de MCP CLI client te gebruiken als een Python module.
 """
 
-from src.mcp_client import MCPClient, log, ConfigurationError, ConnectionError, CommunicationError
+from src.mcp_client import (
+    MCPClient, log, ConfigurationError, ConnectionError, CommunicationError, RequestTimeoutError,
+    RateLimitError, SessionExpiredError, ValidationError
+)
 
 # Versie informatie
 __version__ = "0.1.0"
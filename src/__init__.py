@@ -4,4 +4,7 @@ MCP CLI Client Package
 Dit package bevat modules voor het verbinden en communiceren met MCP-servers.
 """
 
-from src.mcp_client import MCPClient, log, ConfigurationError, ConnectionError, CommunicationError
+from src.mcp_client import (
+    MCPClient, log, ConfigurationError, ConnectionError, CommunicationError, RequestTimeoutError,
+    RateLimitError, SessionExpiredError, ValidationError
+)
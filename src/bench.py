@@ -0,0 +1,325 @@
+"""
+MCP Bench - Belasting genereren met latency-percentielen
+
+Deze module stuurt een mix van verzoeken naar een verbonden server en meet de latency,
+doorvoer, fouten en het CPU-gebruik van de client. Er zijn twee modi:
+
+- closed loop: een vast aantal workers dat elk direct na een antwoord het volgende verzoek
+  verstuurt (vaste concurrency)
+- open loop: verzoeken op vaste aankomsttijden (vast aantal per seconde), ongeacht of eerdere
+  verzoeken al klaar zijn. De latency wordt gemeten vanaf het geplande moment, zodat een
+  trage server niet minder metingen oplevert (coordinated omission)
+
+Latencies worden vastgelegd in een histogram met logaritmische buckets (zoals HdrHistogram),
+met een relatieve fout van hoogstens 1/64 (ongeveer 1,6%) en zonder geheugen per meting.
+
+Een mix is een lijst verzoeken met een optioneel gewicht, bijvoorbeeld:
+
+    [
+      {"method": "tools/list", "weight": 1},
+      {"method": "tools/call", "params": {"name": "echo", "arguments": {"message": "hoi"}}, "weight": 4}
+    ]
+"""
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.mcp_client import MCPClientError, ConfigurationError
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Buckets per verdubbeling; 64 geeft een relatieve fout van hoogstens 1/64
+SUB_BUCKETS = 64
+
+
+class LatencyHistogram:
+    """Histogram van latencies in microseconden met logaritmische buckets.
+
+    Waarden onder 2 * SUB_BUCKETS microseconden worden exact geteld; daarboven deelt elke
+    verdubbeling zich in SUB_BUCKETS even brede buckets. Een meting is een paar
+    rekenstappen en één dict-update. Niet thread-safe: gebruik één histogram per thread
+    en voeg ze samen met merge.
+    """
+
+    def __init__(self):
+        self.counts = {}  # bucket-index -> aantal
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def _index(value):
+        """Geeft de bucket van een waarde in microseconden."""
+        if value < 2 * SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKETS.bit_length()
+        return 2 * SUB_BUCKETS + (shift - 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def _highest_value(index):
+        """Geeft de hoogste waarde die in een bucket valt."""
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift, sub = divmod(index - 2 * SUB_BUCKETS, SUB_BUCKETS)
+        shift += 1
+        return ((sub + SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, seconds):
+        """Legt een latency in seconden vast."""
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Telt de metingen van een ander histogram hierbij op."""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, percentile):
+        """Geeft het percentiel in seconden (None zonder metingen).
+
+        Args:
+            percentile (float): Het percentiel, bijvoorbeeld 99.9
+        """
+        if not self.count:
+            return None
+        target = max(1, int(percentile / 100 * self.count + 0.5))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_value(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def mean(self):
+        """Geeft de gemiddelde latency in seconden (None zonder metingen)."""
+        return self.total / self.count / 1_000_000 if self.count else None
+
+
+def parse_mix(mix):
+    """Controleert een mix van verzoeken.
+
+    Args:
+        mix (list): Verzoeken als dict met method, optioneel params en weight (standaard 1)
+
+    Returns:
+        list: (method, params, weight) per verzoek
+
+    Raises:
+        ConfigurationError: Bij een lege mix, een verzoek zonder methode of een ongeldig gewicht
+    """
+    if not isinstance(mix, list) or not mix:
+        raise ConfigurationError("Een benchmark-mix is een niet-lege lijst verzoeken.")
+    parsed = []
+    for item in mix:
+        if not isinstance(item, dict) or not isinstance(item.get("method"), str):
+            raise ConfigurationError(f"Verzoek zonder 'method' in de mix: {item}")
+        weight = item.get("weight", 1)
+        if not isinstance(weight, (int, float)) or weight <= 0:
+            raise ConfigurationError(f"Ongeldig gewicht in de mix: {item}")
+        parsed.append((item["method"], item.get("params"), weight))
+    return parsed
+
+
+def load_mix(path):
+    """Leest een mix van verzoeken uit een JSON-bestand (zie parse_mix).
+
+    Raises:
+        ConfigurationError: Als het bestand niet leesbaar of geen geldige mix is
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return parse_mix(json.load(f))
+    except (OSError, ValueError) as e:
+        raise ConfigurationError(f"Kan benchmark-mix {path} niet lezen: {e}")
+
+
+class _Worker:
+    """Meetgegevens van één thread: een eigen histogram en foutentelling."""
+
+    def __init__(self, mix, seed):
+        self.histogram = LatencyHistogram()
+        self.errors = {}  # soort fout -> aantal
+        self._random = random.Random(seed)
+        self._requests = [(method, params) for method, params, _ in mix]
+        self._weights = [weight for _, _, weight in mix]
+
+    def choose(self):
+        """Kiest een verzoek uit de mix naar gewicht."""
+        return self._random.choices(self._requests, self._weights)[0]
+
+    def call(self, client, method, params, started, timeout):
+        """Voert één verzoek uit en legt latency of fout vast."""
+        try:
+            response = client.call(method, params, timeout=timeout)
+        except MCPClientError as e:
+            kind = type(e).__name__
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+            return
+        if isinstance(response, dict) and "error" in response:
+            self.errors["rpc_error"] = self.errors.get("rpc_error", 0) + 1
+            return
+        self.histogram.record(time.perf_counter() - started)
+
+
+def _result(workers, mode, wall, cpu, **settings):
+    """Voegt de meetgegevens van alle workers samen tot één resultaat."""
+    histogram = LatencyHistogram()
+    errors = {}
+    for worker in workers:
+        histogram.merge(worker.histogram)
+        for kind, count in worker.errors.items():
+            errors[kind] = errors.get(kind, 0) + count
+    total = histogram.count + sum(errors.values())
+    return dict(
+        settings,
+        mode=mode,
+        requests=total,
+        errors=errors,
+        error_rate=sum(errors.values()) / total if total else 0.0,
+        duration=wall,
+        throughput=histogram.count / wall if wall else 0.0,
+        latency={"min": histogram.min / 1_000_000 if histogram.min is not None else None,
+                 "mean": histogram.mean(),
+                 "max": histogram.max / 1_000_000 if histogram.max is not None else None,
+                 **{f"p{p:g}": histogram.percentile(p) for p in PERCENTILES}},
+        cpu_seconds=cpu,
+        cpu_percent=100 * cpu / wall if wall else 0.0,
+        histogram=histogram,
+    )
+
+
+def run_closed_loop(client, mix, concurrency=8, duration=10.0, requests=None, timeout=None, seed=None):
+    """Belast de server met een vast aantal gelijktijdige verzoeken.
+
+    Args:
+        client (MCPClient): De verbonden client
+        mix (list): De verzoeken uit parse_mix
+        concurrency (int, optional): Aantal workers, elk met één verzoek tegelijk
+        duration (float, optional): Duur in seconden
+        requests (int, optional): Stop na dit aantal verzoeken (in plaats van na `duration`)
+        timeout (float, optional): Maximale wachttijd per verzoek in seconden
+        seed (int, optional): Startwaarde voor de keuze uit de mix (reproduceerbaar)
+
+    Returns:
+        dict: Het resultaat, zie format_report
+    """
+    rng = random.Random(seed)
+    workers = [_Worker(mix, rng.random()) for _ in range(concurrency)]
+    remaining = [requests]
+    lock = threading.Lock()
+    deadline = None
+
+    def take():
+        if remaining[0] is None:
+            return time.perf_counter() < deadline
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def loop(worker):
+        while take():
+            method, params = worker.choose()
+            worker.call(client, method, params, time.perf_counter(), timeout)
+
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    deadline = started + duration
+    threads = [threading.Thread(target=loop, args=(worker,), daemon=True) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    return _result(workers, "closed", wall, time.process_time() - cpu_started, concurrency=concurrency)
+
+
+def run_open_loop(client, mix, rate, duration=10.0, max_in_flight=256, timeout=None, seed=None):
+    """Belast de server met een vast aantal verzoeken per seconde.
+
+    Het i-de verzoek is gepland op start + i / rate. Is de client achter (bijvoorbeeld omdat
+    alle `max_in_flight` plaatsen bezet zijn), dan telt de wachttijd mee in de latency.
+
+    Args:
+        client (MCPClient): De verbonden client
+        mix (list): De verzoeken uit parse_mix
+        rate (float): Aantal verzoeken per seconde
+        duration (float, optional): Duur in seconden
+        max_in_flight (int, optional): Maximaal aantal verzoeken tegelijk
+        timeout (float, optional): Maximale wachttijd per verzoek in seconden
+        seed (int, optional): Startwaarde voor de keuze uit de mix (reproduceerbaar)
+
+    Returns:
+        dict: Het resultaat, zie format_report
+    """
+    chooser = _Worker(mix, seed)
+    workers = []
+    local = threading.local()
+    lock = threading.Lock()
+
+    def call(method, params, scheduled):
+        worker = getattr(local, "worker", None)
+        if worker is None:
+            worker = local.worker = _Worker(mix, None)
+            with lock:
+                workers.append(worker)
+        worker.call(client, method, params, scheduled, timeout)
+
+    total = int(rate * duration)
+    executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="mcp-bench")
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    try:
+        for number in range(total):
+            scheduled = started + number / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            method, params = chooser.choose()
+            executor.submit(call, method, params, scheduled)
+    finally:
+        executor.shutdown(wait=True)
+    wall = time.perf_counter() - started
+    return _result(workers, "open", wall, time.process_time() - cpu_started, rate=rate)
+
+
+def format_report(result):
+    """Geeft een benchmarkresultaat terug als leesbare tekst (tijden in milliseconden)."""
+    def ms(value):
+        return f"{value * 1000:.3f}" if value is not None else "-"
+
+    if result["mode"] == "closed":
+        mode = f"closed loop, concurrency {result['concurrency']}"
+    else:
+        mode = f"open loop, {result['rate']:g} verzoeken/s"
+    latency = result["latency"]
+    lines = [
+        f"Modus:        {mode}",
+        f"Duur:         {result['duration']:.2f} s",
+        f"Verzoeken:    {result['requests']} ({result['throughput']:.1f} geslaagd per seconde)",
+        f"Fouten:       {sum(result['errors'].values())} ({result['error_rate'] * 100:.2f}%)"
+        + "".join(f"\n  {kind}: {count}" for kind, count in sorted(result["errors"].items())),
+        f"Client-CPU:   {result['cpu_seconds']:.2f} s ({result['cpu_percent']:.0f}% van één core)",
+        "Latency (ms):",
+        f"  min {ms(latency['min'])}  gem. {ms(latency['mean'])}  max {ms(latency['max'])}",
+        "  " + "  ".join(f"p{p:g} {ms(latency[f'p{p:g}'])}" for p in PERCENTILES),
+    ]
+    return "\n".join(lines)
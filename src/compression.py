@@ -0,0 +1,240 @@
+"""
+MCP Compression - Compressie van HTTP-verzoeken en gestreamde decompressie van antwoorden
+
+Grote JSON-berichten comprimeren goed. Deze module comprimeert verzoeken vanaf een
+drempelwaarde met gzip (of zstd als de server dat accepteert en een zstd-module
+beschikbaar is) en pakt gecomprimeerde antwoorden stuk voor stuk uit terwijl ze
+binnenkomen, zodat ook een lange SSE-stream gecomprimeerd kan worden. Per client wordt
+bijgehouden hoeveel bytes er over de lijn gingen en hoeveel daarmee zijn bespaard.
+
+zstd is optioneel: de module compression.zstd (Python 3.14+) of het pakket zstandard.
+"""
+
+import gzip
+import threading
+import zlib
+
+try:
+    from compression import zstd as _zstd_stdlib  # Python 3.14+
+except ImportError:
+    _zstd_stdlib = None
+
+try:
+    import zstandard as _zstandard
+except ImportError:
+    _zstandard = None
+
+ZSTD_AVAILABLE = _zstd_stdlib is not None or _zstandard is not None
+
+# Waarden voor MCP_REQUEST_COMPRESSION
+MODES = ("off", "gzip", "zstd", "auto")
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Coderingen die decoder() kan uitpakken, in volgorde van voorkeur
+SUPPORTED_ENCODINGS = ("zstd", "gzip", "deflate") if ZSTD_AVAILABLE else ("gzip", "deflate")
+ACCEPT_ENCODING = ", ".join(SUPPORTED_ENCODINGS)
+
+
+def compress(data, encoding):
+    """Comprimeert een body.
+
+    Args:
+        data (bytes): De ongecomprimeerde body
+        encoding (str): "gzip" of "zstd"
+
+    Returns:
+        bytes: De gecomprimeerde body
+    """
+    if encoding == "zstd":
+        if _zstd_stdlib is not None:
+            return _zstd_stdlib.compress(data, ZSTD_LEVEL)
+        return _zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_chunks(chunks, encoding, stats=None, size=None):
+    """Comprimeert een reeks stukken gestreamd (voor bodies die niet in het geheugen passen).
+
+    Args:
+        chunks: Iterable met bytes-stukken
+        encoding (str): "gzip" of "zstd"
+        stats (CompressionStats, optional): Waar het verzoek na afloop wordt geteld
+        size (int, optional): De ongecomprimeerde grootte (voor stats)
+
+    Yields:
+        bytes: Gecomprimeerde stukken
+    """
+    if encoding == "zstd":
+        if _zstd_stdlib is not None:
+            compressor = _zstd_stdlib.ZstdCompressor(ZSTD_LEVEL)
+        else:
+            compressor = _zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    wire_size = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            wire_size += len(data)
+            yield data
+    data = compressor.flush()
+    wire_size += len(data)
+    yield data
+    if stats is not None:
+        stats.record_request(size, wire_size)
+
+
+def decoder(encoding):
+    """Geeft een object met decompress(chunk) voor gestreamde decompressie, of None.
+
+    Args:
+        encoding (str): De waarde van de Content-Encoding header
+
+    Returns:
+        object: Een decompressor, of None als de codering niet wordt ondersteund
+    """
+    if encoding == "gzip":
+        return zlib.decompressobj(wbits=31)
+    if encoding == "deflate":
+        return _DeflateDecoder()
+    if encoding == "zstd" and ZSTD_AVAILABLE:
+        if _zstd_stdlib is not None:
+            return _zstd_stdlib.ZstdDecompressor()
+        return _zstandard.ZstdDecompressor().decompressobj()
+    return None
+
+
+class _DeflateDecoder:
+    """Deflate met zlib-header (volgens de standaard) of zonder (zoals sommige servers sturen)."""
+
+    def __init__(self):
+        self._decoder = zlib.decompressobj()
+        self._first = True
+
+    def decompress(self, data):
+        if self._first and data:
+            self._first = False
+            try:
+                return self._decoder.decompress(data)
+            except zlib.error:
+                self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decoder.decompress(data)
+
+
+def parse_accept_encoding(value):
+    """Geeft de coderingen uit een Accept-Encoding header (zonder q=0)."""
+    encodings = set()
+    for part in (value or "").split(","):
+        name, _, parameters = part.strip().partition(";")
+        if name and parameters.replace(" ", "") not in ("q=0", "q=0.0"):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+class CompressionStats:
+    """Telt de bytes van gecomprimeerde verzoeken en antwoorden (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests_compressed = 0
+        self.request_bytes = 0
+        self.request_wire_bytes = 0
+        self.responses_compressed = 0
+        self.response_bytes = 0
+        self.response_wire_bytes = 0
+
+    def record_request(self, size, wire_size):
+        """Legt een gecomprimeerd verzoek vast (grootte voor en na compressie)."""
+        with self._lock:
+            self.requests_compressed += 1
+            self.request_bytes += size
+            self.request_wire_bytes += wire_size
+
+    def record_response(self, size, wire_size, new=False):
+        """Legt een uitgepakt stuk van een antwoord vast; `new` bij het begin van een antwoord."""
+        with self._lock:
+            if new:
+                self.responses_compressed += 1
+            self.response_bytes += size
+            self.response_wire_bytes += wire_size
+
+    def stats(self):
+        """Geeft de tellingen terug.
+
+        Returns:
+            dict: Per richting het aantal gecomprimeerde berichten, de bytes voor en na
+                  compressie, plus bytes_saved in totaal
+        """
+        with self._lock:
+            return {
+                "requests_compressed": self.requests_compressed,
+                "request_bytes": self.request_bytes,
+                "request_wire_bytes": self.request_wire_bytes,
+                "responses_compressed": self.responses_compressed,
+                "response_bytes": self.response_bytes,
+                "response_wire_bytes": self.response_wire_bytes,
+                "bytes_saved": (self.request_bytes - self.request_wire_bytes
+                                + self.response_bytes - self.response_wire_bytes),
+            }
+
+    def format_summary(self):
+        """Geeft de tellingen terug als korte leesbare tekst."""
+        stats = self.stats()
+        return (f"Compressie: {stats['requests_compressed']} verzoeken "
+                f"({stats['request_bytes']} -> {stats['request_wire_bytes']} bytes), "
+                f"{stats['responses_compressed']} antwoorden "
+                f"({stats['response_wire_bytes']} -> {stats['response_bytes']} bytes), "
+                f"{stats['bytes_saved']} bytes bespaard")
+
+
+def content_encoding(response):
+    """Geeft de codering van een antwoord als die door decoder() wordt ondersteund, anders None."""
+    encoding = response.headers.get("Content-Encoding")
+    if not isinstance(encoding, str):
+        return None
+    encoding = encoding.strip().lower()
+    return encoding if encoding in SUPPORTED_ENCODINGS else None
+
+
+def iter_decompressed(response, encoding, stats=None, chunk_size=512):
+    """Leest de ruwe (gecomprimeerde) body van een antwoord en levert de uitgepakte stukken.
+
+    Args:
+        response (requests.Response): Een antwoord met stream=True
+        encoding (str): De codering uit content_encoding
+        stats (CompressionStats, optional): Waar de bytes worden geteld
+        chunk_size (int, optional): Aantal bytes per leesactie
+
+    Yields:
+        bytes: Uitgepakte stukken van de body
+    """
+    decompressor = decoder(encoding)
+    new = True
+    for chunk in response.raw.stream(chunk_size, decode_content=False):
+        data = decompressor.decompress(chunk)
+        if stats is not None:
+            stats.record_response(len(data), len(chunk), new)
+            new = False
+        if data:
+            yield data
+
+
+def iter_lines(chunks):
+    """Splitst een reeks bytes-stukken in regels (zonder regeleinde, zoals Response.iter_lines)."""
+    parts = []
+    for chunk in chunks:
+        start = 0
+        end = chunk.find(b"\n")
+        while end >= 0:
+            parts.append(chunk[start:end])
+            line = b"".join(parts)
+            parts = []
+            yield line[:-1] if line.endswith(b"\r") else line
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        if start < len(chunk):
+            parts.append(chunk[start:])
+    if parts:
+        yield b"".join(parts)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+"""
+MCP Demo Server - Eenvoudige MCP-server voor demonstraties en tests
+
+Deze module bevat een kleine MCP-server in Python. Hij kan direct in het proces worden
+geladen (``MCPClient.connect_inproc("src.demo_server:DemoServer")``), als los proces
+via STDIO worden gestart (``python -m src.demo_server``) of als gedeelde server op een
+socket draaien (``python -m src.demo_server --socket unix:/tmp/mcp.sock``).
+"""
+
+import argparse
+import base64
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+PROTOCOL_VERSION = "2024-11-05"
+
+# JSON-RPC foutcodes
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+
+TOOLS = [
+    {
+        "name": "echo",
+        "description": "Geeft het opgegeven bericht terug.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"message": {"type": "string"}},
+            "required": ["message"]
+        }
+    },
+    {
+        "name": "add",
+        "description": "Telt twee getallen op.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"a": {"type": "number"}, "b": {"type": "number"}},
+            "required": ["a", "b"]
+        }
+    }
+]
+
+
+class DemoServer:
+    """Een minimale MCP-server die JSON-RPC berichten als Python-objecten verwerkt.
+
+    Args:
+        resource_count (int): Aantal resources in de catalogus
+        page_size (int): Aantal items per pagina bij list-methoden
+    """
+
+    def __init__(self, resource_count=25, page_size=10):
+        self.page_size = page_size
+        self.resources = [
+            {"uri": f"demo://text/{i}", "name": f"Tekst {i}", "mimeType": "text/plain"}
+            for i in range(resource_count)
+        ]
+        self.blobs = {"demo://blob/bytes": bytes(range(256)) * 64}
+        self.initialized = False
+
+    def handle_message(self, message):
+        """Verwerkt één JSON-RPC bericht.
+
+        Args:
+            message (dict): Het ontvangen JSON-RPC bericht
+
+        Returns:
+            dict: De JSON-RPC response, of None voor notificaties
+        """
+        method = message.get("method")
+        if "id" not in message:
+            if method == "notifications/initialized":
+                self.initialized = True
+            return None
+
+        handler = getattr(self, "_" + method.replace("/", "_"), None) if method else None
+        if handler is None:
+            return self._error(message["id"], METHOD_NOT_FOUND, f"Onbekende methode: {method}")
+        try:
+            result = handler(message.get("params") or {})
+        except (KeyError, TypeError, ValueError) as e:
+            return self._error(message["id"], INVALID_PARAMS, f"Ongeldige parameters: {e}")
+        return {"jsonrpc": "2.0", "id": message["id"], "result": result}
+
+    def _error(self, request_id, code, text):
+        """Stelt een JSON-RPC foutantwoord samen."""
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": text}}
+
+    def _page(self, items, params, key):
+        """Geeft één pagina van een lijst terug, met nextCursor als er meer is."""
+        start = int(params.get("cursor") or 0)
+        end = start + self.page_size
+        result = {key: items[start:end]}
+        if end < len(items):
+            result["nextCursor"] = str(end)
+        return result
+
+    def _initialize(self, params):
+        return {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {"tools": {"listChanged": True}, "resources": {}, "prompts": {}},
+            "serverInfo": {"name": "mcp-demo-server", "version": "0.1.0"}
+        }
+
+    def _ping(self, params):
+        return {}
+
+    def _tools_list(self, params):
+        return self._page(TOOLS, params, "tools")
+
+    def _tools_call(self, params):
+        arguments = params.get("arguments") or {}
+        name = params["name"]
+        if name == "echo":
+            text = str(arguments["message"])
+        elif name == "add":
+            text = str(arguments["a"] + arguments["b"])
+        else:
+            raise ValueError(f"onbekende tool {name}")
+        return {"content": [{"type": "text", "text": text}], "isError": False}
+
+    def _resources_list(self, params):
+        resources = self.resources + [
+            {"uri": uri, "name": uri, "mimeType": "application/octet-stream"} for uri in self.blobs
+        ]
+        return self._page(resources, params, "resources")
+
+    def _resources_read(self, params):
+        uri = params["uri"]
+        if uri in self.blobs:
+            blob = base64.b64encode(self.blobs[uri]).decode("ascii")
+            return {"contents": [{"uri": uri, "mimeType": "application/octet-stream", "blob": blob}]}
+        index = int(uri.rsplit("/", 1)[-1])
+        return {"contents": [{"uri": uri, "mimeType": "text/plain", "text": f"Inhoud van tekst {index}"}]}
+
+    def _prompts_list(self, params):
+        return self._page([], params, "prompts")
+
+
+def serve_stdio(server=None, stdin=None, stdout=None):
+    """Laat een server berichten verwerken via STDIN/STDOUT (één JSON-bericht per regel).
+
+    Args:
+        server (DemoServer, optional): De server (standaard een nieuwe DemoServer)
+        stdin: Invoerstroom (standaard sys.stdin)
+        stdout: Uitvoerstroom (standaard sys.stdout)
+    """
+    server = server or DemoServer()
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        response = server.handle_message(json.loads(line))
+        if response is not None:
+            stdout.write(json.dumps(response) + "\n")
+            stdout.flush()
+
+
+class _ReusableTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+def create_socket_server(address, server=None):
+    """Maakt een socketserver waarin één gedeelde server alle clients bedient.
+
+    Args:
+        address (str): Het socketadres ('unix:/pad' of 'tcp://host:poort')
+        server (DemoServer, optional): De gedeelde server (standaard een nieuwe DemoServer)
+
+    Returns:
+        socketserver.BaseServer: De socketserver; start met serve_forever(), stop met shutdown()
+    """
+    from src.mcp_client import parse_socket_address
+
+    server = server or DemoServer()
+    lock = threading.Lock()
+    family, target = parse_socket_address(address)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                line = line.strip()
+                if not line:
+                    continue
+                with lock:
+                    response = server.handle_message(json.loads(line))
+                if response is not None:
+                    self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.unlink(target)
+        socket_server = socketserver.ThreadingUnixStreamServer(target, Handler)
+    else:
+        socket_server = _ReusableTCPServer(target, Handler)
+    socket_server.daemon_threads = True
+    return socket_server
+
+
+def serve_socket(address, server=None):
+    """Laat één gedeelde server berichten verwerken voor meerdere socketclients.
+
+    Args:
+        address (str): Het socketadres ('unix:/pad' of 'tcp://host:poort')
+        server (DemoServer, optional): De gedeelde server (standaard een nieuwe DemoServer)
+    """
+    with create_socket_server(address, server) as socket_server:
+        socket_server.serve_forever()
+
+
+def main():
+    """Start de demo server via STDIO of op een socket."""
+    parser = argparse.ArgumentParser(description="MCP Demo Server")
+    parser.add_argument("--socket", type=str, help="Luister op een socket (unix:/pad of tcp://host:poort)")
+    args = parser.parse_args()
+    if args.socket:
+        serve_socket(args.socket)
+    else:
+        serve_stdio()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+MCP Endpoints - Keuze en failover tussen gelijkwaardige remote servers
+
+Deze module bevat een pool van gelijkwaardige endpoints (bijvoorbeeld regionale replica's).
+Per endpoint wordt de latency bijgehouden als exponentieel gewogen gemiddelde (EWMA) en het
+aantal opeenvolgende fouten. Na te veel fouten opent een circuit breaker: het endpoint wordt
+een tijd overgeslagen en daarna met één poging (half-open) opnieuw geprobeerd.
+"""
+
+import threading
+import time
+
+
+class Endpoint:
+    """Gezondheid en latency van één endpoint."""
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None  # EWMA van de latency in seconden (None = nog niet gemeten)
+        self.failures = 0  # Opeenvolgende fouten
+        self.opened_until = None  # Circuit breaker open tot dit tijdstip (time.monotonic)
+        self.requests = 0
+        self.errors = 0
+
+    def state(self, now=None):
+        """Geeft de toestand van de circuit breaker terug: closed, open of half-open."""
+        if self.opened_until is None:
+            return "closed"
+        return "open" if (now or time.monotonic()) < self.opened_until else "half-open"
+
+
+class EndpointPool:
+    """Kiest het snelste gezonde endpoint uit een lijst gelijkwaardige URL's.
+
+    Args:
+        urls (list): De URL's van de endpoints, in volgorde van voorkeur
+        alpha (float): Gewicht van een nieuwe meting in het latency-gemiddelde
+        failure_threshold (int): Aantal opeenvolgende fouten waarna het circuit opent
+        reset_timeout (float): Seconden dat een open circuit wordt overgeslagen
+    """
+
+    def __init__(self, urls, alpha=0.3, failure_threshold=3, reset_timeout=30.0):
+        if not urls:
+            raise ValueError("Een endpoint-pool heeft minimaal één URL nodig.")
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.endpoints = [Endpoint(url) for url in urls]
+        self._by_url = {endpoint.url: endpoint for endpoint in self.endpoints}
+        self._lock = threading.Lock()
+
+    @property
+    def urls(self):
+        """De URL's van alle endpoints."""
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def select(self, exclude=()):
+        """Geeft het snelste endpoint terug waarvan het circuit niet open staat.
+
+        Nog niet gemeten endpoints gaan voor, zodat elk endpoint een keer wordt geprobeerd;
+        bij gelijke latency wint de volgorde van de lijst.
+
+        Args:
+            exclude (iterable): URL's die niet gekozen mogen worden
+
+        Returns:
+            str: De URL, of None als geen enkel endpoint beschikbaar is
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                (endpoint.latency or 0.0, index, endpoint.url)
+                for index, endpoint in enumerate(self.endpoints)
+                if endpoint.url not in exclude and endpoint.state(now) != "open"
+            ]
+        return min(candidates)[2] if candidates else None
+
+    def fallback(self):
+        """Geeft het endpoint terug waarvan het circuit het eerst weer sluit."""
+        with self._lock:
+            return min(self.endpoints, key=lambda endpoint: endpoint.opened_until or 0.0).url
+
+    def record_success(self, url, latency=None):
+        """Registreert een geslaagd verzoek en sluit het circuit.
+
+        Args:
+            url (str): Het endpoint
+            latency (float, optional): De gemeten latency in seconden
+        """
+        endpoint = self._by_url.get(url)
+        if endpoint is None:
+            return
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.failures = 0
+            endpoint.opened_until = None
+            if latency is not None:
+                if endpoint.latency is None:
+                    endpoint.latency = latency
+                else:
+                    endpoint.latency += self.alpha * (latency - endpoint.latency)
+
+    def record_failure(self, url):
+        """Registreert een fout en opent zo nodig het circuit.
+
+        Args:
+            url (str): Het endpoint
+
+        Returns:
+            bool: True als het circuit door deze fout (opnieuw) is geopend
+        """
+        endpoint = self._by_url.get(url)
+        if endpoint is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            endpoint.requests += 1
+            endpoint.errors += 1
+            endpoint.failures += 1
+            # Een mislukte proefpoging in de half-open toestand opent het circuit direct weer
+            if endpoint.failures >= self.failure_threshold or endpoint.opened_until is not None:
+                endpoint.opened_until = now + self.reset_timeout
+                return True
+        return False
+
+    def stats(self):
+        """Geeft per endpoint de latency (ms), fouten en toestand van het circuit terug."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "url": endpoint.url,
+                    "latency_ms": endpoint.latency * 1000 if endpoint.latency is not None else None,
+                    "failures": endpoint.failures,
+                    "state": endpoint.state(now),
+                    "requests": endpoint.requests,
+                    "errors": endpoint.errors,
+                }
+                for endpoint in self.endpoints
+            ]
@@ -0,0 +1,128 @@
+"""
+MCP Flight Recorder - Ringbuffer met de laatste verzoeken, op aanvraag te dumpen
+
+Deze module bevat een goedkope ringbuffer die per client de laatste N verzoeken bewaart
+(id, methode, groottes, verzend- en ontvangsttijd en uitkomst). Blijft een verzoek hangen,
+dan kan de inhoud als JSON worden weggeschreven: via een API-aanroep, automatisch bij een
+time-out of verbroken verbinding, of met een signaal zoals SIGUSR1.
+"""
+
+import json
+import os
+import signal
+import sys
+import time
+import weakref
+from collections import deque
+
+FIELDS = ("id", "method", "request_bytes", "response_bytes", "sent_at", "received_at", "outcome")
+
+# Alle clients met een flight recorder, voor een dump via een signaal
+_clients = weakref.WeakSet()
+
+
+def safe_copy(iterable):
+    """Kopieert een deque of dict-view die door andere threads kan worden gewijzigd.
+
+    Er wordt bewust geen lock gebruikt: een dump vanuit een signaalhandler mag niet
+    blijven wachten op een lock die de onderbroken thread zelf vasthoudt.
+    """
+    for _ in range(10):
+        try:
+            return list(iterable)
+        except RuntimeError:
+            continue  # Gewijzigd tijdens het kopiëren; probeer opnieuw
+    return []
+
+
+class FlightRecorder:
+    """Een ringbuffer met de laatste `size` afgeronde verzoeken.
+
+    Een meting is één tuple-append op een deque met maximale lengte, zodat het
+    vastleggen altijd aan kan blijven.
+
+    Args:
+        size (int): Maximaal aantal bewaarde verzoeken
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self._entries = deque(maxlen=size)
+        # Direct de append van de deque, zonder extra methodeaanroep
+        self.record = self._entries.append
+
+    def entries(self):
+        """Geeft de bewaarde verzoeken terug, oudste eerst.
+
+        Returns:
+            list: Per verzoek een dict met FIELDS en de duur in seconden
+        """
+        entries = []
+        for entry in safe_copy(self._entries):
+            item = dict(zip(FIELDS, entry))
+            sent_at, received_at = item["sent_at"], item["received_at"]
+            item["duration"] = received_at - sent_at if received_at is not None else None
+            entries.append(item)
+        return entries
+
+
+def register_client(client):
+    """Meldt een client aan voor dumps via een signaal."""
+    _clients.add(client)
+
+
+def snapshot_all():
+    """Geeft de flight recorders van alle aangemelde clients terug."""
+    return {
+        "pid": os.getpid(),
+        "time": time.time(),
+        "clients": [client.flight_recorder_snapshot() for client in safe_copy(_clients)],
+    }
+
+
+def dump_all(path=None):
+    """Schrijft de flight recorders van alle aangemelde clients als JSON weg.
+
+    Args:
+        path (str, optional): Het doelbestand (standaard STDERR)
+    """
+    write_dump(snapshot_all(), path)
+
+
+def write_dump(data, path=None):
+    """Schrijft een dump als JSON naar een bestand of naar STDERR.
+
+    Args:
+        data (dict): De te dumpen gegevens
+        path (str, optional): Het doelbestand (standaard STDERR)
+    """
+    text = json.dumps(data, indent=2, default=str)
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stderr.write(text + "\n")
+        sys.stderr.flush()
+
+
+def install_signal_handler(signum=None, path=None):
+    """Dumpt de flight recorders van alle clients zodra het proces een signaal ontvangt.
+
+    Moet vanuit de hoofdthread worden aangeroepen.
+
+    Args:
+        signum (int, optional): Het signaal (standaard SIGUSR1)
+        path (str, optional): Het doelbestand (standaard STDERR)
+
+    Returns:
+        bool: False als het signaal op dit platform niet bestaat (bijvoorbeeld Windows)
+    """
+    signum = signum or getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        return False
+
+    def handler(received, frame):
+        dump_all(path)
+
+    signal.signal(signum, handler)
+    return True
@@ -0,0 +1,174 @@
+"""
+MCP Formatting - Snelle uitvoerformaten voor (grote) antwoorden
+
+Deze module schrijft JSON-RPC antwoorden naar een stream in verschillende formaten:
+
+- pretty:  ingesprongen JSON, in stukken weggeschreven in plaats van als één grote string
+- compact: JSON zonder witruimte op één regel (via de snelle C-encoder)
+- ndjson:  één compacte JSON-regel per item van de lijst in het resultaat (zoals de tools
+           van tools/list), of per geselecteerde waarde bij een pad
+- result:  alleen het resultaat (ingesprongen); een fout gaat naar STDERR
+
+Met een jq-achtig pad (bijvoorbeeld .result.tools[].name) worden alleen de geselecteerde
+waarden weggeschreven. Niet-ASCII-tekens worden in alle formaten ongewijzigd geschreven.
+"""
+
+import json
+import re
+import sys
+
+FORMATS = ("pretty", "compact", "ndjson", "result")
+
+# Grootte waarboven de verzamelde stukken van de pretty-uitvoer worden weggeschreven
+WRITE_CHUNK_SIZE = 64 * 1024
+
+_PATH_TOKEN = re.compile(r'\.([A-Za-z_][\w-]*)|\[(-?\d+)\]|\[\]|\["((?:[^"\\]|\\.)*)"\]|\.')
+
+_compact_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+_pretty_encoder = json.JSONEncoder(indent=2, ensure_ascii=False)
+
+
+def parse_path(expression):
+    """Zet een jq-achtig pad om naar een lijst stappen.
+
+    Ondersteund: .sleutel, ["sleutel"], [n] (ook negatief), [] (alle items) en . (alles).
+
+    Args:
+        expression (str): Het pad, bijvoorbeeld '.result.tools[].name'
+
+    Returns:
+        list: Stappen als ("key", naam), ("index", n) of ("iterate", None)
+
+    Raises:
+        ValueError: Als het pad ongeldig is
+    """
+    if not expression.startswith((".", "[")):
+        raise ValueError(f"Ongeldig pad: {expression} (begin met '.')")
+    steps = []
+    position = 0
+    while position < len(expression):
+        match = _PATH_TOKEN.match(expression, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Ongeldig pad: {expression} (bij positie {position})")
+        key, index, quoted = match.group(1), match.group(2), match.group(3)
+        if key is not None:
+            steps.append(("key", key))
+        elif index is not None:
+            steps.append(("index", int(index)))
+        elif quoted is not None:
+            steps.append(("key", json.loads(f'"{quoted}"')))
+        elif match.group(0) == "[]":
+            steps.append(("iterate", None))
+        position = match.end()
+    return steps
+
+
+def extract_path(value, expression):
+    """Geeft de waarden terug die een jq-achtig pad selecteert.
+
+    Net als bij jq levert een ontbrekende sleutel of index None op.
+
+    Args:
+        value: De JSON-waarde
+        expression (str/list): Het pad, of het resultaat van parse_path
+
+    Returns:
+        iterator: De geselecteerde waarden
+
+    Raises:
+        ValueError: Als het pad niet op de waarde past (bijvoorbeeld een sleutel in een lijst)
+    """
+    steps = parse_path(expression) if isinstance(expression, str) else expression
+    values = [value]
+    for kind, argument in steps:
+        selected = []
+        for current in values:
+            if kind == "iterate":
+                if isinstance(current, dict):
+                    selected.extend(current.values())
+                elif isinstance(current, list):
+                    selected.extend(current)
+                else:
+                    raise ValueError(f"Kan niet itereren over {type(current).__name__}")
+            elif kind == "key":
+                if current is not None and not isinstance(current, dict):
+                    raise ValueError(f"Kan sleutel '{argument}' niet opzoeken in {type(current).__name__}")
+                selected.append(current.get(argument) if current is not None else None)
+            else:
+                if current is not None and not isinstance(current, list):
+                    raise ValueError(f"Kan index {argument} niet opzoeken in {type(current).__name__}")
+                in_range = current is not None and -len(current) <= argument < len(current)
+                selected.append(current[argument] if in_range else None)
+        values = selected
+    return iter(values)
+
+
+def _result_items(response):
+    """Geeft de items van de enige lijst in het resultaat terug, anders het hele antwoord."""
+    result = response.get("result") if isinstance(response, dict) else None
+    if isinstance(result, dict):
+        lists = [item for item in result.values() if isinstance(item, list)]
+        if len(lists) == 1:
+            return lists[0]
+    return [response]
+
+
+def write_pretty(value, stream):
+    """Schrijft ingesprongen JSON in stukken weg, zonder eerst de hele tekst op te bouwen."""
+    buffer = []
+    size = 0
+    for chunk in _pretty_encoder.iterencode(value):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= WRITE_CHUNK_SIZE:
+            stream.write("".join(buffer))
+            buffer = []
+            size = 0
+    buffer.append("\n")
+    stream.write("".join(buffer))
+
+
+def write_compact(value, stream):
+    """Schrijft JSON zonder witruimte op één regel."""
+    stream.write(_compact_encoder.encode(value))
+    stream.write("\n")
+
+
+def write_response(response, output_format="pretty", path=None, stream=None):
+    """Schrijft een antwoord weg in het opgegeven formaat.
+
+    Args:
+        response: Het JSON-RPC antwoord (of een andere JSON-waarde)
+        output_format (str, optional): Een van FORMATS (standaard pretty)
+        path (str, optional): jq-achtig pad; alleen de geselecteerde waarden worden geschreven
+        stream (file, optional): Waar de uitvoer heen gaat (standaard STDOUT)
+
+    Returns:
+        bool: False als het antwoord een fout bevat
+
+    Raises:
+        ValueError: Bij een onbekend formaat of een ongeldig pad
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Onbekend uitvoerformaat: {output_format}")
+    stream = stream or sys.stdout
+    ok = not (isinstance(response, dict) and "error" in response)
+
+    if output_format == "result" and path is None:
+        if not ok:
+            write_pretty(response["error"], sys.stderr)
+            return False
+        value = response.get("result") if isinstance(response, dict) else response
+        values = [value]
+    elif path is not None:
+        values = extract_path(response, path)
+    elif output_format == "ndjson" and ok:
+        values = _result_items(response)
+    else:
+        values = [response]
+
+    write = write_pretty if output_format in ("pretty", "result") else write_compact
+    for value in values:
+        write(value, stream)
+    stream.flush()
+    return ok
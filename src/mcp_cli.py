@@ -9,20 +9,164 @@ verzoeken naar MCP servers, zowel lokaal (via STDIO) als remote (via SSE).
 import argparse
 import json
 import sys
-import os
+import time
 from pathlib import Path
-from src.mcp_client import MCPClient, log, ConfigurationError, ConnectionError, CommunicationError
+from src.profiling import Profiler
+from src.flight_recorder import install_signal_handler
+from src.workflow import load_workflow, run_workflow, WorkflowError
+from src.repl import InteractiveSession
+from src.formatting import FORMATS, parse_path, write_response
+from src.traffic import load_capture, replay, summarize, format_report
+from src import bench
+from src.params import RawParams
+from src.mcp_client import (
+    MCPClient, log, raised_log_level, set_log_stream, MCPClientError, ConfigurationError, ConnectionError,
+    STARTUP_TIMINGS, FLIGHT_RECORDER_FILE
+)
 
 def print_env_help():
     """Toont hulp over het .env bestand."""
     print("\nOm de MCP CLI te configureren:")
     print("1. Kopieer .env.example naar .env in de hoofdmap van het project")
     print("2. Bewerk het .env bestand met de volgende instellingen:")
-    print("   - MCP_SERVER_URL: URL voor remote verbindingen via SSE")
+    print("   - MCP_SERVER_URL: URL voor remote verbindingen via SSE (meerdere gescheiden door komma's)")
     print("   - MCP_LOCAL_COMMAND: Commando voor lokale verbindingen via STDIO")
+    print("   - MCP_SOCKET_ADDRESS: Socketadres voor lokale verbindingen via een socket")
     print("   - API_KEY: Optionele API-sleutel voor authenticatie")
     print("   - LOG_LEVEL: Logniveau (DEBUG, INFO, ERROR)\n")
 
+def print_raw(client, method, params):
+    """Voert een verzoek uit in de passthrough-modus en schrijft het antwoord ongewijzigd weg.
+    
+    Het antwoord wordt niet gedecodeerd en opnieuw gecodeerd, maar als originele buffer
+    naar STDOUT geschreven (één JSON-bericht per regel).
+    
+    Args:
+        client (MCPClient): De verbonden client
+        method (str): De JSON-RPC methode
+        params (dict/list): De parameters voor de methode
+        
+    Returns:
+        bool: False als het verzoek mislukte
+    """
+    ok = True
+    try:
+        response = client.call_raw(method, params)
+    except MCPClientError as e:
+        log("ERROR", f"Fout bij uitvoeren {method}: {e}")
+        response = json.dumps({"error": str(e)})
+        ok = False
+    if isinstance(response, bytes):
+        sys.stdout.flush()
+        sys.stdout.buffer.write(response)
+        sys.stdout.buffer.write(b"\n")
+        sys.stdout.buffer.flush()
+    else:
+        sys.stdout.write(response)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+    return ok
+
+def print_workflow(client, path):
+    """Voert een workflowbestand uit en schrijft elk stapresultaat weg zodra het binnen is.
+    
+    Elke stap wordt als één JSON-regel {"step": naam, "response": antwoord} naar STDOUT
+    geschreven, in de volgorde waarin de stappen klaar zijn.
+    
+    Args:
+        client (MCPClient): De verbonden client
+        path (str): Het pad van het workflowbestand
+        
+    Returns:
+        int: Het aantal mislukte of overgeslagen stappen
+    """
+    failed = 0
+    for name, response in run_workflow(client, load_workflow(path)):
+        if "error" in response:
+            failed += 1
+            log("ERROR", f"Stap '{name}' mislukt: {response['error']}")
+        print(json.dumps({"step": name, "response": response}), flush=True)
+    return failed
+
+def print_replay(client, path, speed):
+    """Speelt een opname af en toont de latencies naast die van de opname.
+    
+    Args:
+        client (MCPClient): De verbonden client
+        path (str): Het opnamebestand
+        speed (float): Afspeelsnelheid; 0 is zo snel mogelijk
+        
+    Returns:
+        int: Het aantal mislukte verzoeken
+    """
+    results = replay(client, load_capture(path), speed=speed)
+    failed = sum(1 for result in results if result["error"] is not None)
+    print("Latency per methode (milliseconden, opname tegenover nu):")
+    print(format_report(summarize(results)))
+    if failed:
+        log("ERROR", f"{failed} van de {len(results)} verzoeken mislukt bij afspelen.")
+    return failed
+
+def print_bench(client, args, params):
+    """Voert een benchmark uit met de opties van de CLI en toont het resultaat.
+    
+    Args:
+        client (MCPClient): De verbonden client
+        args (Namespace): De argumenten (mix of method, duration, concurrency, rate, requests)
+        params: De parameters bij --method
+        
+    Returns:
+        dict: Het resultaat (zie src.bench.format_report)
+    """
+    if args.mix:
+        mix = bench.load_mix(args.mix)
+    else:
+        mix = bench.parse_mix([{"method": args.method, "params": params}])
+    if args.rate:
+        log("INFO", f"Open-loop benchmark: {args.rate:g} verzoeken/s gedurende {args.duration:g} s")
+    else:
+        log("INFO", f"Closed-loop benchmark: concurrency {args.concurrency}")
+    # Een logregel per verzoek zou de meting vertekenen; alleen fouten worden nog gelogd
+    with raised_log_level("ERROR"):
+        if args.rate:
+            result = bench.run_open_loop(client, mix, args.rate, duration=args.duration)
+        else:
+            result = bench.run_closed_loop(client, mix, concurrency=args.concurrency,
+                                           duration=args.duration, requests=args.requests)
+    print(bench.format_report(result))
+    return result
+
+def parse_speed(value):
+    """Zet een afspeelsnelheid om: een factor (bijvoorbeeld 1 of 10) of 'max'."""
+    if value == "max":
+        return 0.0
+    try:
+        speed = float(value)
+    except ValueError:
+        speed = -1.0
+    if speed <= 0:
+        raise argparse.ArgumentTypeError(f"ongeldige snelheid: {value} (gebruik een getal > 0 of 'max')")
+    return speed
+
+def print_profile(profiler, pstats_file=None, compression_stats=None):
+    """Toont de tijdsverdeling per fase op STDERR en schrijft optioneel cProfile-statistieken.
+    
+    Args:
+        profiler (Profiler): De profiler met de metingen
+        pstats_file (str, optional): Pad voor het pstats-bestand
+        compression_stats (CompressionStats, optional): Getoond als er iets is gecomprimeerd
+    """
+    if pstats_file:
+        profiler.stop_cprofile(pstats_file)
+    print("\nProfiel (tijden in milliseconden):", file=sys.stderr)
+    print(profiler.format_summary(), file=sys.stderr)
+    if compression_stats is not None and (compression_stats.requests_compressed
+                                          or compression_stats.responses_compressed):
+        print(compression_stats.format_summary(), file=sys.stderr)
+    if pstats_file:
+        print(f"cProfile-statistieken geschreven naar {pstats_file} (bekijk met: python -m pstats {pstats_file})",
+              file=sys.stderr)
+
 def main():
     """Hoofdfunctie voor de MCP CLI."""
     parser = argparse.ArgumentParser(description="MCP Command Line Interface")
@@ -35,6 +179,25 @@ def main():
     connection_group.add_argument(
         "--remote", "-r", action="store_true", help="Use remote connection via SSE"
     )
+    connection_group.add_argument(
+        "--http", action="store_true", help="Use remote connection via Streamable HTTP"
+    )
+    connection_group.add_argument(
+        "--socket", "-s", nargs="?", const="", default=None, metavar="ADDRESS",
+        help="Use local connection via Unix socket or TCP (default: MCP_SOCKET_ADDRESS)"
+    )
+    connection_group.add_argument(
+        "--inproc", nargs="?", const="src.demo_server:DemoServer", default=None, metavar="ENTRY_POINT",
+        help="Load a Python server in this process (default: the bundled demo server)"
+    )
+    connection_group.add_argument(
+        "--compress", choices=("off", "gzip", "zstd", "auto"), default=None,
+        help="Compress large HTTP request bodies (default: MCP_REQUEST_COMPRESSION, off)"
+    )
+    connection_group.add_argument(
+        "--supervise", action="store_true",
+        help="Restart the local server automatically after a crash (only with --local)"
+    )
     
     # Command opties
     command_group = parser.add_argument_group("Command Options")
@@ -44,6 +207,69 @@ def main():
     command_group.add_argument(
         "--params", "-p", type=str, help="JSON-RPC params as JSON string"
     )
+    command_group.add_argument(
+        "--params-file", type=str, metavar="FILE",
+        help="Send JSON-RPC params from a file as-is (memory-mapped, not parsed or re-encoded)"
+    )
+    command_group.add_argument(
+        "--format", "-f", choices=FORMATS, default=None,
+        help="Output format: pretty (streamed, default), compact, ndjson (one line per result item) or result"
+    )
+    command_group.add_argument(
+        "--path", type=str, metavar="EXPR",
+        help="Only output the values selected by a jq-style path, e.g. '.result.tools[].name'"
+    )
+    command_group.add_argument(
+        "--record", type=str, metavar="FILE",
+        help="Record all sent and received messages to FILE (default: MCP_TRAFFIC_FILE)"
+    )
+    command_group.add_argument(
+        "--replay", type=str, metavar="FILE",
+        help="Replay the requests of a recording and compare latencies with the recording"
+    )
+    command_group.add_argument(
+        "--speed", type=parse_speed, default=1.0,
+        help="Replay speed: a factor such as 1 (as recorded) or 10, or 'max' (default: 1)"
+    )
+    command_group.add_argument(
+        "--workflow", "-w", type=str, metavar="FILE",
+        help="Run a JSON workflow of dependent calls over one connection (independent steps in parallel)"
+    )
+    command_group.add_argument(
+        "--raw", action="store_true",
+        help="Pass responses through unchanged, without decoding and re-encoding them"
+    )
+    
+    # Diagnostiek
+    diagnostics_group = parser.add_argument_group("Diagnostics")
+    diagnostics_group.add_argument(
+        "--profile", nargs="?", const="", default=None, metavar="PSTATS_FILE",
+        help="Print a per-phase timing breakdown to stderr; optionally write cProfile stats to a file"
+    )
+    
+    # Benchmarkopties
+    bench_group = parser.add_argument_group("Bench Options")
+    bench_group.add_argument(
+        "--bench", action="store_true",
+        help="Benchmark the server with --method/--params or a --mix file and report latency percentiles"
+    )
+    bench_group.add_argument(
+        "--mix", type=str, metavar="FILE",
+        help="JSON list of requests with optional weights: [{\"method\": ..., \"params\": ..., \"weight\": 1}]"
+    )
+    bench_group.add_argument(
+        "--duration", type=float, default=10.0, help="Benchmark duration in seconds (default: 10)"
+    )
+    bench_group.add_argument(
+        "--concurrency", type=int, default=8, help="Closed loop: number of concurrent requests (default: 8)"
+    )
+    bench_group.add_argument(
+        "--requests", type=int, default=None, help="Closed loop: stop after this many requests instead of --duration"
+    )
+    bench_group.add_argument(
+        "--rate", type=float, default=None,
+        help="Open loop: requests per second at fixed arrival times (avoids coordinated omission)"
+    )
     
     # Configuratieopties
     config_group = parser.add_argument_group("Configuration Options")
@@ -53,6 +279,18 @@ def main():
     
     # Parse argumenten
     args = parser.parse_args()
+    if args.raw and (args.format is not None or args.path is not None):
+        parser.error("--raw geeft antwoorden ongewijzigd door; gebruik geen --format of --path")
+    args.format = args.format or "pretty"
+    if args.path is not None:
+        try:
+            parse_path(args.path)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.params and args.params_file:
+        parser.error("gebruik --params of --params-file, niet allebei")
+    if args.bench and not (args.method or args.mix):
+        parser.error("--bench vereist --method of --mix")
     
     # Toon configuratiehulp indien gevraagd
     if args.show_config:
@@ -66,20 +304,38 @@ def main():
         sys.exit(1)
     
     # Valideer dat we of local of remote gebruiken
-    if not (args.local or args.remote):
+    use_socket = args.socket is not None
+    use_inproc = args.inproc is not None
+    if not (args.local or args.remote or args.http or use_socket or use_inproc):
         log("ERROR", "Specificeer verbindingsmodus: --local of --remote")
         parser.print_help()
         sys.exit(1)
     
-    if args.local and args.remote:
+    if (args.local + args.remote + args.http + use_socket + use_inproc) > 1:
         log("ERROR", "Kies één verbindingsmodus: --local OF --remote")
         parser.print_help()
         sys.exit(1)
         
-    # Creëer client en maak verbinding
-    client = MCPClient()
+    # SIGUSR1 dumpt de recente verzoeken (bijvoorbeeld bij een hangend verzoek)
+    install_signal_handler(path=FLIGHT_RECORDER_FILE or None)
     
+    # Creëer client en maak verbinding
+    profiler = None
+    if args.profile is not None:
+        profiler = Profiler()
+        for name, duration in STARTUP_TIMINGS.items():
+            profiler.record(f"startup: {name}", duration)
+        if args.profile:
+            profiler.start_cprofile()
+    if args.method or args.bench or args.workflow or args.replay:
+        # STDOUT is voor de uitvoer (JSON of een rapport), zodat de CLI in een pipe past
+        set_log_stream(sys.stderr)
+    client = None
+    raw_params = None  # Gemapt parameterbestand (--params-file), gesloten bij het afsluiten
     try:
+        client = MCPClient(raw=args.raw, profile=profiler or False, traffic_file=args.record,
+                           request_compression=args.compress)
+        connect_started = time.perf_counter()
         if args.local:
             from os import getenv
             local_command = getenv("MCP_LOCAL_COMMAND")
@@ -88,8 +344,22 @@ def main():
                 print("Je moet een lokaal commando instellen in je .env bestand:")
                 print("MCP_LOCAL_COMMAND=pad/naar/je/mcp-server")
                 sys.exit(1)
-            success = client.connect_stdio(local_command)
-        else:  # args.remote
+            if args.supervise:
+                success = client.connect_stdio(local_command, supervise=True)
+            else:
+                success = client.connect_stdio(local_command)
+        elif use_socket:
+            from os import getenv
+            socket_address = args.socket or getenv("MCP_SOCKET_ADDRESS")
+            if not socket_address:
+                log("ERROR", "MCP_SOCKET_ADDRESS niet ingesteld in .env bestand")
+                print("Je moet een socketadres opgeven of instellen in je .env bestand:")
+                print("MCP_SOCKET_ADDRESS=unix:/tmp/mcp.sock")
+                sys.exit(1)
+            success = client.connect_socket(socket_address)
+        elif use_inproc:
+            success = client.connect_inproc(args.inproc)
+        else:  # args.remote of args.http
             from os import getenv
             remote_url = getenv("MCP_SERVER_URL")
             if not remote_url:
@@ -97,85 +367,87 @@ def main():
                 print("Je moet een server URL instellen in je .env bestand:")
                 print("MCP_SERVER_URL=https://mijn-mcp-server.nl/events")
                 sys.exit(1)
-            success = client.connect_sse(remote_url)
+            if args.http:
+                success = client.connect_http(remote_url)
+            else:
+                success = client.connect_sse(remote_url)
+        if profiler:
+            profiler.record("connect", time.perf_counter() - connect_started)
         
         if not success:
             log("ERROR", "Verbinding niet gelukt, zie bovenstaande foutmeldingen voor meer informatie.")
             sys.exit(1)
             
+        # Als een opname is opgegeven, speel de verzoeken af over deze verbinding
+        if args.replay:
+            failed = print_replay(client, args.replay, args.speed)
+            client.close()
+            if failed:
+                sys.exit(1)
+            return
+        
+        # Als een workflow is opgegeven, voer alle stappen uit over deze verbinding
+        if args.workflow:
+            try:
+                failed = print_workflow(client, args.workflow)
+            except WorkflowError as e:
+                log("ERROR", f"Ongeldige workflow: {e}")
+                sys.exit(1)
+            client.close()
+            if failed:
+                sys.exit(1)
+            return
+        
         # Als method is opgegeven, voer deze uit
-        if args.method:
+        if args.method or args.bench:
             params = None
             if args.params:
                 try:
                     params = json.loads(args.params)
                 except json.JSONDecodeError as e:
                     log("ERROR", f"Ongeldige JSON in params: {args.params}")
-                    print(f"Fout bij parsen van JSON: {e}")
-                    print("Voorbeeld van geldige JSON: '{\"key\": \"value\"}' of '[1, 2, 3]'")
+                    print(f"Fout bij parsen van JSON: {e}", file=sys.stderr)
+                    print("Voorbeeld van geldige JSON: '{\"key\": \"value\"}' of '[1, 2, 3]'", file=sys.stderr)
+                    sys.exit(1)
+            elif args.params_file:
+                try:
+                    params = raw_params = RawParams.from_file(args.params_file)
+                except (OSError, ValueError) as e:
+                    log("ERROR", f"Kan parameterbestand niet gebruiken: {e}")
+                    sys.exit(1)
+            
+            if args.bench:
+                result = print_bench(client, args, params)
+                client.close()
+                if result["requests"] and result["error_rate"] == 1.0:
+                    sys.exit(1)
+                return
+            
+            if args.raw:
+                with client._phase("output"):
+                    ok = print_raw(client, args.method, params)
+                client.close()
+                if not ok:
                     sys.exit(1)
+                return
             
             response = client.send_request(args.method, params)
-            if "error" in response and isinstance(response["error"], str):
-                log("ERROR", f"Fout bij uitvoeren {args.method}: {response['error']}")
-                print(json.dumps(response, indent=2))
-            else:
-                print(json.dumps(response, indent=2))
+            with client._phase("output"):
+                if "error" in response and isinstance(response["error"], str):
+                    log("ERROR", f"Fout bij uitvoeren {args.method}: {response['error']}")
+                try:
+                    ok = write_response(response, args.format, args.path)
+                except ValueError as e:
+                    log("ERROR", f"Kan uitvoer niet formatteren: {e}")
+                    sys.exit(1)
             client.close()
+            if not ok:
+                # Een foutantwoord moet ook voor scripts herkenbaar zijn
+                sys.exit(1)
             return
         
-        # Anders start de interactieve modus
-        print("MCP CLI Interactive Mode. Type 'help' voor commando's of 'exit' om af te sluiten.")
-        while True:
-            try:
-                cmd = input("> ")
-                cmd = cmd.strip()
-                
-                if cmd.lower() in ["exit", "quit", "q"]:
-                    break
-                elif cmd.lower() in ["help", "h", "?"]:
-                    print("\nBeschikbare commando's:")
-                    print("  exit, quit, q   - Sluit de MCP CLI af")
-                    print("  help, h, ?      - Toon deze hulp")
-                    print("  clear, cls      - Maak het scherm leeg")
-                    print("\nJSON-RPC-verzoeken:")
-                    print("  methodNaam [params als JSON]")
-                    print("  Bijvoorbeeld: getVersion {}\n")
-                    continue
-                elif cmd.lower() in ["clear", "cls"]:
-                    os.system('cls' if os.name == 'nt' else 'clear')
-                    continue
-                elif not cmd:
-                    continue
-                    
-                # Parse command: method [params as JSON]
-                parts = cmd.strip().split(" ", 1)
-                method = parts[0]
-                params = None
-                
-                if len(parts) > 1:
-                    try:
-                        params = json.loads(parts[1])
-                    except json.JSONDecodeError as e:
-                        log("ERROR", f"Ongeldige JSON in params: {parts[1]}")
-                        print(f"Fout bij parsen van JSON: {e}")
-                        print("Voorbeeld van geldige JSON: '{\"key\": \"value\"}' of '[1, 2, 3]'")
-                        continue
-                
-                response = client.send_request(method, params)
-                if "error" in response and isinstance(response["error"], str):
-                    log("ERROR", f"Fout bij uitvoeren {method}: {response['error']}")
-                    print(json.dumps(response, indent=2))
-                else:
-                    print(json.dumps(response, indent=2))
-            except KeyboardInterrupt:
-                print("\nProgramma onderbroken met Ctrl+C")
-                break
-            except EOFError:
-                print("\nEinde van input (EOF)")
-                break
-            except Exception as e:
-                log("ERROR", f"Onverwachte fout: {e}")
+        # Anders start de interactieve modus: verzoeken lopen op de achtergrond
+        InteractiveSession(client, raw=args.raw, output_format=args.format, path=args.path).run()
                 
     except ConfigurationError as e:
         log("ERROR", f"Configuratiefout: {e}")
@@ -194,6 +466,11 @@ def main():
                 client.close()
             except Exception as e:
                 log("ERROR", f"Fout bij afsluiten client: {e}")
+        if raw_params is not None:
+            raw_params.close()
+        set_log_stream(None)
+        if profiler:
+            print_profile(profiler, args.profile, getattr(client, "compression", None))
 
 if __name__ == "__main__":
     main()
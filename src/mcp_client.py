@@ -1,14 +1,35 @@
+import time
+
+# Begin van het laden van de client, voor de opstartfasen bij profilering
+_IMPORT_STARTED = time.perf_counter()
+
 import os
-import sys
+import base64
+import hashlib
 import json
 import threading
 import subprocess
+import socket
 import requests
-import time
+import urllib3
 import queue
+from contextlib import contextmanager, nullcontext
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import re
+import importlib
 from pathlib import Path
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlparse, parse_qs
 from dotenv import load_dotenv
 
+from src.profiling import Profiler
+from src.validation import compile_schema
+from src.endpoints import EndpointPool
+from src.flight_recorder import FlightRecorder, register_client, safe_copy, write_dump
+from src import compression
+from src.params import MessageBody, has_raw_params, iter_message
+
 # Custom exception classes
 class MCPClientError(Exception):
     """Basisklasse voor alle MCP Client-gerelateerde fouten."""
@@ -22,20 +43,52 @@ class ConnectionError(MCPClientError):
     """Fout bij het maken van een verbinding."""
     pass
 
+class SessionExpiredError(ConnectionError):
+    """De server kent de sessie niet meer (HTTP 404 op een verzoek met sessie-id)."""
+    pass
+
 class CommunicationError(MCPClientError):
     """Fout bij communicatie met de MCP server."""
     pass
 
+class ValidationError(MCPClientError):
+    """De argumenten voor een tool voldoen niet aan het inputSchema (lokaal gecontroleerd)."""
+    pass
+
+class _EndpointError(CommunicationError):
+    """Het endpoint is onbereikbaar of geeft een serverfout (reden voor failover)."""
+    pass
+
+class RequestTimeoutError(CommunicationError):
+    """Geen antwoord van de MCP server binnen de ingestelde time-out."""
+    pass
+
+class RateLimitError(CommunicationError):
+    """De MCP server weigert het verzoek tijdelijk (HTTP 429 Too Many Requests)."""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 # Laad configuratie uit .env bestand
+_env_started = time.perf_counter()
 env_loaded = False
 dotenv_path = Path('.env')
 if dotenv_path.exists():
     load_dotenv()
     env_loaded = True
 
+# Duur van de opstartfasen in seconden (zie --profile in de CLI)
+STARTUP_TIMINGS = {
+    "imports": _env_started - _IMPORT_STARTED,
+    "env": time.perf_counter() - _env_started,
+}
+
 # Haal configuratiewaarden op met fallbacks
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "")
 MCP_LOCAL_COMMAND = os.getenv("MCP_LOCAL_COMMAND", "")
+MCP_SOCKET_ADDRESS = os.getenv("MCP_SOCKET_ADDRESS", "")
+MCP_SESSION_FILE = os.getenv("MCP_SESSION_FILE", "")
 API_KEY = os.getenv("API_KEY", "")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
@@ -43,10 +96,123 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "ERROR": 40}
 current_log_level = LOG_LEVELS.get(LOG_LEVEL, 20)
 
-def log(level, message):
-    """Logt een bericht als het niveau hoog genoeg is."""
+# Stroom voor logregels; None is STDOUT (zie set_log_stream)
+_log_stream = None
+
+def set_log_stream(stream):
+    """Stuurt logregels naar een andere stroom, bijvoorbeeld STDERR als STDOUT voor uitvoer is.
+    
+    Args:
+        stream (file): De stroom voor logregels, of None voor STDOUT
+    """
+    global _log_stream
+    _log_stream = stream
+
+def log(level, message, *args):
+    """Logt een bericht als het niveau hoog genoeg is.
+    
+    Met args wordt het bericht pas met %-opmaak samengesteld als de regel echt wordt gelogd,
+    zodat een groot bericht onder het logniveau niets kost.
+    """
     if LOG_LEVELS.get(level, 0) >= current_log_level:
-        print(f"[{level}] {message}")
+        if args:
+            message = message % args
+        if _log_stream is None:
+            print(f"[{level}] {message}")
+        else:
+            print(f"[{level}] {message}", file=_log_stream)
+
+@contextmanager
+def raised_log_level(level):
+    """Verhoogt tijdelijk het logniveau, bijvoorbeeld om logregels per verzoek te onderdrukken.
+    
+    Args:
+        level (str): Het minimale niveau (DEBUG, INFO of ERROR); een hoger ingesteld niveau blijft
+    """
+    global current_log_level
+    previous = current_log_level
+    current_log_level = max(previous, LOG_LEVELS.get(level, previous))
+    try:
+        yield
+    finally:
+        current_log_level = previous
+
+def _env_float(name, default):
+    """Leest een numerieke configuratiewaarde, met fallback bij een ongeldige waarde."""
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        log("ERROR", f"Ongeldige waarde voor {name}: {value}. Standaardwaarde {default} wordt gebruikt.")
+        return default
+
+# Time-outs en hartslag (een interval van 0 schakelt de hartslag uit)
+REQUEST_TIMEOUT = _env_float("MCP_REQUEST_TIMEOUT", 10.0)
+HEARTBEAT_INTERVAL = _env_float("MCP_HEARTBEAT_INTERVAL", 0.0)
+HEARTBEAT_TIMEOUT = _env_float("MCP_HEARTBEAT_TIMEOUT", 5.0)
+
+NOT_CONNECTED_MESSAGE = (
+    "Geen verbinding. Gebruik eerst 'connect_stdio', 'connect_sse', 'connect_http', "
+    "'connect_inproc' of 'connect_socket'."
+)
+
+# Buffergrootte voor socketverbindingen (grote berichten zonder veel systeemaanroepen)
+SOCKET_BUFFER_SIZE = 1024 * 1024
+
+# Maximale wachttijd op het 'endpoint'-event van een SSE-server in seconden. Een server die
+# eerst een ander event stuurt, wordt direct als server zonder endpoint-event behandeld.
+SSE_ENDPOINT_TIMEOUT = _env_float("MCP_SSE_ENDPOINT_TIMEOUT", 1.0)
+
+# Maximale stilte op de SSE-stream in seconden (0 = geen limiet). Met hartslagen is er geen
+# limiet: die merken een dode verbinding op. Na de time-out wordt de stream hervat.
+SSE_READ_TIMEOUT = _env_float("MCP_SSE_READ_TIMEOUT", 300.0)
+
+# Berichten vanaf deze grootte (in tekens/bytes) worden buiten de leesthread gedecodeerd (0 = uit)
+DECODE_OFFLOAD_THRESHOLD = int(_env_float("MCP_DECODE_OFFLOAD_THRESHOLD", 1024 * 1024))
+# Aantal threads in de standaardpool voor het decoderen van grote berichten
+DECODE_WORKERS = 2
+
+# Flight recorder: aantal bewaarde verzoeken (0 schakelt uit) en bestand voor automatische dumps
+FLIGHT_RECORDER_SIZE = int(_env_float("MCP_FLIGHT_RECORDER_SIZE", 256))
+FLIGHT_RECORDER_FILE = os.getenv("MCP_FLIGHT_RECORDER_FILE", "")
+
+# Compressie van HTTP-verzoeken: off, gzip, zstd of auto (zstd als de server het accepteert)
+REQUEST_COMPRESSION = os.getenv("MCP_REQUEST_COMPRESSION", "off").strip().lower() or "off"
+# Verzoeken vanaf deze grootte in bytes worden gecomprimeerd
+COMPRESSION_THRESHOLD = int(_env_float("MCP_COMPRESSION_THRESHOLD", 8192))
+# Leesgrootte voor gecomprimeerde HTTP-antwoorden
+HTTP_CHUNK_SIZE = 64 * 1024
+
+# Opnamebestand voor al het verkeer (leeg: niet opnemen), af te spelen met src.traffic
+TRAFFIC_FILE = os.getenv("MCP_TRAFFIC_FILE", "")
+
+# Aantal keer dat een verzoek na een 429 (Too Many Requests) opnieuw wordt geprobeerd
+RATE_LIMIT_RETRIES = 2
+
+# Sleutel met de items in het resultaat van gepagineerde list-methoden
+PAGINATED_RESULT_KEYS = {
+    "tools/list": "tools",
+    "resources/list": "resources",
+    "resources/templates/list": "resourceTemplates",
+    "prompts/list": "prompts",
+}
+
+# MCP-protocolgegevens voor de initialize-handshake
+PROTOCOL_VERSION = "2024-11-05"
+CLIENT_INFO = {"name": "mcp-cli-client", "version": "0.1.0"}
+
+# Methoden die zonder bijwerkingen opnieuw verstuurd mogen worden (bijvoorbeeld na een herstart)
+IDEMPOTENT_METHODS = frozenset({
+    "ping",
+    "tools/list",
+    "resources/list",
+    "resources/read",
+    "resources/templates/list",
+    "prompts/list",
+    "prompts/get",
+})
 
 def check_config():
     """Controleert of de nodige configuratie aanwezig is en geeft bruikbare feedback.
@@ -68,25 +234,375 @@ def check_config():
     log("ERROR", "\n".join(messages))
     return False
 
+def parse_socket_address(address):
+    """Zet een socketadres om naar een adresfamilie en adres.
+    
+    Ondersteunde vormen: 'unix:/pad/naar.sock', een absoluut pad, 'tcp://host:poort'
+    en 'host:poort'.
+    
+    Args:
+        address (str): Het socketadres
+        
+    Returns:
+        tuple: (adresfamilie, adres) voor socket.socket / socket.connect
+        
+    Raises:
+        ConfigurationError: Als het adres ongeldig is
+    """
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    if address.startswith("/"):
+        return socket.AF_UNIX, address
+    if address.startswith("tcp://"):
+        address = address[len("tcp://"):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ConfigurationError(
+            f"Ongeldig socketadres: {address}.\n"
+            f"Gebruik unix:/pad/naar.sock of tcp://host:poort."
+        )
+    return socket.AF_INET, (host, int(port))
+
+def _is_endpoint_failure(error):
+    """Geeft True terug als een HTTP-fout op een probleem met het endpoint wijst (geen verbinding of 5xx)."""
+    response = getattr(error, "response", None)
+    return response is None or response.status_code >= 500
+
+def _is_read_timeout(error):
+    """Geeft True terug als een HTTP-fout een time-out bij het lezen van het antwoord is.
+    
+    Tijdens het lezen van een gestreamde body verpakt requests de time-out van urllib3 in
+    een ConnectionError; bij het direct lezen van response.raw komt die onverpakt.
+    """
+    if isinstance(error, (requests.exceptions.ReadTimeout, urllib3.exceptions.ReadTimeoutError)):
+        return True
+    return bool(error.args) and isinstance(error.args[0], urllib3.exceptions.ReadTimeoutError)
+
+def _check_rate_limit(response):
+    """Werpt een RateLimitError op als de server met 429 Too Many Requests antwoordt.
+    
+    Args:
+        response (requests.Response): Het HTTP-antwoord
+        
+    Raises:
+        RateLimitError: Met de wachttijd uit de Retry-After header (seconden of HTTP-datum)
+    """
+    if response.status_code != 429:
+        return
+    header = response.headers.get("Retry-After", "")
+    retry_after = 1.0
+    try:
+        retry_after = float(header)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(header)
+            retry_after = retry_at.timestamp() - time.time()
+        except (TypeError, ValueError):
+            pass
+    raise RateLimitError(
+        f"Server weigert verzoek tijdelijk (429), opnieuw proberen na {retry_after:.1f} seconden.",
+        max(0.0, retry_after)
+    )
+
+# Het id van een JSON-RPC antwoord staat vrijwel altijd vooraan of achteraan het bericht.
+# In de passthrough-modus wordt alleen dat stuk bekeken in plaats van het hele bericht.
+_ID_VALUE = r'(-?\d+|"[^"\\]*")'
+_ID_PREFIX = re.compile(r'\s*\{\s*(?:"jsonrpc"\s*:\s*"2\.0"\s*,\s*)?"id"\s*:\s*' + _ID_VALUE)
+_ID_SUFFIX = re.compile(r'[,{]\s*"id"\s*:\s*' + _ID_VALUE + r'\s*\}\s*$')
+_ID_PEEK_LENGTH = 64
+
+def _peek_response_id(raw):
+    """Leest het id van een JSON-RPC antwoord uit de ruwe tekst, zonder het te decoderen.
+    
+    Alleen het begin en het einde van het bericht worden bekeken. Berichten met een
+    "method"-sleutel (notificaties en verzoeken van de server) worden niet herkend,
+    zodat die altijd volledig worden gedecodeerd.
+    
+    Args:
+        raw (str/bytes): Het ruwe JSON-bericht
+        
+    Returns:
+        int/str: Het id, of None als het niet goedkoop te bepalen is
+    """
+    if isinstance(raw, bytes):
+        if b'"method"' in raw:
+            return None
+        head = raw[:_ID_PEEK_LENGTH].decode("latin-1")
+        tail = raw[-_ID_PEEK_LENGTH:].decode("latin-1")
+    else:
+        if '"method"' in raw:
+            return None
+        head = raw[:_ID_PEEK_LENGTH]
+        tail = raw[-_ID_PEEK_LENGTH:]
+    match = _ID_PREFIX.match(head) or _ID_SUFFIX.search(tail)
+    if match is None:
+        return None
+    value = match.group(1)
+    return value[1:-1] if value.startswith('"') else int(value)
+
+# Begin van een base64-blob in een resources/read-antwoord ('"blob": "')
+_BLOB_START = re.compile(r'(?<!\\)"blob"\s*:\s*"')
+_BLOB_START_BYTES = re.compile(_BLOB_START.pattern.encode("ascii"))
+
+# Standaard aantal base64-tekens dat per keer wordt gedecodeerd (veelvoud van 4)
+BLOB_CHUNK_SIZE = 1 << 20
+
+def _iter_blob_chunks(raw, chunk_size=BLOB_CHUNK_SIZE):
+    """Decodeert de eerste base64-blob in een ruw JSON-antwoord stuk voor stuk.
+    
+    Alleen het deel met de blob wordt gelezen, in stukken van `chunk_size` tekens,
+    zodat er nooit meer dan één gedecodeerd stuk tegelijk in het geheugen staat.
+    JSON-escapes binnen de blob (\\/ en regeleinden) worden overgeslagen.
+    
+    Args:
+        raw (str/bytes): Het ruwe JSON-antwoord
+        chunk_size (int): Aantal base64-tekens per stuk
+        
+    Yields:
+        bytes: Gedecodeerde stukken van de blob
+        
+    Raises:
+        CommunicationError: Als het antwoord geen (geldige) blob bevat
+    """
+    if isinstance(raw, bytes):
+        match = _BLOB_START_BYTES.search(raw)
+        quote, backslash, empty = b'"', b"\\", b""
+        escapes = ((b"\\/", b"/"), (b"\\n", b""), (b"\\r", b""))
+    else:
+        match = _BLOB_START.search(raw)
+        quote, backslash, empty = '"', "\\", ""
+        escapes = (("\\/", "/"), ("\\n", ""), ("\\r", ""))
+    if match is None:
+        raise CommunicationError("Het antwoord bevat geen blob.")
+    start = match.end()
+    end = raw.find(quote, start)
+    if end < 0:
+        raise CommunicationError("Onvolledige blob in het antwoord.")
+    
+    chunk_size = max(4, chunk_size - chunk_size % 4)
+    carry = empty
+    offset = start
+    try:
+        while offset < end:
+            stop = min(offset + chunk_size, end)
+            if raw[stop - 1:stop] == backslash and stop < end:
+                stop += 1  # Splits een escape niet over twee stukken
+            piece = raw[offset:stop]
+            offset = stop
+            if backslash in piece:
+                for escape, replacement in escapes:
+                    piece = piece.replace(escape, replacement)
+            if carry:
+                piece = carry + piece
+            usable = len(piece) - len(piece) % 4
+            carry = piece[usable:]
+            if usable:
+                yield base64.b64decode(piece[:usable], validate=True)
+    except (ValueError, TypeError) as e:
+        raise CommunicationError(f"Ongeldige base64-data in blob: {e}")
+    if carry:
+        raise CommunicationError("Ongeldige base64-data in blob: onvolledig laatste blok.")
+
+def _iter_sse_events(lines):
+    """Groepeert de regels van een SSE-stream tot events.
+    
+    Args:
+        lines: Iterable met de ruwe regels (bytes of str) van de stream
+        
+    Yields:
+        tuple: (event, data, event_id) per event; event is "message" als het niet is opgegeven
+    """
+    event, data, event_id = None, [], None
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line:
+            # Een lege regel sluit het event af
+            if data or event:
+                yield event or "message", "\n".join(data), event_id
+            event, data, event_id = None, [], None
+            continue
+        if line.startswith(":"):
+            continue  # commentaar / hartslag
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            data.append(value)
+        elif field == "event":
+            event = value
+        elif field == "id":
+            event_id = value
+    if data or event:
+        yield event or "message", "\n".join(data), event_id
+
+class _PendingCall:
+    """Een openstaand verzoek dat wacht op het antwoord met hetzelfde id."""
+
+    __slots__ = ("id", "method", "message", "idempotent", "response", "error", "sent_at",
+                 "received_at", "_event")
+
+    def __init__(self, request_id, method, message, idempotent=False):
+        self.id = request_id
+        self.method = method
+        self.message = message
+        self.idempotent = idempotent
+        self.response = None
+        self.error = None
+        self.sent_at = None  # Tijdstip van versturen (time.time)
+        self.received_at = None  # Tijdstip van antwoord of fout
+        self._event = threading.Event()
+
+    def resolve(self, response):
+        """Levert het antwoord af en maakt de wachtende aanroeper wakker."""
+        self.response = response
+        self.received_at = time.time()
+        self._event.set()
+
+    def fail(self, error):
+        """Laat het verzoek direct mislukken met de opgegeven exception."""
+        self.error = error
+        self.received_at = time.time()
+        self._event.set()
+
+    def wait(self, timeout):
+        """Wacht op een antwoord of fout; geeft False terug bij een time-out."""
+        return self._event.wait(timeout)
+
 # MCPClient class definitie
 class MCPClient:
-    def __init__(self):
+    def __init__(self, request_timeout=None, heartbeat_interval=None, heartbeat_timeout=None,
+                 scheduler=None, raw=False, profile=False, session_file=None,
+                 flight_recorder_size=None, decode_offload_threshold=None, decode_executor=None,
+                 validate_tools=True, traffic_file=None, request_compression=None,
+                 compression_threshold=None, sse_endpoint_timeout=None):
+        """Initialiseert de client.
+
+        Args:
+            request_timeout (float, optional): Maximale wachttijd per verzoek in seconden.
+                                               Standaard MCP_REQUEST_TIMEOUT uit .env (10).
+            heartbeat_interval (float, optional): Interval tussen 'ping'-hartslagen in seconden.
+                                                  0 schakelt de hartslag uit. Standaard
+                                                  MCP_HEARTBEAT_INTERVAL uit .env.
+            heartbeat_timeout (float, optional): Maximale wachttijd op een hartslag-antwoord.
+                                                 Standaard MCP_HEARTBEAT_TIMEOUT uit .env (5).
+            scheduler (RequestScheduler, optional): Rate limiting en prioriteitsbanen voor
+                                                    verzoeken (zie src.scheduler)
+            raw (bool, optional): Passthrough-modus: antwoorden worden niet gedecodeerd maar
+                                  alleen op id gerouteerd (zie call_raw)
+            profile (bool/Profiler, optional): Meet de duur van elke fase (starten, handshake,
+                                               versturen, wachten, decoderen); de resultaten
+                                               staan in client.profiler (zie src.profiling)
+            session_file (str, optional): Bestand waarin de HTTP-sessie wordt bewaard, zodat een
+                                          volgend proces de sessie kan hervatten zonder nieuwe
+                                          handshake. Standaard MCP_SESSION_FILE uit .env.
+            flight_recorder_size (int, optional): Aantal recente verzoeken in de flight recorder
+                                                  (0 schakelt uit). Standaard
+                                                  MCP_FLIGHT_RECORDER_SIZE uit .env (256).
+            decode_offload_threshold (int, optional): Berichten vanaf deze grootte worden niet in
+                                                      de leesthread gedecodeerd, zodat kleinere
+                                                      antwoorden er niet achter blijven hangen
+                                                      (0 schakelt uit). Standaard
+                                                      MCP_DECODE_OFFLOAD_THRESHOLD uit .env (1 MiB).
+            decode_executor (Executor, optional): Thread- of processpool voor het decoderen van
+                                                  grote berichten zonder wachtend verzoek.
+                                                  Standaard een eigen pool van DECODE_WORKERS threads.
+            validate_tools (bool, optional): Controleer argumenten van tools/call lokaal tegen het
+                                             inputSchema uit tools/list (standaard True)
+            traffic_file (str, optional): Neem elk verstuurd en ontvangen bericht op in dit
+                                          bestand (zie src.traffic). Standaard MCP_TRAFFIC_FILE
+                                          uit .env; leeg schakelt het opnemen uit.
+            request_compression (str, optional): Compressie van HTTP-verzoeken: "off", "gzip",
+                                                 "zstd" of "auto" (zstd als de server het
+                                                 accepteert, anders gzip). Standaard
+                                                 MCP_REQUEST_COMPRESSION uit .env (off).
+            compression_threshold (int, optional): Minimale grootte in bytes van een te
+                                                   comprimeren verzoek. Standaard
+                                                   MCP_COMPRESSION_THRESHOLD uit .env (8192).
+            sse_endpoint_timeout (float, optional): Maximale wachttijd op het 'endpoint'-event
+                                                    van een SSE-server, waarna berichten naar de
+                                                    stream-URL gaan. Standaard
+                                                    MCP_SSE_ENDPOINT_TIMEOUT uit .env (1).
+
+        Raises:
+            ConfigurationError: Als het opnamebestand niet kan worden geopend of de
+                                compressie-instelling ongeldig is
+        """
         self.connection = None  # Kan een proces (STDIO) of SSE session zijn
-        self.transport = None  # "stdio" of "sse"
+        self.transport = None  # "stdio", "sse", "http", "inproc" of "socket"
         self._id_counter = 1   # Unieke ID teller voor JSON-RPC requests
-        self._response_queue = queue.Queue()
+        self._response_queue = queue.Queue()  # Berichten zonder wachtend verzoek (notificaties)
         self._stop_event = threading.Event()
+        self.request_timeout = REQUEST_TIMEOUT if request_timeout is None else request_timeout
+        self.heartbeat_interval = HEARTBEAT_INTERVAL if heartbeat_interval is None else heartbeat_interval
+        self.heartbeat_timeout = HEARTBEAT_TIMEOUT if heartbeat_timeout is None else heartbeat_timeout
+        self._pending = {}  # request id -> _PendingCall
+        self._lock = threading.Lock()  # Beschermt _pending en _id_counter
+        self._write_lock = threading.Lock()  # Voorkomt door elkaar lopende schrijfacties
+        self._connection_error = None  # ConnectionError zodra de verbinding is weggevallen
+        self.scheduler = scheduler
+        self.raw = raw
+        self._raw_calls = 0  # Aantal openstaande call_raw-verzoeken
+        self.profiler = Profiler() if profile is True else (profile or None)
+        self._supervisor = None  # StdioSupervisor bij een bewaakt lokaal proces
+        self.server_url = None  # URL van de SSE-stream waarmee verbonden is
+        self.post_url = None  # Door de server geadverteerde URL voor berichten (endpoint-event)
+        self.session_id = None  # Sessie-id van de remote server
+        self._sse_response = None  # De actieve SSE-stream
+        self.endpoints = None  # EndpointPool bij meerdere gelijkwaardige server-URL's
+        self.validate_tools = validate_tools
+        self._tool_schemas = {}  # toolnaam -> inputSchema uit tools/list
+        self._tool_validators = {}  # toolnaam -> gecompileerde validatiefunctie
+        self._endpoint_ready = threading.Event()  # Gezet zodra post_url bekend is
+        self._sse_legacy = False  # Server zonder endpoint-event: POST naar de stream-URL
+        self.sse_endpoint_timeout = (SSE_ENDPOINT_TIMEOUT if sse_endpoint_timeout is None
+                                     else sse_endpoint_timeout)
+        self._inproc_handler = None  # handle_message van een in-process server
+        self._inproc_serialize = False
+        self._initialize_params = None  # Parameters van de laatste geslaagde handshake
+        self.server_info = None  # Resultaat van 'initialize' (capabilities, serverInfo)
+        self.session_file = session_file if session_file is not None else (MCP_SESSION_FILE or None)
+        self._session_resumed = False  # Sessie hervat uit session_file, zonder handshake
+        self._last_event_id = None  # Laatst ontvangen SSE event-id (voor Last-Event-ID)
+        self.decode_offload_threshold = (DECODE_OFFLOAD_THRESHOLD if decode_offload_threshold is None
+                                         else decode_offload_threshold)
+        self._decode_executor = decode_executor
+        self._owns_decode_executor = decode_executor is None
+        if flight_recorder_size is None:
+            flight_recorder_size = FLIGHT_RECORDER_SIZE
+        self.flight_recorder = FlightRecorder(flight_recorder_size) if flight_recorder_size > 0 else None
+        self.flight_recorder_file = FLIGHT_RECORDER_FILE or None  # Automatische dump bij time-outs
+        if self.flight_recorder is not None:
+            register_client(self)
+        self.request_compression = request_compression or REQUEST_COMPRESSION
+        if self.request_compression not in compression.MODES:
+            raise ConfigurationError(
+                f"Ongeldige compressie: {self.request_compression} (kies uit {', '.join(compression.MODES)})")
+        self.compression_threshold = (COMPRESSION_THRESHOLD if compression_threshold is None
+                                      else compression_threshold)
+        self.compression = compression.CompressionStats()
+        self._server_encodings = set()  # Coderingen uit de Accept-Encoding header van de server
+        traffic_file = traffic_file if traffic_file is not None else TRAFFIC_FILE
+        self.traffic_recorder = None
+        if traffic_file:
+            from src.traffic import TrafficRecorder
+            self.traffic_recorder = TrafficRecorder(traffic_file)
         
         # Configuratiecontrole bij initialisatie
         if not check_config():
             log("INFO", "De client is geïnitialiseerd met ontbrekende configuratie.")
 
-    def connect_stdio(self, command=None):
+    def connect_stdio(self, command=None, supervise=False, restart_policy=None):
         """Start een lokaal MCP-serverproces en verbind via STDIO.
         
         Args:
             command (str, optional): Het commando om het MCP-serverproces te starten.
                                     Als niet opgegeven, wordt MCP_LOCAL_COMMAND uit .env gebruikt.
+            supervise (bool, optional): Herstart het proces automatisch na een crash, herhaal
+                                        de initialize-handshake en verstuur openstaande
+                                        idempotente verzoeken opnieuw.
+            restart_policy (RestartPolicy, optional): Backoff- en circuit breaker-instellingen
+                                                      voor de supervisor.
         
         Returns:
             bool: True als de verbinding succesvol is, anders False
@@ -105,31 +621,15 @@ class MCPClient:
                     "Stel deze in met het pad naar het lokale MCP-serverproces."
                 )
             
-            # Start het externe proces (MCP server) via subprocess
-            log("INFO", f"Start lokaal MCP proces: {local_command}")
-            # `bufsize=1` en `universal_newlines=True` voor real-time line-buffering
-            process = subprocess.Popen(
-                local_command.split(), 
-                stdin=subprocess.PIPE, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
-                text=True, 
-                bufsize=1
-            )
-            
-            # Controleer of het proces correct is gestart
-            if process.poll() is not None:
-                stderr_output = process.stderr.read()
-                raise ConnectionError(
-                    f"Kon het lokale proces niet starten of het proces is meteen gestopt.\n"
-                    f"Foutuitvoer: {stderr_output}"
-                )
+            process = self._spawn_stdio_process(local_command)
                 
-            self.connection = process
+            self._reset_connection_state()
+            self._attach_stdio_process(process)
             self.transport = "stdio"
-            
-            # Start een achtergrondthread om STDOUT te lezen
-            threading.Thread(target=self._stdio_listener, args=(process,), daemon=True).start()
+            if supervise:
+                from src.supervisor import StdioSupervisor
+                self._supervisor = StdioSupervisor(self, local_command, restart_policy)
+            self._start_heartbeat()
             return True
         except ConfigurationError as e:
             log("ERROR", f"Configuratiefout: {e}")
@@ -141,6 +641,94 @@ class MCPClient:
             log("ERROR", f"Onverwachte fout bij starten lokaal proces: {e}")
             return False
 
+    def _spawn_stdio_process(self, local_command):
+        """Start het lokale MCP-serverproces.
+        
+        Args:
+            local_command (str): Het commando om het MCP-serverproces te starten
+            
+        Returns:
+            subprocess.Popen: Het gestarte proces
+            
+        Raises:
+            ConnectionError: Als het proces niet kon worden gestart
+        """
+        # Start het externe proces (MCP server) via subprocess
+        log("INFO", f"Start lokaal MCP proces: {local_command}")
+        # `bufsize=1` en `universal_newlines=True` voor real-time line-buffering
+        try:
+            with self._phase("spawn"):
+                process = subprocess.Popen(
+                    local_command.split(), 
+                    stdin=subprocess.PIPE, 
+                    stdout=subprocess.PIPE, 
+                    stderr=subprocess.PIPE, 
+                    text=True, 
+                    bufsize=1
+                )
+        except OSError as e:
+            raise ConnectionError(f"Kon het lokale proces niet starten: {e}")
+        
+        # Controleer of het proces correct is gestart
+        if process.poll() is not None:
+            stderr_output = process.stderr.read()
+            raise ConnectionError(
+                f"Kon het lokale proces niet starten of het proces is meteen gestopt.\n"
+                f"Foutuitvoer: {stderr_output}"
+            )
+        return process
+
+    def _attach_stdio_process(self, process):
+        """Maakt een gestart proces de actieve verbinding en start de achtergrondthreads."""
+        self.connection = process
+        # Start een achtergrondthread om STDOUT te lezen
+        threading.Thread(target=self._stdio_listener, args=(process,), daemon=True).start()
+        # Bewaak het proces zodat een crash openstaande verzoeken direct laat mislukken
+        threading.Thread(target=self._process_watcher, args=(process,), daemon=True).start()
+
+    def _restart_stdio(self, local_command):
+        """Start het lokale proces opnieuw na een crash (aangeroepen door de supervisor).
+        
+        Herhaalt de initialize-handshake als die eerder is uitgevoerd en verstuurt
+        openstaande idempotente verzoeken opnieuw met hun oorspronkelijke id.
+        
+        Args:
+            local_command (str): Het commando om het MCP-serverproces te starten
+            
+        Raises:
+            ConnectionError: Als het proces niet kon worden gestart
+            CommunicationError: Als de handshake of het opnieuw versturen mislukt
+        """
+        previous = self.connection
+        if previous is not None and previous.poll() is None:
+            # Een vastgelopen proces (hartslag mislukt) draait nog: eerst stoppen
+            self._stop_process(previous)
+        process = self._spawn_stdio_process(local_command)
+        self._attach_stdio_process(process)
+        try:
+            if self._initialize_params is not None:
+                response = self._handshake(self._initialize_params, during_restart=True)
+                if "result" not in response:
+                    raise CommunicationError(f"Initialize na herstart mislukt: {response.get('error')}")
+            with self._lock:
+                replay = [pending for pending in self._pending.values() if pending.idempotent]
+            for pending in replay:
+                self._send_message(pending.message)
+        except MCPClientError:
+            process.kill()
+            raise
+        self._connection_error = None
+
+    def _stop_process(self, process):
+        """Stopt een lokaal proces netjes (terminate), en geforceerd (kill) als het niet reageert."""
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            log("ERROR", "Proces reageert niet, forceer afsluiten.")
+            process.kill()
+            process.wait()
+
     def _stdio_listener(self, process):
         """Leest continu uit het STDOUT van een lokaal MCP-proces.
         
@@ -154,30 +742,63 @@ class MCPClient:
             if line == "":
                 continue
             try:
-                # Verwerk alleen geldige JSON-lijnen
-                data = json.loads(line)
+                if self._wants_raw():
+                    self._dispatch_raw(line)
+                elif self.decode_offload_threshold and len(line) >= self.decode_offload_threshold:
+                    self._offload_decode(line)
+                else:
+                    # Verwerk alleen geldige JSON-lijnen
+                    data = self._decode(line)
+                    log("DEBUG", "STDIO ontvangen: %s", data)
+                    # Bezorg het bericht bij het wachtende verzoek (of in de wachtrij)
+                    self._dispatch(data)
             except json.JSONDecodeError:
                 log("DEBUG", f"Genegeerd (geen JSON): {line}")
                 continue
-            # Plaats ontvangen bericht in de wachtrij
-            self._response_queue.put(data)
-            log("DEBUG", f"STDIO ontvangen: {data}")
             if self._stop_event.is_set():
                 break
 
+        # STDOUT is gesloten: geef het proces even de tijd om af te sluiten
+        if not self._stop_event.is_set() and process.poll() is None:
+            try:
+                process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                pass
+
         # Controleer of het proces onverwacht is gestopt
         if not self._stop_event.is_set() and process.poll() is not None:
             stderr_output = process.stderr.read() if process.stderr else "Geen foutuitvoer beschikbaar."
-            error_msg = f"Lokaal proces is onverwacht gestopt. Foutuitvoer: {stderr_output}"
-            log("ERROR", error_msg)
-            self._response_queue.put({"error": error_msg})
+            self._connection_lost(f"Lokaal proces is onverwacht gestopt. Foutuitvoer: {stderr_output}", process)
+
+    def _process_watcher(self, process):
+        """Wacht tot het lokale proces stopt en meldt een onverwachte exit direct.
+        
+        Vangt ook het geval af waarin STDOUT nog open blijft (bijvoorbeeld door een
+        kindproces van de server), zodat openstaande verzoeken niet op hun time-out wachten.
+        
+        Args:
+            process: Het subprocess object van het lokale MCP-serverproces
+        """
+        try:
+            process.wait()
+        except Exception as e:
+            log("DEBUG", f"Procesbewaking gestopt: {e}")
+            return
+        returncode = process.poll()
+        if returncode is None or self._stop_event.is_set():
+            return
+        self._connection_lost(f"Lokaal proces is onverwacht gestopt met exitcode {returncode}.", process)
 
     def connect_sse(self, url=None):
         """Verbind met een remote MCP server via SSE (Server-Sent Events).
         
+        Bij meerdere gelijkwaardige URL's wordt verbonden met het snelste gezonde endpoint
+        en bij een storing direct overgeschakeld naar het volgende (zie src.endpoints).
+        
         Args:
-            url (str, optional): De URL van de MCP-server. Als niet opgegeven, wordt 
-                                MCP_SERVER_URL uit .env gebruikt.
+            url (str/list, optional): De URL van de MCP-server, of meerdere URL's (als lijst of
+                                      gescheiden door komma's). Als niet opgegeven, wordt
+                                      MCP_SERVER_URL uit .env gebruikt.
         
         Returns:
             bool: True als de verbinding succesvol is, anders False
@@ -187,40 +808,49 @@ class MCPClient:
             ConnectionError: Als er geen verbinding kon worden gemaakt met de server
         """
         try:
-            # Gebruik opgegeven URL of uit configuratie
-            server_url = url or MCP_SERVER_URL
-            
-            if not server_url:
-                raise ConfigurationError(
-                    "MCP_SERVER_URL niet ingesteld in .env bestand of als parameter.\n"
-                    "Stel deze in met de URL van de remote MCP server."
-                )
-            
-            # Valideer URL format
-            if not server_url.startswith(('http://', 'https://')):
-                raise ConfigurationError(
-                    f"Ongeldige server URL: {server_url}.\n"
-                    f"URL moet beginnen met http:// of https://."
-                )
+            server_urls = self._resolve_server_urls(url)
             
-            # Start SSE-stream in aparte thread
             headers = {}
             if API_KEY:
                 headers["Authorization"] = f"Bearer {API_KEY}"
-            log("INFO", f"Verbind met remote MCP server via SSE: {server_url}")
+            log("INFO", f"Verbind met remote MCP server via SSE: {', '.join(server_urls)}")
+            
+            # Eén HTTP-sessie voor de stream en alle POSTs (hergebruik van verbindingen)
+            self._reset_connection_state()
+            session = requests.Session()
+            session.headers["Accept-Encoding"] = compression.ACCEPT_ENCODING
+            self.endpoints = EndpointPool(server_urls) if len(server_urls) > 1 else None
+            self.server_url = server_urls[0]
+            self.post_url = None
+            self.session_id = None
+            self._endpoint_ready = threading.Event()
+            self._sse_legacy = False
+            self._last_event_id = None
+            self._initialize_params = None
             
-            # Controleer verbinding voordat we de thread starten
+            # Open de stream; dezelfde stream wordt daarna door de luisterthread gelezen
             try:
-                response = requests.get(server_url, headers=headers, stream=True, timeout=5)
-                response.raise_for_status()  # Raise exception voor HTTP-fouten
+                with self._phase("sse: stream"):
+                    response = self._connect_sse_stream(session, headers)
             except requests.exceptions.RequestException as e:
+                session.close()
                 raise ConnectionError(
                     f"Kan geen verbinding maken met de MCP server: {str(e)}.\n"
-                    f"Controleer of de server actief is en bereikbaar op {server_url}."
+                    f"Controleer of de server actief is en bereikbaar op {', '.join(server_urls)}."
                 )
             
-            threading.Thread(target=self._sse_listener, args=(server_url, headers), daemon=True).start()
+            self.connection = session
             self.transport = "sse"
+            threading.Thread(
+                target=self._sse_listener, args=(self.server_url, headers, response), daemon=True
+            ).start()
+            
+            # Wacht op het endpoint-event met de URL (en sessie) voor berichten
+            if not self._endpoint_ready.wait(self.sse_endpoint_timeout) or self.post_url is None:
+                log("INFO", "Server stuurde geen 'endpoint'-event; berichten gaan naar de stream-URL.")
+                self._sse_legacy = True
+                self._endpoint_ready.set()
+            self._start_heartbeat()
             return True
         except ConfigurationError as e:
             log("ERROR", f"Configuratiefout: {e}")
@@ -232,157 +862,1747 @@ class MCPClient:
             log("ERROR", f"Onverwachte fout bij verbinden via SSE: {e}")
             return False
 
-    def _sse_listener(self, url, headers):
-        """Leest continu van de SSE endpoint.
+    def _resolve_server_urls(self, url):
+        """Bepaalt en valideert de URL('s) van de remote server.
+        
+        Args:
+            url (str/list, optional): De opgegeven URL, een lijst URL's of URL's gescheiden
+                                      door komma's; anders MCP_SERVER_URL uit .env
+            
+        Returns:
+            list: De te gebruiken URL's, in volgorde van voorkeur
+            
+        Raises:
+            ConfigurationError: Als geen geldige URL is opgegeven of gevonden
+        """
+        # Gebruik opgegeven URL of uit configuratie
+        server_urls = url or MCP_SERVER_URL
+        if isinstance(server_urls, str):
+            server_urls = server_urls.split(",")
+        server_urls = [server_url.strip() for server_url in server_urls if server_url.strip()]
+        
+        if not server_urls:
+            raise ConfigurationError(
+                "MCP_SERVER_URL niet ingesteld in .env bestand of als parameter.\n"
+                "Stel deze in met de URL van de remote MCP server."
+            )
+        
+        # Valideer URL format
+        for server_url in server_urls:
+            if not server_url.startswith(('http://', 'https://')):
+                raise ConfigurationError(
+                    f"Ongeldige server URL: {server_url}.\n"
+                    f"URL moet beginnen met http:// of https://."
+                )
+        return server_urls
+
+    def _connect_sse_stream(self, session, headers, last_event_id=None, exclude=()):
+        """Opent de SSE-stream op het snelste beschikbare endpoint en zet server_url.
+        
+        Lukt dat niet, dan wordt direct het volgende endpoint geprobeerd. Staat het circuit
+        van alle endpoints open, dan wordt het endpoint geprobeerd dat het eerst herstelt.
+        
+        Args:
+            session (requests.Session): De HTTP-sessie van deze verbinding
+            headers (dict): De HTTP-headers voor de request
+            last_event_id (str, optional): Hervat de stream na dit event (alleen bij hetzelfde endpoint)
+            exclude (iterable): Endpoints die alleen als laatste redmiddel worden gekozen
+            
+        Returns:
+            requests.Response: De geopende stream
+            
+        Raises:
+            requests.exceptions.RequestException: Als geen enkel endpoint bereikbaar is
+        """
+        if self.endpoints is None:
+            return self._open_sse_stream(session, self.server_url, headers, last_event_id)
+        tried = set(exclude)
+        error = None
+        while True:
+            url = self.endpoints.select(exclude=tried)
+            if url is None:
+                if error is not None:
+                    raise error
+                url = self.endpoints.fallback()
+            tried.add(url)
+            # Event-id's zijn eigen aan een server; bij een ander endpoint begint de stream opnieuw
+            event_id = last_event_id if url == self.server_url else None
+            started = time.perf_counter()
+            try:
+                response = self._open_sse_stream(session, url, headers, event_id)
+            except requests.exceptions.RequestException as e:
+                self.endpoints.record_failure(url)
+                log("ERROR", f"Endpoint {url} is niet bereikbaar: {e}")
+                error = e
+                continue
+            self.endpoints.record_success(url, time.perf_counter() - started)
+            if url != self.server_url:
+                log("INFO", f"Verbonden met endpoint {url}.")
+            self.server_url = url
+            return response
+
+    def _open_sse_stream(self, session, url, headers, last_event_id=None):
+        """Opent de SSE-stream van de server.
+        
+        Args:
+            session (requests.Session): De HTTP-sessie van deze verbinding
+            url (str): De URL van de SSE-stream
+            headers (dict): De HTTP-headers voor de request
+            last_event_id (str, optional): Hervat de stream na dit event (Last-Event-ID)
+            
+        Returns:
+            requests.Response: De geopende stream
+            
+        Raises:
+            requests.exceptions.RequestException: Als de stream niet kon worden geopend
+        """
+        stream_headers = dict(headers)
+        stream_headers["Accept"] = "text/event-stream"
+        if last_event_id is not None:
+            stream_headers["Last-Event-ID"] = last_event_id
+        heartbeat = self.heartbeat_interval is not None and self.heartbeat_interval > 0
+        read_timeout = None if heartbeat else (SSE_READ_TIMEOUT or None)
+        response = session.get(url, headers=stream_headers, stream=True, timeout=(5, read_timeout))
+        try:
+            response.raise_for_status()  # Raise exception voor HTTP-fouten
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        self._sse_response = response
+        return response
+
+    def _sse_endpoint_failed(self, url):
+        """Registreert het wegvallen van een SSE-endpoint.
+        
+        Returns:
+            bool: True als er een ander gezond endpoint is om direct naar over te schakelen
+        """
+        if self.endpoints is None or self._stop_event.is_set():
+            return False
+        self.endpoints.record_failure(url)
+        return self.endpoints.select(exclude={url}) is not None
+
+    def _resume_after_reconnect(self):
+        """Herhaalt de handshake na een herverbinding en verstuurt openstaande idempotente verzoeken opnieuw."""
+        if self._initialize_params is not None and not self._renew_session():
+            return
+        with self._lock:
+            replay = [pending for pending in self._pending.values() if pending.idempotent]
+        for pending in replay:
+            try:
+                self._send_message(pending.message)
+            except MCPClientError as e:
+                log("ERROR", f"Opnieuw versturen van verzoek {pending.id} mislukt: {e}")
+
+    def _set_endpoint(self, url, endpoint):
+        """Verwerkt het endpoint-event: de URL (met sessie-id) waar berichten heen gaan.
+        
+        Args:
+            url (str): De URL van de SSE-stream
+            endpoint (str): De (relatieve) URL uit het endpoint-event
+        """
+        previous_session = self.session_id
+        self.post_url = urljoin(url, endpoint.strip())
+        query = parse_qs(urlparse(self.post_url).query)
+        session_ids = query.get("session_id") or query.get("sessionId")
+        self.session_id = session_ids[0] if session_ids else None
+        log("DEBUG", f"SSE endpoint ontvangen: {self.post_url}")
+        self._endpoint_ready.set()
+        if (self._initialize_params is not None or self._pending) and (
+                self.session_id is None or self.session_id != previous_session):
+            # Na een herverbinding met een nieuwe sessie: herhaal de handshake. De
+            # luisterthread moet het antwoord ontvangen, dus dit gebeurt op de achtergrond.
+            threading.Thread(target=self._resume_after_reconnect, daemon=True).start()
+
+    def _read_sse_stream(self, url, response):
+        """Verwerkt de events van een geopende SSE-stream totdat deze sluit.
+        
+        Args:
+            url (str): De URL van de SSE-stream
+            response (requests.Response): De geopende stream
+        """
+        for event, data, event_id in _iter_sse_events(self._iter_response_lines(response)):
+            if self._stop_event.is_set():
+                break
+            if event_id is not None:
+                self._last_event_id = event_id
+            if event == "endpoint":
+                self._set_endpoint(url, data)
+                continue
+            if not self._endpoint_ready.is_set():
+                # Het endpoint-event komt altijd eerst; zonder is het een server die berichten
+                # op de stream-URL verwacht, dus niet langer wachten
+                self._endpoint_ready.set()
+            if not data:
+                continue
+            try:
+                if self._wants_raw():
+                    self._dispatch_raw(data)
+                    continue
+                if self.decode_offload_threshold and len(data) >= self.decode_offload_threshold:
+                    self._offload_decode(data)
+                    continue
+                message = self._decode(data)
+            except json.JSONDecodeError:
+                log("DEBUG", f"Genegeerd (geen JSON): {data}")
+                continue
+            log("DEBUG", "SSE ontvangen: %s", message)
+            # Bezorg het bericht bij het wachtende verzoek (of in de wachtrij)
+            self._dispatch(message)
+
+    def _sse_listener(self, url, headers, response=None):
+        """Leest continu van de SSE endpoint en verbindt opnieuw als de stream wegvalt.
         
         Args:
             url (str): De URL van de MCP-server
             headers (dict): De HTTP-headers voor de request
+            response (requests.Response, optional): Een al geopende stream om mee te beginnen
         """
         retry_delay = 1  # initiële retry delay in seconden
         max_retry_delay = 30  # maximale retry delay
+        session = self.connection
+        failed = ()  # Endpoint dat net faalde (alleen bij meerdere endpoints)
         
         while not self._stop_event.is_set():
+            connected = False
             try:
-                # Stream via requests (EventSource)
-                with requests.get(url, headers=headers, stream=True, timeout=30) as response:
-                    # Reset retry delay bij succesvolle verbinding
-                    retry_delay = 1
-                    
-                    # Controleer HTTP status code
-                    if response.status_code != 200:
-                        error_msg = f"Server antwoordde met status code {response.status_code}: {response.reason}"
-                        log("ERROR", error_msg)
-                        self._response_queue.put({"error": error_msg})
-                        break
-                    
-                    for line in response.iter_lines():
-                        if self._stop_event.is_set():
-                            break
-                        if not line:
-                            continue  # hartslag of lege lijn
-                        decoded = line.decode('utf-8')
-                        # SSE-gegevens beginnen vaak met 'data: '
-                        if decoded.startswith("data:"):
-                            json_str = decoded[len("data:"):].strip()
-                            if json_str:
-                                try:
-                                    data = json.loads(json_str)
-                                except json.JSONDecodeError:
-                                    log("DEBUG", f"Genegeerd (geen JSON): {decoded}")
-                                    continue
-                                # Zet ontvangen bericht in wachtrij
-                                self._response_queue.put(data)
-                                log("DEBUG", f"SSE ontvangen: {data}")
-            except requests.exceptions.Timeout:
-                if not self._stop_event.is_set():
+                if response is None:
+                    # Nieuwe stream betekent een nieuwe sessie met een nieuw endpoint
+                    if not self._sse_legacy:
+                        self.post_url = None
+                        self._endpoint_ready.clear()
+                    response = self._connect_sse_stream(session, headers, self._last_event_id, failed)
+                url = self.server_url
+                connected = True
+                failed = ()
+                # Reset retry delay bij succesvolle verbinding; de stream is (weer) actief
+                retry_delay = 1
+                self._connection_error = None
+                with response:
+                    self._read_sse_stream(url, response)
+                if self._stop_event.is_set():
+                    break
+                # De server heeft de stream beëindigd; antwoorden op openstaande verzoeken komen niet meer
+                self._connection_lost("SSE-stream is door de server gesloten.")
+                log("ERROR", f"SSE-stream gesloten. Probeer opnieuw over {retry_delay} seconden.")
+            except requests.exceptions.HTTPError as e:
+                error_msg = f"Server antwoordde met status code {e.response.status_code}: {e.response.reason}"
+                log("ERROR", error_msg)
+                self._response_queue.put({"error": error_msg})
+                self._fail_pending(ConnectionError(error_msg))
+                break
+            except requests.exceptions.RequestException as e:
+                if self._stop_event.is_set():
+                    break
+                if connected and _is_read_timeout(e):
+                    # Lang geen event, bijvoorbeeld tijdens een lange tool-aanroep: de server kan
+                    # nog bezig zijn. Hervat de stream (Last-Event-ID) zonder openstaande
+                    # verzoeken te laten mislukken.
+                    log("INFO", "Geen SSE-events binnen de time-out; de stream wordt hervat.")
+                    continue
+                if isinstance(e, requests.exceptions.Timeout):
+                    self._connection_lost("Timeout bij SSE verbinding.")
                     log("ERROR", f"Timeout bij SSE verbinding. Probeer opnieuw over {retry_delay} seconden.")
-                    time.sleep(retry_delay)
-                    retry_delay = min(retry_delay * 2, max_retry_delay)  # exponential backoff
-            except requests.exceptions.ConnectionError:
-                if not self._stop_event.is_set():
+                else:
+                    self._connection_lost("SSE-verbinding verbroken.")
                     log("ERROR", f"Verbinding verbroken. Probeer opnieuw over {retry_delay} seconden.")
-                    time.sleep(retry_delay)
-                    retry_delay = min(retry_delay * 2, max_retry_delay)  # exponential backoff
             except Exception as e:
+                if self._stop_event.is_set():
+                    break
                 log("ERROR", f"SSE luisterfout: {e}")
                 self._response_queue.put({"error": str(e)})
+                self._fail_pending(ConnectionError(f"SSE luisterfout: {e}"))
                 break
+            finally:
+                response = None
+                # Laat connect_sse niet wachten op een endpoint van een gesloten stream
+                self._endpoint_ready.set()
+            if connected and self._sse_endpoint_failed(url):
+                # Een ander endpoint is gezond: direct overschakelen, zonder backoff
+                failed = (url,)
+                continue
+            self._stop_event.wait(retry_delay)
+            retry_delay = min(retry_delay * 2, max_retry_delay)  # exponential backoff
 
-    def send_request(self, method, params=None):
-        """Stuur een JSON-RPC verzoek naar de MCP-server.
+    def connect_http(self, url=None):
+        """Verbind met een remote MCP server via Streamable HTTP.
+        
+        Elk verzoek is een POST waarvan het antwoord (als JSON of als korte SSE-stream)
+        direct in de response body terugkomt. Het sessie-id uit de 'Mcp-Session-Id'
+        header wordt bij volgende verzoeken meegestuurd. Met een session_file wordt een
+        eerder bewaarde sessie voor dezelfde URL hervat.
+        
+        Bij meerdere gelijkwaardige URL's gaan verzoeken naar het snelste gezonde endpoint;
+        faalt dat endpoint, dan wordt met een nieuwe sessie overgeschakeld naar een ander.
         
         Args:
-            method (str): De JSON-RPC methode om aan te roepen
-            params (dict/list, optional): De parameters voor de JSON-RPC methode
-            
+            url (str/list, optional): De MCP-endpoint URL van de server, of meerdere URL's (als
+                                      lijst of gescheiden door komma's). Als niet opgegeven,
+                                      wordt MCP_SERVER_URL uit .env gebruikt.
+        
         Returns:
-            dict: De JSON-RPC response, of een dict met een error-sleutel bij fouten
-            
-        Raises:
-            CommunicationError: Als er een fout optreedt bij het versturen van het verzoek
+            bool: True als de verbinding is ingesteld, anders False
         """
-        if self.transport is None:
-            error_msg = "Geen verbinding. Gebruik eerst 'connect_stdio' of 'connect_sse'."
-            log("ERROR", error_msg)
-            return {"error": error_msg}
-            
-        # Stel JSON-RPC bericht samen
-        request_id = self._id_counter
-        self._id_counter += 1
-        message = {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "method": method
-        }
-        if params is not None:
-            message["params"] = params
-
         try:
-            if self.transport == "stdio":
-                # Stuur bericht naar STDIN van het subprocess
-                if not self.connection or self.connection.poll() is not None:
-                    raise CommunicationError("De verbinding met het lokale proces is verbroken.")
-                    
-                self.connection.stdin.write(json.dumps(message) + "\n")
-                self.connection.stdin.flush()
-                log("INFO", f">>> Verzoek verzonden (STDIO): {message}")
-            elif self.transport == "sse":
-                # Verstuur HTTP POST voor SSE
-                post_url = MCP_SERVER_URL  # gebruik basis URL voor POST
-                if not post_url:
-                    raise ConfigurationError("MCP_SERVER_URL is niet ingesteld.")
-                    
-                headers = {"Content-Type": "application/json"}
-                if API_KEY:
-                    headers["Authorization"] = f"Bearer {API_KEY}"
-                log("INFO", f">>> Verzoek verzonden (HTTP POST): {message}")
-                
-                try:
-                    response = requests.post(post_url, headers=headers, json=message, timeout=10)
-                    response.raise_for_status()
-                except requests.exceptions.RequestException as e:
-                    raise CommunicationError(f"Fout bij HTTP-verzoek: {str(e)}")
-                    
-            # Wacht op antwoord in de wachtrij (met timeout voor veiligheid)
-            try:
-                response = self._response_queue.get(timeout=10)
-                return response
-            except queue.Empty:
-                error_msg = "Time-out bij wachten op antwoord."
-                log("ERROR", error_msg)
-                return {"error": error_msg}
+            server_urls = self._resolve_server_urls(url)
+            log("INFO", f"Verbind met remote MCP server via Streamable HTTP: {', '.join(server_urls)}")
+            
+            self._reset_connection_state()
+            self.endpoints = EndpointPool(server_urls) if len(server_urls) > 1 else None
+            server_url = self.endpoints.select() if self.endpoints is not None else server_urls[0]
+            self.server_url = server_url
+            self.post_url = server_url
+            self.session_id = None
+            # De HTTP-sessie houdt de TCP/TLS-verbinding open tussen verzoeken
+            self.connection = requests.Session()
+            self.connection.headers["Accept-Encoding"] = compression.ACCEPT_ENCODING
+            self.transport = "http"
+            self._session_resumed = False
+            self._initialize_params = None
+            if self.session_file:
+                self._load_session_file()
+            self._start_heartbeat()
+            return True
         except ConfigurationError as e:
             log("ERROR", f"Configuratiefout: {e}")
-            return {"error": str(e)}
-        except CommunicationError as e:
-            log("ERROR", f"Communicatiefout: {e}")
-            return {"error": str(e)}
+            return False
         except Exception as e:
-            log("ERROR", f"Onverwachte fout bij versturen verzoek: {e}")
-            return {"error": str(e)}
+            log("ERROR", f"Onverwachte fout bij verbinden via HTTP: {e}")
+            return False
 
-    def close(self):
-        """Sluit de verbinding af (beëindig proces of streaming)."""
-        self._stop_event.set()
-        if self.transport == "stdio":
-            try:
-                # Beëindig lokaal proces netjes
-                if self.connection:
-                    self.connection.terminate()
-                    try:
-                        self.connection.wait(timeout=5)
-                    except subprocess.TimeoutExpired:
-                        log("ERROR", "Proces reageert niet, forceer afsluiten.")
-                        self.connection.kill()
-                    log("INFO", "Lokaal proces gestopt.")
-            except Exception as e:
+    def _post_http(self, message, timeout=None):
+        """Verstuurt een bericht via Streamable HTTP en verwerkt het antwoord uit de body.
+        
+        Args:
+            message (dict): Het te versturen JSON-RPC bericht
+            timeout (float, optional): Maximale wachttijd op het antwoord in seconden
+                                       (standaard request_timeout)
+            
+        Raises:
+            ConnectionError: Als de sessie door de server is beëindigd
+            RequestTimeoutError: Als de server niet binnen de time-out antwoordt
+            CommunicationError: Als het HTTP-verzoek mislukt
+        """
+        headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream"
+        }
+        if API_KEY:
+            headers["Authorization"] = f"Bearer {API_KEY}"
+        if self.session_id:
+            headers["Mcp-Session-Id"] = self.session_id
+        log("INFO", ">>> Verzoek verzonden (HTTP): %s", message)
+        
+        started = time.perf_counter()
+        try:
+            response = self._post(self.post_url, headers, message, stream=True,
+                                  timeout=(5, self.request_timeout if timeout is None else timeout))
+        except requests.exceptions.RequestException as e:
+            if _is_read_timeout(e):
+                # Een traag antwoord is geen storing van het endpoint
+                raise RequestTimeoutError("Time-out bij wachten op antwoord.")
+            raise _EndpointError(f"Fout bij HTTP-verzoek: {str(e)}")
+        
+        with response:
+            if response.status_code == 404 and self.session_id:
+                # De server kent de sessie niet meer; een nieuwe initialize is nodig
+                self.session_id = None
+                raise SessionExpiredError("De HTTP-sessie is door de server beëindigd.")
+            _check_rate_limit(response)
+            try:
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                if _is_endpoint_failure(e):
+                    raise _EndpointError(f"Fout bij HTTP-verzoek: {str(e)}")
+                raise CommunicationError(f"Fout bij HTTP-verzoek: {str(e)}")
+            if self.endpoints is not None:
+                self.endpoints.record_success(self.post_url, time.perf_counter() - started)
+            
+            session_id = response.headers.get("Mcp-Session-Id")
+            if session_id:
+                self.session_id = session_id
+            if response.status_code == 202:
+                return  # Notificatie of antwoord geaccepteerd, geen body
+            
+            try:
+                content_type = response.headers.get("Content-Type", "")
+                if content_type.startswith("text/event-stream"):
+                    # Korte SSE-stream met notificaties en uiteindelijk het antwoord
+                    for _, data, _ in _iter_sse_events(self._iter_response_lines(response)):
+                        if data and self._wants_raw():
+                            self._dispatch_raw(data)
+                        elif data:
+                            self._dispatch_http_payload(self._decode(data))
+                    return
+                body = self._response_body(response)
+                if body and self._wants_raw():
+                    self._dispatch_raw(body)
+                elif body:
+                    self._dispatch_http_payload(self._decode(body))
+            except json.JSONDecodeError as e:
+                raise CommunicationError(f"Ongeldig JSON-antwoord van de server: {e}")
+            except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError) as e:
+                if _is_read_timeout(e):
+                    raise RequestTimeoutError("Time-out bij wachten op antwoord.")
+                raise CommunicationError(f"Fout bij lezen HTTP-antwoord: {str(e)}")
+
+    def _post(self, url, headers, message, **kwargs):
+        """Verstuurt een bericht als HTTP POST, gecomprimeerd als het groot genoeg is.
+        
+        Weigert de server een gecomprimeerd verzoek (415 Unsupported Media Type), dan wordt
+        compressie voor deze client uitgeschakeld en het verzoek ongecomprimeerd herhaald.
+        
+        Args:
+            url (str): De URL om naar te posten
+            headers (dict): De HTTP-headers
+            message (dict): Het JSON-RPC bericht
+            **kwargs: Overige argumenten voor Session.post (stream, timeout)
+            
+        Returns:
+            requests.Response: Het antwoord
+        """
+        encoding = self._request_encoding()
+        raw_params = has_raw_params(message)
+        if encoding is not None:
+            body = MessageBody(message) if raw_params else json.dumps(message).encode("utf-8")
+            if len(body) >= self.compression_threshold:
+                if raw_params:
+                    # Gestreamd comprimeren; het verzoek wordt na het versturen geteld
+                    compressed = compression.compress_chunks(body, encoding, self.compression, len(body))
+                else:
+                    compressed = compression.compress(body, encoding)
+                    self.compression.record_request(len(body), len(compressed))
+                response = self.connection.post(
+                    url, headers=dict(headers, **{"Content-Encoding": encoding}), data=compressed, **kwargs)
+                self._remember_server_encodings(response)
+                if response.status_code != 415:
+                    return response
+                response.close()
+                log("INFO", f"Server accepteert geen {encoding}-gecomprimeerde verzoeken; compressie uitgeschakeld.")
+                self.request_compression = "off"
+        if raw_params:
+            response = self.connection.post(url, headers=headers, data=MessageBody(message), **kwargs)
+        else:
+            response = self.connection.post(url, headers=headers, json=message, **kwargs)
+        self._remember_server_encodings(response)
+        return response
+
+    def _request_encoding(self):
+        """Geeft de codering voor gecomprimeerde verzoeken, of None als compressie uit staat."""
+        mode = self.request_compression
+        if mode == "off":
+            return None
+        if mode == "auto":
+            return "zstd" if compression.ZSTD_AVAILABLE and "zstd" in self._server_encodings else "gzip"
+        if mode == "zstd" and not compression.ZSTD_AVAILABLE:
+            return "gzip"  # Geen zstd-module beschikbaar
+        return mode
+
+    def _remember_server_encodings(self, response):
+        """Onthoudt welke coderingen de server voor verzoeken accepteert (Accept-Encoding)."""
+        accepted = response.headers.get("Accept-Encoding")
+        if isinstance(accepted, str):
+            self._server_encodings = compression.parse_accept_encoding(accepted)
+
+    def _iter_response_lines(self, response):
+        """Leest de regels van een (SSE-)antwoord; een gecomprimeerde body wordt gestreamd uitgepakt."""
+        encoding = compression.content_encoding(response)
+        if encoding is None:
+            return response.iter_lines()
+        return compression.iter_lines(compression.iter_decompressed(response, encoding, self.compression))
+
+    def _response_body(self, response):
+        """Leest de volledige body van een antwoord; een gecomprimeerde body wordt gestreamd uitgepakt."""
+        encoding = compression.content_encoding(response)
+        if encoding is None:
+            return response.content
+        return b"".join(compression.iter_decompressed(response, encoding, self.compression, HTTP_CHUNK_SIZE))
+
+    def _dispatch_http_payload(self, payload):
+        """Bezorgt een enkel bericht of een batch uit een HTTP-antwoord."""
+        log("DEBUG", "HTTP ontvangen: %s", payload)
+        if isinstance(payload, list):
+            for item in payload:
+                self._dispatch(item)
+        else:
+            self._dispatch(payload)
+
+    def connect_inproc(self, server, serialize=False):
+        """Verbind met een MCP-server die in hetzelfde Python-proces draait.
+        
+        Berichten worden als Python-objecten aan de server doorgegeven, zonder subprocess,
+        pipe of JSON-codering. De server moet een methode handle_message(message) hebben
+        (of zelf aanroepbaar zijn) die een response, een lijst berichten of None teruggeeft.
+        
+        Args:
+            server: Het serverobject, een aanroepbare handler of een entry point als
+                    'module:attribuut' (een klasse wordt zonder argumenten geïnstantieerd)
+            serialize (bool, optional): Codeer en decodeer elk bericht als JSON, zodat de
+                                        serialisatie van een echte verbinding wordt nagebootst
+        
+        Returns:
+            bool: True als de verbinding succesvol is, anders False
+        """
+        try:
+            if isinstance(server, str):
+                server = self._load_entry_point(server)
+            handler = getattr(server, "handle_message", server)
+            if not callable(handler):
+                raise ConfigurationError(
+                    "De in-process server moet een handle_message(message) methode hebben."
+                )
+            
+            self._reset_connection_state()
+            self.connection = server
+            self._inproc_handler = handler
+            self._inproc_serialize = serialize
+            self.transport = "inproc"
+            log("INFO", f"Verbonden met in-process MCP server: {type(server).__name__}")
+            return True
+        except ConfigurationError as e:
+            log("ERROR", f"Configuratiefout: {e}")
+            return False
+        except Exception as e:
+            log("ERROR", f"Onverwachte fout bij laden in-process server: {e}")
+            return False
+
+    def _load_entry_point(self, entry_point):
+        """Laadt een server uit een entry point als 'module:attribuut'.
+        
+        Args:
+            entry_point (str): Het entry point, bijvoorbeeld 'src.demo_server:DemoServer'
+            
+        Returns:
+            Het serverobject
+            
+        Raises:
+            ConfigurationError: Als het entry point niet geladen kan worden
+        """
+        module_name, _, attribute = entry_point.partition(":")
+        try:
+            target = importlib.import_module(module_name)
+            for name in filter(None, attribute.split(".")):
+                target = getattr(target, name)
+        except (ImportError, AttributeError) as e:
+            raise ConfigurationError(f"Kan in-process server '{entry_point}' niet laden: {e}")
+        return target() if isinstance(target, type) else target
+
+    def _send_inproc(self, message):
+        """Geeft een bericht direct aan de in-process server en bezorgt het antwoord.
+        
+        Args:
+            message (dict): Het te versturen JSON-RPC bericht
+            
+        Raises:
+            CommunicationError: Als de server een exception opwerpt
+        """
+        if has_raw_params(message):
+            # Een in-process server verwacht Python-objecten: de parameters moeten geparset worden
+            message = dict(message, params=message["params"].decode())
+        if self._inproc_serialize:
+            message = json.loads(json.dumps(message))
+        try:
+            # De server hoeft niet thread-safe te zijn: berichten worden één voor één verwerkt
+            with self._write_lock:
+                result = self._inproc_handler(message)
+        except Exception as e:
+            raise CommunicationError(f"Fout in in-process server: {e}")
+        if result is None:
+            return
+        if self._inproc_serialize:
+            result = json.loads(json.dumps(result))
+        for item in (result if isinstance(result, list) else [result]):
+            self._dispatch(item)
+
+    def connect_socket(self, address=None):
+        """Verbind met een lokale MCP server via een Unix domain socket of TCP.
+        
+        Berichten zijn JSON-regels (één bericht per regel), net als bij STDIO. Meerdere
+        clientprocessen kunnen zo één langlopende server delen.
+        
+        Args:
+            address (str, optional): Het socketadres ('unix:/pad', '/pad', 'tcp://host:poort'
+                                     of 'host:poort'). Als niet opgegeven, wordt
+                                     MCP_SOCKET_ADDRESS uit .env gebruikt.
+        
+        Returns:
+            bool: True als de verbinding succesvol is, anders False
+        """
+        try:
+            socket_address = address or MCP_SOCKET_ADDRESS
+            if not socket_address:
+                raise ConfigurationError(
+                    "MCP_SOCKET_ADDRESS niet ingesteld in .env bestand of als parameter.\n"
+                    "Stel deze in met het adres van de lokale MCP server."
+                )
+            family, target = parse_socket_address(socket_address)
+            log("INFO", f"Verbind met lokale MCP server via socket: {socket_address}")
+            
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+                if family == socket.AF_INET:
+                    # Kleine verzoeken niet ophouden (Nagle)
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sock.connect(target)
+            except OSError as e:
+                sock.close()
+                raise ConnectionError(
+                    f"Kan geen verbinding maken met de socket {socket_address}: {e}.\n"
+                    f"Controleer of de server actief is."
+                )
+            
+            self._reset_connection_state()
+            self.connection = sock
+            self.transport = "socket"
+            threading.Thread(target=self._socket_listener, args=(sock,), daemon=True).start()
+            self._start_heartbeat()
+            return True
+        except ConfigurationError as e:
+            log("ERROR", f"Configuratiefout: {e}")
+            return False
+        except ConnectionError as e:
+            log("ERROR", f"Verbindingsfout: {e}")
+            return False
+        except Exception as e:
+            log("ERROR", f"Onverwachte fout bij verbinden via socket: {e}")
+            return False
+
+    def _socket_listener(self, sock):
+        """Leest continu JSON-regels van een socketverbinding.
+        
+        Args:
+            sock (socket.socket): De verbonden socket
+        """
+        reader = sock.makefile("rb", buffering=SOCKET_BUFFER_SIZE)
+        try:
+            for line in reader:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    if self._wants_raw():
+                        self._dispatch_raw(line)
+                        continue
+                    if self.decode_offload_threshold and len(line) >= self.decode_offload_threshold:
+                        self._offload_decode(line)
+                        continue
+                    data = self._decode(line)
+                except json.JSONDecodeError:
+                    log("DEBUG", f"Genegeerd (geen JSON): {line[:200]}")
+                    continue
+                log("DEBUG", "Socket ontvangen: %s", data)
+                self._dispatch(data)
+        except (OSError, ValueError) as e:
+            if not self._stop_event.is_set():
+                log("DEBUG", f"Fout bij lezen van socket: {e}")
+        finally:
+            reader.close()
+        if sock is self.connection:
+            self._connection_lost("Socketverbinding is door de server gesloten.")
+
+    def _reset_connection_state(self):
+        """Zet de verbindingsstatus terug voordat een nieuwe verbinding wordt opgezet."""
+        self._stop_event = threading.Event()
+        self._connection_error = None
+
+    def _next_id(self):
+        """Geeft een nieuw, uniek JSON-RPC request id terug (thread-safe)."""
+        with self._lock:
+            request_id = self._id_counter
+            self._id_counter += 1
+        return request_id
+
+    def new_request_id(self):
+        """Reserveert een uniek request id voor call.
+
+        Zo kent de aanroeper het id al voordat het antwoord binnen is, bijvoorbeeld om het
+        verzoek met notifications/cancelled te annuleren.
+
+        Returns:
+            int: Het gereserveerde id
+        """
+        return self._next_id()
+
+    def pending_count(self):
+        """Geeft het aantal verzoeken dat nog op een antwoord wacht."""
+        with self._lock:
+            return len(self._pending)
+
+    def next_notification(self, timeout=None):
+        """Haalt het volgende bericht op dat niet bij een wachtend verzoek hoort.
+
+        Dat zijn notificaties en verzoeken van de server.
+
+        Args:
+            timeout (float, optional): Maximale wachttijd in seconden (standaard onbeperkt)
+
+        Returns:
+            dict: Het bericht, of None als er binnen de time-out niets binnenkwam
+        """
+        try:
+            return self._response_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _register(self, pending):
+        """Registreert een openstaand verzoek voordat het wordt verstuurd.
+        
+        Een antwoord dat al in de wachtrij staat (bijvoorbeeld omdat het eerder binnenkwam
+        dan de registratie) wordt direct aan het verzoek gekoppeld.
+        
+        Args:
+            pending (_PendingCall): Het te registreren verzoek
+        """
+        with self._lock:
+            claimed = self._claim_queued_response(pending.id)
+            if claimed is None:
+                self._pending[pending.id] = pending
+        if claimed is not None:
+            pending.resolve(claimed)
+
+    def _claim_queued_response(self, request_id):
+        """Haalt een reeds ontvangen antwoord met het opgegeven id uit de wachtrij."""
+        with self._response_queue.mutex:
+            for index, message in enumerate(self._response_queue.queue):
+                if isinstance(message, dict) and message.get("id") == request_id and (
+                        "result" in message or "error" in message):
+                    del self._response_queue.queue[index]
+                    return message
+        return None
+
+    def _discard(self, pending):
+        """Verwijdert een openstaand verzoek, bijvoorbeeld na een time-out."""
+        with self._lock:
+            self._pending.pop(pending.id, None)
+
+    def _dispatch(self, data):
+        """Bezorgt een ontvangen bericht bij het wachtende verzoek met hetzelfde id.
+        
+        Berichten zonder wachtend verzoek (notificaties, verzoeken van de server) komen
+        in de response queue terecht.
+        
+        Args:
+            data: Het gedecodeerde JSON-RPC bericht
+        """
+        if self.traffic_recorder is not None:
+            self.traffic_recorder.record("<", data)
+        pending = None
+        with self._lock:
+            if isinstance(data, dict) and ("result" in data or "error" in data):
+                request_id = data.get("id")
+                if isinstance(request_id, (int, str)):
+                    pending = self._pending.pop(request_id, None)
+            if pending is None:
+                if isinstance(data, dict) and data.get("method") == "notifications/tools/list_changed":
+                    # De tools zijn gewijzigd: de bewaarde schema's gelden niet meer
+                    self._tool_schemas.clear()
+                    self._tool_validators.clear()
+                self._response_queue.put(data)
+                return
+        pending.resolve(data)
+
+    def _phase(self, name):
+        """Meet een codeblok als profielfase; zonder profiler een lege context."""
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+
+    def _decode(self, raw):
+        """Decodeert een JSON-bericht (gemeten als fase 'decode' bij profilering)."""
+        with self._phase("decode"):
+            return json.loads(raw)
+
+    def _wants_raw(self):
+        """Geeft True terug als ontvangen berichten ongedecodeerd gerouteerd moeten worden."""
+        return self.raw or self._raw_calls > 0
+
+    def _dispatch_raw(self, raw):
+        """Bezorgt een ongedecodeerd bericht (passthrough-modus).
+        
+        Alleen het id wordt uit de ruwe tekst gelezen; een antwoord op een wachtend verzoek
+        wordt ongewijzigd doorgegeven en pas gedecodeerd als de aanroeper daarom vraagt.
+        Overige berichten (notificaties, verzoeken van de server, batches) worden alsnog
+        gedecodeerd en via _dispatch afgehandeld.
+        
+        Args:
+            raw (str/bytes): Het ruwe JSON-bericht
+            
+        Raises:
+            json.JSONDecodeError: Als een bericht dat gedecodeerd moet worden geen geldige JSON is
+        """
+        request_id = _peek_response_id(raw)
+        if request_id is not None:
+            with self._lock:
+                pending = self._pending.pop(request_id, None)
+            if pending is not None:
+                if self.traffic_recorder is not None:
+                    self.traffic_recorder.record("<", raw)
+                pending.resolve(raw)
+                return
+        payload = self._decode(raw)
+        for item in (payload if isinstance(payload, list) else [payload]):
+            self._dispatch(item)
+
+    def _offload_decode(self, raw):
+        """Bezorgt een groot bericht zonder het in de leesthread te decoderen.
+        
+        Een antwoord op een wachtend verzoek wordt op id gerouteerd en ongedecodeerd
+        afgeleverd; de wachtende aanroeper decodeert het in zijn eigen thread. Overige
+        berichten worden in de decode-pool gedecodeerd en daarna via _dispatch bezorgd,
+        waardoor ze later kunnen aankomen dan kleinere berichten die erna binnenkwamen.
+        
+        Args:
+            raw (str/bytes): Het ruwe JSON-bericht
+        """
+        request_id = _peek_response_id(raw)
+        if request_id is not None:
+            with self._lock:
+                pending = self._pending.pop(request_id, None)
+            if pending is not None:
+                if self.traffic_recorder is not None:
+                    self.traffic_recorder.record("<", raw)
+                pending.resolve(raw)
+                return
+        with self._lock:
+            if self._decode_executor is None:
+                self._decode_executor = ThreadPoolExecutor(max_workers=DECODE_WORKERS,
+                                                           thread_name_prefix="mcp-decode")
+            executor = self._decode_executor
+        started = time.perf_counter()
+        try:
+            future = executor.submit(json.loads, raw)
+        except RuntimeError:
+            return  # De pool is al afgesloten (client wordt gesloten)
+        future.add_done_callback(lambda done: self._dispatch_decoded(done, raw, started))
+
+    def _dispatch_decoded(self, future, raw, started):
+        """Bezorgt een in de decode-pool gedecodeerd bericht (zie _offload_decode)."""
+        try:
+            payload = future.result()
+        except Exception as e:
+            log("DEBUG", f"Genegeerd (geen JSON): {raw[:200]} ({e})")
+            return
+        if self.profiler is not None:
+            self.profiler.record("decode", time.perf_counter() - started)
+        for item in (payload if isinstance(payload, list) else [payload]):
+            self._dispatch(item)
+
+    def _fail_pending(self, error, keep_idempotent=False):
+        """Laat openstaande verzoeken direct mislukken met de opgegeven fout.
+        
+        Args:
+            error (Exception): De fout waarmee de verzoeken mislukken
+            keep_idempotent (bool): Laat idempotente verzoeken openstaan voor een herhaling
+        """
+        with self._lock:
+            if keep_idempotent:
+                failed = [p for p in self._pending.values() if not p.idempotent]
+                for pending in failed:
+                    del self._pending[pending.id]
+            else:
+                failed = list(self._pending.values())
+                self._pending.clear()
+        for pending in failed:
+            pending.fail(error)
+
+    def _sse_post_failed(self):
+        """Registreert een mislukte POST; opent het circuit, dan wordt de stream verbroken voor failover."""
+        if not self.endpoints.record_failure(self.server_url):
+            return
+        response = self._sse_response
+        if response is not None:
+            log("INFO", f"Endpoint {self.server_url} faalt herhaaldelijk; overschakelen.")
+            response.close()  # De luisterthread verbindt daarna met een ander endpoint
+
+    def _fail_over_http(self, message):
+        """Schakelt na een endpointfout over naar het snelste andere gezonde endpoint.
+        
+        Er wordt een nieuwe sessie gestart; alleen notificaties, initialize en idempotente
+        verzoeken worden daarna opnieuw verstuurd, omdat de server een ander verzoek
+        mogelijk al heeft uitgevoerd.
+        
+        Args:
+            message (dict): Het bericht dat niet kon worden verstuurd
+            
+        Returns:
+            bool: True als het bericht opnieuw verstuurd mag worden
+        """
+        if self.endpoints is None:
+            return False
+        failed = self.post_url
+        self.endpoints.record_failure(failed)
+        url = self.endpoints.select(exclude={failed})
+        if url is None:
+            return False
+        log("INFO", f"Endpoint {failed} faalt; over naar {url}.")
+        self.server_url = self.post_url = url
+        self.session_id = None
+        self._session_resumed = False
+        method = message.get("method")
+        if method == "initialize":
+            return True
+        if self._initialize_params is not None and not self._renew_session():
+            return False
+        return "id" not in message or method in IDEMPOTENT_METHODS
+
+    def _connection_lost(self, reason, process=None):
+        """Verwerkt het wegvallen van de verbinding.
+        
+        Alle openstaande verzoeken mislukken direct met een ConnectionError en nieuwe
+        verzoeken worden geweigerd totdat de verbinding is hersteld. Bij een bewaakt
+        lokaal proces blijven idempotente verzoeken staan en wordt het proces herstart.
+        
+        Args:
+            reason (str): Omschrijving van de oorzaak
+            process (subprocess.Popen, optional): Het gestopte proces; meldingen over een
+                                                  eerder (al vervangen) proces worden genegeerd
+        """
+        if self._stop_event.is_set() or self._connection_error is not None:
+            return
+        if process is not None and process is not self.connection:
+            return
+        error = ConnectionError(reason)
+        self._connection_error = error
+        log("ERROR", reason)
+        supervisor = self._supervisor
+        # Bij een supervisor of meerdere endpoints worden idempotente verzoeken straks herhaald
+        self._fail_pending(error, keep_idempotent=supervisor is not None or self.endpoints is not None)
+        if supervisor is not None:
+            supervisor.handle_crash(reason)
+
+    def _connection_failed_permanently(self, reason):
+        """Geeft het herstellen van de verbinding op en laat alle verzoeken mislukken."""
+        error = ConnectionError(reason)
+        self._connection_error = error
+        log("ERROR", reason)
+        self._fail_pending(error)
+
+    def _start_heartbeat(self):
+        """Start de hartslagthread als er een hartslaginterval is ingesteld."""
+        if not self.heartbeat_interval or self.heartbeat_interval <= 0:
+            return
+        threading.Thread(
+            target=self._heartbeat_loop,
+            args=(self._stop_event, self.heartbeat_interval, self.heartbeat_timeout),
+            daemon=True
+        ).start()
+
+    def _heartbeat_loop(self, stop_event, interval, timeout):
+        """Stuurt periodiek een 'ping' en meldt een verbroken verbinding als die uitblijft.
+        
+        Args:
+            stop_event (threading.Event): Stopsignaal van de verbinding waar deze thread bij hoort
+            interval (float): Tijd tussen twee hartslagen in seconden
+            timeout (float): Maximale wachttijd op het antwoord in seconden
+        """
+        while not stop_event.wait(interval):
+            if self.transport is None or self._connection_error is not None:
+                continue
+            try:
+                # Elk antwoord (ook een JSON-RPC fout) betekent dat de server leeft
+                self._request("ping", timeout=timeout)
+            except ConnectionError:
+                continue
+            except CommunicationError as e:
+                if not stop_event.is_set():
+                    self._connection_lost(f"Hartslag mislukt: {e}")
+
+    def _send_message(self, message, timeout=None):
+        """Verstuurt een JSON-RPC bericht via het actieve transport.
+        
+        Args:
+            message (dict): Het te versturen JSON-RPC bericht
+            timeout (float, optional): Maximale wachttijd op het antwoord, voor transports die
+                                       het antwoord direct lezen (Streamable HTTP)
+            
+        Raises:
+            ConfigurationError: Als de configuratie voor het transport ontbreekt
+            CommunicationError: Als het bericht niet kon worden verstuurd
+
+        Returns:
+            int: Het aantal verstuurde bytes, of None als het transport dat niet bijhoudt
+        """
+        if self.traffic_recorder is not None:
+            self.traffic_recorder.record(">", message)
+        if self.transport == "stdio":
+            # Stuur bericht naar STDIN van het subprocess
+            if not self.connection or self.connection.poll() is not None:
+                raise CommunicationError("De verbinding met het lokale proces is verbroken.")
+            if has_raw_params(message):
+                return self._send_raw_params_stdio(message)
+            
+            line = json.dumps(message) + "\n"
+            with self._write_lock:
+                self.connection.stdin.write(line)
+                self.connection.stdin.flush()
+            log("INFO", ">>> Verzoek verzonden (STDIO): %s", message)
+            return len(line)
+        elif self.transport == "sse":
+            # Verstuur HTTP POST naar het door de server geadverteerde endpoint (met sessie-id)
+            if self.post_url is None and not self._endpoint_ready.is_set():
+                # Na een herverbinding: wacht op het endpoint van de nieuwe sessie
+                self._endpoint_ready.wait(self.sse_endpoint_timeout)
+            post_url = self.post_url or self.server_url
+            if not post_url:
+                raise ConfigurationError("Geen URL bekend om berichten naar te versturen.")
+                
+            headers = {"Content-Type": "application/json"}
+            if API_KEY:
+                headers["Authorization"] = f"Bearer {API_KEY}"
+            log("INFO", ">>> Verzoek verzonden (HTTP POST): %s", message)
+            
+            started = time.perf_counter()
+            try:
+                response = self._post(post_url, headers, message, timeout=10)
+                _check_rate_limit(response)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                if self.endpoints is not None and _is_endpoint_failure(e):
+                    self._sse_post_failed()
+                raise CommunicationError(f"Fout bij HTTP-verzoek: {str(e)}")
+            if self.endpoints is not None:
+                self.endpoints.record_success(self.server_url, time.perf_counter() - started)
+        elif self.transport == "http":
+            try:
+                self._post_http(message, timeout)
+            except SessionExpiredError:
+                # Verlopen sessie: start een nieuwe en verstuur het bericht opnieuw
+                if message.get("method") == "initialize" or not self._renew_session():
+                    raise
+                self._post_http(message, timeout)
+            except _EndpointError:
+                # Endpoint onbereikbaar: over naar een ander endpoint en zo mogelijk opnieuw versturen
+                if not self._fail_over_http(message):
+                    raise
+                self._post_http(message, timeout)
+        elif self.transport == "inproc":
+            self._send_inproc(message)
+        elif self.transport == "socket":
+            if has_raw_params(message):
+                # Al gecodeerde parameters in stukken, zonder het hele bericht op te bouwen
+                chunks = iter_message(message, single_line=True)
+            else:
+                chunks = [(json.dumps(message) + "\n").encode("utf-8")]
+            size = 0
+            try:
+                with self._write_lock:
+                    for chunk in chunks:
+                        self.connection.sendall(chunk)
+                        size += len(chunk)
+                    if has_raw_params(message):
+                        self.connection.sendall(b"\n")
+                        size += 1
+            except OSError as e:
+                raise CommunicationError(f"Fout bij schrijven naar socket: {e}")
+            log("INFO", ">>> Verzoek verzonden (socket): %s", message)
+            return size
+
+    def _send_raw_params_stdio(self, message):
+        """Schrijft een bericht met RawParams in stukken naar STDIN van het lokale proces.
+        
+        Returns:
+            int: Het aantal verstuurde bytes
+        """
+        size = 0
+        with self._write_lock:
+            stdin = self.connection.stdin
+            stdin.flush()  # Eerst wat nog in de tekstbuffer staat
+            for chunk in iter_message(message, single_line=True):
+                stdin.buffer.write(chunk)
+                size += len(chunk)
+            stdin.buffer.write(b"\n")
+            stdin.buffer.flush()
+        log("INFO", ">>> Verzoek verzonden (STDIO): %s", message)
+        return size + 1
+
+    def session_state(self):
+        """Geeft de onderhandelde sessie terug, om later te hervatten.
+        
+        Returns:
+            dict: url, session_id, protocolVersion, server_info en initialize_params,
+                  of None als er (nog) geen handshake is uitgevoerd
+        """
+        if self.server_info is None or self._initialize_params is None:
+            return None
+        return {
+            "url": self.server_url,
+            "session_id": self.session_id,
+            "protocolVersion": self.server_info.get("protocolVersion"),
+            "server_info": self.server_info,
+            "initialize_params": self._initialize_params,
+        }
+
+    def resume_session(self, state):
+        """Hervat een eerder onderhandelde HTTP-sessie zonder nieuwe handshake.
+        
+        Een volgende initialize() geeft dan direct het bewaarde resultaat terug. Kent de
+        server de sessie niet meer, dan wordt automatisch een nieuwe handshake gedaan.
+        
+        Args:
+            state (dict): Resultaat van session_state()
+            
+        Returns:
+            bool: True als de sessie is hervat, False als die niet bij deze verbinding past
+        """
+        if self.transport != "http" or not state or state.get("url") != self.server_url:
+            return False
+        if not state.get("session_id") or not state.get("server_info"):
+            return False
+        self.session_id = state["session_id"]
+        self.server_info = state["server_info"]
+        self._initialize_params = state.get("initialize_params")
+        self._session_resumed = True
+        log("INFO", f"HTTP-sessie hervat: {self.session_id}")
+        return True
+
+    def _load_session_file(self):
+        """Hervat de sessie uit session_file, als die bestaat en bij deze URL hoort."""
+        try:
+            with open(self.session_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log("DEBUG", f"Sessiebestand niet leesbaar: {e}")
+            return
+        self.resume_session(state)
+
+    def _save_session_file(self):
+        """Bewaart de huidige sessie in session_file (alleen leesbaar voor de eigenaar)."""
+        state = self.session_state()
+        if state is None or not state["session_id"]:
+            return
+        try:
+            fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+        except OSError as e:
+            log("ERROR", f"Kon sessiebestand niet schrijven: {e}")
+
+    def _renew_session(self):
+        """Herhaalt de handshake met de laatst gebruikte parameters (nieuwe sessie).
+        
+        Returns:
+            bool: True als de nieuwe handshake is geslaagd
+        """
+        params = self._initialize_params
+        if params is None:
+            return False
+        log("INFO", "Sessie is niet meer geldig; handshake wordt herhaald.")
+        self._session_resumed = False
+        try:
+            response = self._handshake(params, during_restart=True)
+        except MCPClientError as e:
+            log("ERROR", f"Nieuwe handshake mislukt: {e}")
+            return False
+        return "result" in response
+
+    def call(self, method, params=None, timeout=None, idempotent=None, priority="interactive", request_id=None):
+        """Stuur een JSON-RPC verzoek en wacht op het antwoord met hetzelfde id.
+        
+        Anders dan send_request worden fouten als exceptions opgeworpen, zodat de
+        aanroeper onderscheid kan maken tussen een verbroken verbinding en een time-out.
+        Een JSON-RPC foutantwoord van de server wordt gewoon teruggegeven.
+        
+        Args:
+            method (str): De JSON-RPC methode om aan te roepen
+            params (dict/list, optional): De parameters voor de JSON-RPC methode
+            timeout (float, optional): Maximale wachttijd in seconden (standaard request_timeout)
+            idempotent (bool, optional): Of het verzoek na een herstart opnieuw verstuurd mag
+                                         worden. Standaard True voor IDEMPOTENT_METHODS.
+            priority (str, optional): Prioriteitsbaan bij gebruik van een scheduler
+                                      ("interactive" of "bulk")
+            request_id (int, optional): Een met new_request_id gereserveerd id, bijvoorbeeld
+                                        om het verzoek later te kunnen annuleren
+            
+        Returns:
+            dict: De JSON-RPC response
+            
+        Raises:
+            ConnectionError: Als er geen verbinding is of de verbinding wegvalt tijdens het wachten
+            CommunicationError: Als het verzoek niet kon worden verstuurd
+            RequestTimeoutError: Als er binnen de time-out geen antwoord is ontvangen
+            RateLimitError: Als de server het verzoek ook na opnieuw proberen blijft weigeren
+        """
+        return self._request(method, params, timeout, idempotent, priority=priority, request_id=request_id)
+
+    def call_raw(self, method, params=None, timeout=None, idempotent=None, priority="interactive"):
+        """Als call, maar geeft het antwoord terug als ongedecodeerde JSON-tekst.
+        
+        Zolang het verzoek openstaat worden ontvangen berichten alleen op id gerouteerd,
+        dus het antwoord is de originele buffer zoals die van de verbinding is gelezen:
+        str bij STDIO en SSE, bytes bij sockets en HTTP. Bij in-process servers en
+        antwoorden die vóór de registratie binnenkwamen wordt het antwoord gecodeerd.
+        
+        Returns:
+            str/bytes: De JSON-RPC response als JSON-tekst
+            
+        Raises:
+            Zie call
+        """
+        return self._request(method, params, timeout, idempotent, priority=priority, raw=True)
+
+    def _request(self, method, params=None, timeout=None, idempotent=None, during_restart=False,
+                 priority=None, raw=False, request_id=None):
+        """Verstuurt een verzoek en wacht op het antwoord (zie call).
+        
+        Met een scheduler wacht het verzoek eerst op zijn beurt in de opgegeven
+        prioriteitsbaan; een 429-antwoord pauzeert de scheduler en het verzoek wordt
+        opnieuw geprobeerd.
+        
+        Args:
+            during_restart (bool): Sta het verzoek toe terwijl de verbinding als verbroken
+                                   gemarkeerd is (voor de handshake na een herstart)
+            priority (str, optional): Prioriteitsbaan; None slaat de scheduler over
+                                      (voor hartslagen en de handshake)
+            raw (bool): Geef het antwoord terug als JSON-tekst (zie call_raw)
+            request_id (int, optional): Gereserveerd id voor het verzoek (zie call)
+        """
+        if method == "tools/call" and self.validate_tools:
+            self._validate_tool_call(params)
+        scheduler = self.scheduler if priority is not None else None
+        if scheduler is None:
+            return self._request_once(method, params, timeout, idempotent, during_restart, raw, request_id)
+        
+        timeout = self.request_timeout if timeout is None else timeout
+        attempt = 0
+        while True:
+            scheduler.acquire(method, priority, timeout)
+            try:
+                return self._request_once(method, params, timeout, idempotent, during_restart, raw, request_id)
+            except RateLimitError as e:
+                scheduler.penalize(e.retry_after)
+                attempt += 1
+                if attempt > RATE_LIMIT_RETRIES:
+                    raise
+                log("INFO", f"{e} Verzoek wordt opnieuw ingepland.")
+            finally:
+                scheduler.release()
+
+    def _request_once(self, method, params=None, timeout=None, idempotent=None, during_restart=False,
+                      raw=False, request_id=None):
+        """Verstuurt een verzoek één keer en wacht op het antwoord (zie call)."""
+        if self.transport is None:
+            raise ConnectionError(NOT_CONNECTED_MESSAGE)
+        if self._connection_error is not None and not during_restart:
+            raise ConnectionError(str(self._connection_error))
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        timeout = self.request_timeout if timeout is None else timeout
+        
+        # Stel JSON-RPC bericht samen
+        if request_id is None:
+            request_id = self._next_id()
+        message = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": method
+        }
+        if params is not None:
+            message["params"] = params
+        
+        # Registreer het verzoek vóór het versturen, zodat een snel antwoord niet verloren gaat
+        pending = _PendingCall(request_id, method, message, idempotent)
+        request_size = sent = None
+        if raw:
+            with self._lock:
+                self._raw_calls += 1
+        try:
+            self._register(pending)
+            pending.sent_at = time.time()
+            try:
+                with self._phase(f"{method}: send"):
+                    request_size = self._send_message(message, timeout=timeout)
+                sent = True
+            except Exception:
+                self._discard(pending)
+                raise
+            
+            # Wacht op het antwoord; bij verbindingsverlies wordt het wachten direct afgebroken
+            with self._phase(f"{method}: wait"):
+                answered = pending.wait(timeout)
+            if not answered:
+                self._discard(pending)
+                raise RequestTimeoutError("Time-out bij wachten op antwoord.")
+        finally:
+            if raw:
+                with self._lock:
+                    self._raw_calls -= 1
+            if self.flight_recorder is not None:
+                self._record_flight(pending, request_size, sent)
+        if pending.error is not None:
+            raise pending.error
+        response = pending.response
+        # In de passthrough-modus kan het antwoord nog ongedecodeerd zijn
+        if raw:
+            return response if isinstance(response, (str, bytes)) else json.dumps(response)
+        if isinstance(response, (str, bytes)):
+            try:
+                response = self._decode(response)
+            except json.JSONDecodeError as e:
+                raise CommunicationError(f"Ongeldig JSON-antwoord van de server: {e}")
+        if method == "tools/list" and self.validate_tools:
+            self._cache_tool_schemas(response)
+        return response
+
+    def _cache_tool_schemas(self, response):
+        """Bewaart het inputSchema van elke tool uit een (pagina van een) tools/list-antwoord."""
+        result = response.get("result") if isinstance(response, dict) else None
+        tools = result.get("tools") if isinstance(result, dict) else None
+        if not isinstance(tools, list):
+            return
+        with self._lock:
+            for tool in tools:
+                if isinstance(tool, dict) and isinstance(tool.get("name"), str):
+                    self._tool_schemas[tool["name"]] = tool.get("inputSchema")
+                    self._tool_validators.pop(tool["name"], None)
+
+    def _validate_tool_call(self, params):
+        """Controleert de argumenten van tools/call tegen het bewaarde inputSchema.
+        
+        Het schema wordt bij het eerste gebruik gecompileerd. Tools waarvan (nog) geen
+        schema bekend is, worden zonder controle verstuurd.
+        
+        Raises:
+            ValidationError: Als de argumenten niet aan het schema voldoen
+        """
+        if not isinstance(params, dict):
+            return
+        name = params.get("name")
+        validator = self._tool_validators.get(name)
+        if validator is None:
+            schema = self._tool_schemas.get(name)
+            if schema is None:
+                return
+            validator = compile_schema(schema)
+            self._tool_validators[name] = validator
+        error = validator(params.get("arguments", {}))
+        if error:
+            raise ValidationError(f"Ongeldige argumenten voor tool '{name}': {error}")
+
+    def invalidate_tool_schemas(self):
+        """Vergeet de bewaarde tool-schema's (bijvoorbeeld na notifications/tools/list_changed)."""
+        with self._lock:
+            self._tool_schemas.clear()
+            self._tool_validators.clear()
+
+    def _record_flight(self, pending, request_size, sent):
+        """Legt een afgerond verzoek vast in de flight recorder."""
+        response = pending.response
+        response_size = None
+        if pending.error is not None:
+            outcome = type(pending.error).__name__
+        elif isinstance(response, dict):
+            outcome = "error" if "error" in response else "ok"
+        elif isinstance(response, (str, bytes)):
+            # Ongedecodeerd antwoord: alleen het begin bekijken
+            response_size = len(response)
+            head = response[:64] if isinstance(response, str) else response[:64].decode("utf-8", "replace")
+            outcome = "error" if '"error"' in head else "ok"
+        else:
+            outcome = "timeout" if sent else "send_failed"
+        self.flight_recorder.record((pending.id, pending.method, request_size, response_size,
+                                     pending.sent_at, pending.received_at, outcome))
+        if self.flight_recorder_file and outcome not in ("ok", "error"):
+            try:
+                self.dump_flight_recorder(self.flight_recorder_file)
+            except OSError as e:
+                log("ERROR", f"Kon flight recorder niet wegschrijven: {e}")
+
+    def flight_recorder_snapshot(self):
+        """Geeft de recente en nog openstaande verzoeken van deze client terug.
+        
+        Neemt bewust geen lock, zodat dit ook veilig vanuit een signaalhandler kan.
+        
+        Returns:
+            dict: transport, recent (afgeronde verzoeken, oudste eerst) en in_flight
+                  (openstaande verzoeken met hun leeftijd in seconden)
+        """
+        now = time.time()
+        in_flight = []
+        for pending in safe_copy(self._pending.values()):
+            sent_at = pending.sent_at
+            in_flight.append({
+                "id": pending.id,
+                "method": pending.method,
+                "sent_at": sent_at,
+                "age": now - sent_at if sent_at is not None else None,
+            })
+        return {
+            "transport": self.transport,
+            "recent": self.flight_recorder.entries() if self.flight_recorder is not None else [],
+            "in_flight": in_flight,
+        }
+
+    def dump_flight_recorder(self, path=None):
+        """Schrijft de flight recorder van deze client als JSON weg.
+        
+        Args:
+            path (str, optional): Het doelbestand (standaard STDERR)
+        """
+        write_dump({"pid": os.getpid(), "time": time.time(), "clients": [self.flight_recorder_snapshot()]},
+                   path)
+
+    def notify(self, method, params=None):
+        """Stuur een JSON-RPC notificatie (een bericht zonder id, zonder antwoord).
+        
+        Args:
+            method (str): De JSON-RPC methode van de notificatie
+            params (dict/list, optional): De parameters van de notificatie
+            
+        Raises:
+            ConnectionError: Als er geen verbinding is
+            CommunicationError: Als de notificatie niet kon worden verstuurd
+        """
+        if self.transport is None:
+            raise ConnectionError(NOT_CONNECTED_MESSAGE)
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        self._send_message(message)
+
+    def initialize(self, capabilities=None, client_info=None, protocol_version=None, timeout=None):
+        """Voer de MCP initialize-handshake uit.
+        
+        Stuurt 'initialize', bewaart het resultaat in server_info en bevestigt met de
+        notificatie 'notifications/initialized'.
+        
+        Args:
+            capabilities (dict, optional): De capabilities van de client
+            client_info (dict, optional): Naam en versie van de client (standaard CLIENT_INFO)
+            protocol_version (str, optional): De gevraagde protocolversie (standaard PROTOCOL_VERSION)
+            timeout (float, optional): Maximale wachttijd in seconden
+            
+        Returns:
+            dict: De JSON-RPC response op 'initialize'
+            
+        Raises:
+            ConnectionError: Als er geen verbinding is
+            CommunicationError: Als het verzoek niet kon worden verstuurd of verliep
+        """
+        params = {
+            "protocolVersion": protocol_version or PROTOCOL_VERSION,
+            "capabilities": capabilities or {},
+            "clientInfo": client_info or CLIENT_INFO
+        }
+        if self._session_resumed and self.server_info is not None:
+            # Hervatte sessie: de server kent deze client al, geen nieuwe handshake nodig
+            return {"jsonrpc": "2.0", "id": None, "result": self.server_info}
+        with self._phase("initialize"):
+            return self._handshake(params, timeout)
+
+    def _handshake(self, params, timeout=None, during_restart=False):
+        """Verstuurt 'initialize' met de opgegeven parameters en rondt de handshake af."""
+        response = self._request("initialize", params, timeout, idempotent=False,
+                                 during_restart=during_restart)
+        if isinstance(response, dict) and "result" in response:
+            self.server_info = response["result"]
+            self._initialize_params = params
+            self.notify("notifications/initialized")
+            if self.session_file and self.transport == "http":
+                self._save_session_file()
+        return response
+
+    def send_request(self, method, params=None):
+        """Stuur een JSON-RPC verzoek naar de MCP-server.
+        
+        Args:
+            method (str): De JSON-RPC methode om aan te roepen
+            params (dict/list, optional): De parameters voor de JSON-RPC methode
+            
+        Returns:
+            dict: De JSON-RPC response, of een dict met een error-sleutel bij fouten
+        """
+        if self.transport is None:
+            error_msg = NOT_CONNECTED_MESSAGE
+            log("ERROR", error_msg)
+            return {"error": error_msg}
+
+        try:
+            return self.call(method, params)
+        except RequestTimeoutError as e:
+            log("ERROR", str(e))
+            return {"error": str(e)}
+        except ConfigurationError as e:
+            log("ERROR", f"Configuratiefout: {e}")
+            return {"error": str(e)}
+        except ConnectionError as e:
+            log("ERROR", f"Verbindingsfout: {e}")
+            return {"error": str(e)}
+        except CommunicationError as e:
+            log("ERROR", f"Communicatiefout: {e}")
+            return {"error": str(e)}
+        except Exception as e:
+            log("ERROR", f"Onverwachte fout bij versturen verzoek: {e}")
+            return {"error": str(e)}
+
+    def _call_or_error(self, method, params, timeout, priority):
+        """Als call, maar een fout wordt als dict met een error-sleutel teruggegeven."""
+        try:
+            return self.call(method, params, timeout=timeout, priority=priority)
+        except MCPClientError as e:
+            log("ERROR", f"Fout bij uitvoeren {method}: {e}")
+            return {"error": str(e)}
+
+    def imap_unordered(self, method, params_iter, concurrency=8, timeout=None, priority="bulk"):
+        """Voert een methode uit voor elke set parameters, met N verzoeken tegelijk.
+        
+        De parameters worden lui uit de iterable gelezen: er staan nooit meer dan
+        `concurrency` verzoeken open, zodat ook een enorme invoer niet in het geheugen
+        hoeft te passen. Resultaten komen terug zodra ze binnen zijn. Een fout bij één
+        item stopt de rest niet; die wordt als dict met een error-sleutel teruggegeven,
+        net als bij send_request.
+        
+        Args:
+            method (str): De JSON-RPC methode om aan te roepen
+            params_iter (iterable): Parameters per verzoek
+            concurrency (int, optional): Maximaal aantal gelijktijdig openstaande verzoeken
+            timeout (float, optional): Maximale wachttijd per verzoek (standaard request_timeout)
+            priority (str, optional): Prioriteitsbaan bij gebruik van een scheduler
+            
+        Yields:
+            tuple: (index, response) met de positie van de parameters in de invoer
+        """
+        params_iter = iter(enumerate(params_iter))
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="mcp-map")
+        in_flight = {}
+        try:
+            while True:
+                # Vul aan tot het maximum aantal openstaande verzoeken (backpressure)
+                for index, params in params_iter:
+                    future = executor.submit(self._call_or_error, method, params, timeout, priority)
+                    in_flight[future] = index
+                    if len(in_flight) >= concurrency:
+                        break
+                if not in_flight:
+                    return
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield in_flight.pop(future), future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def map(self, method, params_iter, concurrency=8, timeout=None, priority="bulk"):
+        """Als imap_unordered, maar geeft de antwoorden in de volgorde van de invoer terug.
+        
+        Een traag verzoek houdt de volgende resultaten op tot het klaar is; er staan
+        nooit meer dan `concurrency` verzoeken open.
+        
+        Yields:
+            dict: De JSON-RPC response per item, of een dict met een error-sleutel
+        """
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="mcp-map")
+        window = deque()
+        try:
+            for params in params_iter:
+                window.append(executor.submit(self._call_or_error, method, params, timeout, priority))
+                if len(window) >= concurrency:
+                    yield window.popleft().result()
+            while window:
+                yield window.popleft().result()
+        finally:
+            for future in window:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def iter_paginated(self, method, params=None, prefetch=2, timeout=None, item_key=None):
+        """Geeft de items van een gepagineerde list-methode één voor één terug.
+        
+        Volgt nextCursor automatisch. Een achtergrondthread haalt de volgende pagina's al
+        op terwijl de aanroeper de huidige verwerkt; er liggen nooit meer dan `prefetch`
+        pagina's klaar, zodat het geheugengebruik begrensd blijft.
+        
+        Args:
+            method (str): De list-methode, bijvoorbeeld 'resources/list'
+            params (dict, optional): Extra parameters voor elk verzoek
+            prefetch (int, optional): Maximaal aantal vooruit opgehaalde pagina's
+            timeout (float, optional): Maximale wachttijd per pagina (standaard request_timeout)
+            item_key (str, optional): Sleutel met de items in het resultaat (standaard
+                                      afgeleid uit PAGINATED_RESULT_KEYS)
+            
+        Yields:
+            dict: Eén item (tool, resource, prompt, ...) per keer
+            
+        Raises:
+            ValueError: Als de sleutel met items niet bekend is voor deze methode
+            CommunicationError: Als de server een foutantwoord geeft
+            ConnectionError/RequestTimeoutError: Zie call
+        """
+        item_key = item_key or PAGINATED_RESULT_KEYS.get(method)
+        if item_key is None:
+            raise ValueError(f"Onbekende gepagineerde methode: {method}; geef item_key op.")
+        pages = queue.Queue(maxsize=max(1, prefetch))
+        stop = threading.Event()
+        end = object()
+        
+        def put(item):
+            # Wacht op ruimte, maar geef op als de aanroeper is gestopt met lezen
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def fetch():
+            cursor = None
+            try:
+                while True:
+                    page_params = dict(params or {})
+                    if cursor:
+                        page_params["cursor"] = cursor
+                    response = self.call(method, page_params, timeout=timeout)
+                    if "error" in response:
+                        raise CommunicationError(f"Fout bij ophalen van {method}: {response['error']}")
+                    result = response.get("result") or {}
+                    cursor = result.get("nextCursor")
+                    if not put(result.get(item_key, [])) or not cursor:
+                        break
+                put(end)
+            except Exception as e:
+                put(e)
+        
+        threading.Thread(target=fetch, daemon=True).start()
+        try:
+            while True:
+                page = pages.get()
+                if page is end:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield from page
+        finally:
+            stop.set()
+
+    def read_resource_blob(self, uri, target, checksum="sha256", chunk_size=BLOB_CHUNK_SIZE,
+                           timeout=None):
+        """Leest een binaire resource en decodeert de base64-blob stuksgewijs naar een doel.
+        
+        Het antwoord wordt niet als JSON gedecodeerd (zie call_raw); de blob wordt in
+        stukken rechtstreeks naar het doel geschreven en onderweg gecontroleerd met een
+        checksum. Naast het ruwe antwoord staat er zo hooguit één stuk in het geheugen,
+        in plaats van de JSON-string, de gedecodeerde str én de bytes.
+        
+        Args:
+            uri (str): De URI van de resource
+            target: Een bestandspad, een object met write() of een beschrijfbare buffer
+                    (bytearray/memoryview) die groot genoeg is
+            checksum (str, optional): hashlib-algoritme voor de checksum (None = geen)
+            chunk_size (int, optional): Aantal base64-tekens per stuk
+            timeout (float, optional): Maximale wachttijd op het antwoord
+            
+        Returns:
+            dict: {"uri", "size" (aantal bytes), "checksum" (hex, of None)}
+            
+        Raises:
+            CommunicationError: Bij een foutantwoord, een resource zonder blob, ongeldige
+                                base64-data of een te kleine buffer
+            ConnectionError/RequestTimeoutError: Zie call
+        """
+        raw = self.call_raw("resources/read", {"uri": uri}, timeout=timeout)
+        digest = hashlib.new(checksum) if checksum else None
+        size = 0
+        
+        if isinstance(target, (str, Path)):
+            target_file = open(target, "wb")
+            write = target_file.write
+        elif hasattr(target, "write"):
+            target_file = None
+            write = target.write
+        else:
+            target_file = None
+            buffer = memoryview(target).cast("B")
+            
+            def write(data):
+                if size + len(data) > len(buffer):
+                    raise CommunicationError(f"Buffer te klein voor blob van {uri}.")
+                buffer[size:size + len(data)] = data
+        
+        try:
+            try:
+                for data in _iter_blob_chunks(raw, chunk_size):
+                    write(data)
+                    size += len(data)
+                    if digest is not None:
+                        digest.update(data)
+            except CommunicationError as e:
+                # Geen blob: geef de foutmelding van de server als die er is
+                try:
+                    response = json.loads(raw)
+                except ValueError:
+                    raise e
+                if isinstance(response, dict) and "error" in response:
+                    raise CommunicationError(f"Fout bij lezen van {uri}: {response['error']}")
+                raise
+        finally:
+            if target_file is not None:
+                target_file.close()
+        
+        return {"uri": uri, "size": size, "checksum": digest.hexdigest() if digest else None}
+
+    def close(self):
+        """Sluit de verbinding af (beëindig proces of streaming)."""
+        self._stop_event.set()
+        self._supervisor = None
+        if self.transport == "stdio":
+            try:
+                # Beëindig lokaal proces netjes
+                if self.connection:
+                    self._stop_process(self.connection)
+                    log("INFO", "Lokaal proces gestopt.")
+            except Exception as e:
                 log("ERROR", f"Fout bij stoppen lokaal proces: {e}")
         elif self.transport == "sse":
-            # Voor SSE volstaat het stoppen van de luisterthread via _stop_event
+            # Sluit de stream (dit onderbreekt de luisterthread) en de HTTP-sessie
+            try:
+                if self._sse_response is not None:
+                    self._sse_response.close()
+                if self.connection:
+                    self.connection.close()
+            except Exception as e:
+                log("DEBUG", f"Fout bij sluiten SSE-stream: {e}")
+            self._sse_response = None
+            self.post_url = None
+            self.session_id = None
             log("INFO", "Remote SSE-verbinding gesloten.")
+        elif self.transport == "http":
+            # Beëindig de sessie op de server en sluit de HTTP-sessie
+            try:
+                # Een bewaarde sessie blijft bestaan, zodat een volgend proces die kan hervatten
+                if self.session_id and not self.session_file:
+                    headers = {"Mcp-Session-Id": self.session_id}
+                    if API_KEY:
+                        headers["Authorization"] = f"Bearer {API_KEY}"
+                    self.connection.delete(self.post_url, headers=headers, timeout=5)
+            except Exception as e:
+                log("DEBUG", f"Fout bij beëindigen HTTP-sessie: {e}")
+            finally:
+                self.connection.close()
+            self.post_url = None
+            self.session_id = None
+            log("INFO", "Remote HTTP-verbinding gesloten.")
+        elif self.transport == "inproc":
+            self._inproc_handler = None
+            log("INFO", "In-process verbinding gesloten.")
+        elif self.transport == "socket":
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # De server heeft de verbinding al gesloten
+            self.connection.close()
+            log("INFO", "Socketverbinding gesloten.")
         self.transport = None
         self.connection = None
+        # Laat eventuele wachtende verzoeken direct weten dat de verbinding dicht is
+        self._fail_pending(ConnectionError("De verbinding is gesloten."))
+        if self._owns_decode_executor and self._decode_executor is not None:
+            self._decode_executor.shutdown(wait=False)
+            self._decode_executor = None
+        if self.traffic_recorder is not None:
+            self.traffic_recorder.close()
         # Leeg eventueel de response queue
         with self._response_queue.mutex:
             self._response_queue.queue.clear()
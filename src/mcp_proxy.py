@@ -0,0 +1,540 @@
+#!/usr/bin/env python
+"""
+MCP Proxy - Eén MCP-server delen met veel downstream clients
+
+Deze module bevat een multiplexende proxy die op MCPClient is gebouwd. Downstream clients
+verbinden via STDIO, een Unix socket/TCP of HTTP; hun verzoeken gaan over één upstream
+verbinding (of een kleine pool) naar dezelfde warme server. Elk verzoek krijgt upstream
+een eigen id; het antwoord gaat met het oorspronkelijke id terug naar de juiste client.
+Annuleringen krijgen het upstream id van het verzoek en voortgangsmeldingen gaan via hun
+progressToken alleen naar de client die het verzoek stuurde.
+Optioneel worden resultaten van list- en read-methoden gedeeld via een cache.
+
+Gebruik: ``python -m src.mcp_proxy --upstream "python -m src.demo_server" --listen unix:/tmp/mcp.sock``
+"""
+
+import argparse
+import itertools
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from src.mcp_client import MCPClient, MCPClientError, RequestTimeoutError, log, parse_socket_address
+
+# JSON-RPC foutcodes
+INVALID_REQUEST = -32600
+INTERNAL_ERROR = -32603
+
+# Methoden waarvan het resultaat gedeeld mag worden tussen downstream clients
+CACHEABLE_METHODS = frozenset({
+    "tools/list",
+    "resources/list",
+    "resources/templates/list",
+    "resources/read",
+    "prompts/list",
+})
+
+# Notificaties waarna gecachte resultaten niet meer kloppen
+INVALIDATING_NOTIFICATIONS = frozenset({
+    "notifications/tools/list_changed",
+    "notifications/resources/list_changed",
+    "notifications/resources/updated",
+    "notifications/prompts/list_changed",
+})
+
+
+class _DownstreamSession:
+    """Een verbonden downstream client die JSON-regels ontvangt.
+
+    Args:
+        write (callable): Schrijft één gecodeerde regel (bytes) naar de client
+    """
+
+    def __init__(self, write):
+        self._write = write
+        self._lock = threading.Lock()
+        self.closed = False
+        self.requests = {}  # downstream id -> (upstream client, upstream id), zie MCPProxy._routes_lock
+
+    def send(self, message):
+        """Stuurt een bericht naar de client; fouten sluiten de sessie."""
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self._write(data)
+            except (OSError, ValueError) as e:
+                log("DEBUG", f"Downstream client niet bereikbaar: {e}")
+                self.closed = True
+
+
+class MCPProxy:
+    """Verdeelt verzoeken van veel downstream clients over een pool upstream verbindingen.
+
+    Args:
+        upstreams (list): Verbonden MCPClient-instanties naar dezelfde server
+        cache (bool, optional): Deel resultaten van CACHEABLE_METHODS tussen clients
+        max_workers (int, optional): Maximaal aantal gelijktijdig doorgestuurde verzoeken
+    """
+
+    def __init__(self, upstreams, cache=False, max_workers=32):
+        if not upstreams:
+            raise ValueError("De proxy heeft minimaal één upstream verbinding nodig.")
+        self.upstreams = list(upstreams)
+        self.cache_enabled = cache
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._sessions = set()
+        self._sessions_lock = threading.Lock()
+        self._progress = {}  # upstream progressToken -> (sessie, downstream progressToken)
+        self._progress_tokens = itertools.count(1)
+        self._routes_lock = threading.Lock()  # Beschermt _progress en de requests van sessies
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-proxy")
+        self._stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "cache_hits": 0, "errors": 0}
+
+    def start(self):
+        """Voert de handshake uit op alle upstream verbindingen en start het doorgeven
+        van notificaties.
+
+        Raises:
+            MCPClientError: Als de handshake met een upstream server mislukt
+        """
+        for client in self.upstreams:
+            if client.server_info is None:
+                response = client.initialize()
+                if "result" not in response:
+                    raise MCPClientError(f"Initialize met upstream server mislukt: {response.get('error')}")
+            threading.Thread(target=self._notification_pump, args=(client,), daemon=True).start()
+        log("INFO", f"Proxy gestart met {len(self.upstreams)} upstream verbinding(en).")
+
+    def close(self):
+        """Stopt de proxy en sluit alle upstream verbindingen."""
+        self._stop_event.set()
+        # Laat lopende verzoeken eerst hun antwoord afleveren
+        self._executor.shutdown(wait=True)
+        for client in self.upstreams:
+            client.close()
+
+    def _pick_upstream(self):
+        """Kiest de upstream verbinding met de minste openstaande verzoeken."""
+        return min(self.upstreams, key=lambda client: client.pending_count())
+
+    def _notification_pump(self, client):
+        """Geeft notificaties van een upstream server door aan de downstream clients.
+
+        Voortgang gaat alleen naar de client van het verzoek; overige notificaties gaan naar
+        alle clients.
+        """
+        while not self._stop_event.is_set():
+            message = client.next_notification(timeout=0.5)
+            if message is None:
+                continue
+            if not isinstance(message, dict) or "method" not in message:
+                continue
+            if "id" in message:
+                # Verzoeken van de server kunnen niet aan één client worden toegewezen
+                log("DEBUG", f"Serververzoek genegeerd door proxy: {message['method']}")
+                continue
+            if message["method"] == "notifications/progress":
+                self._deliver_progress(message)
+                continue
+            if message["method"] in INVALIDATING_NOTIFICATIONS:
+                self.invalidate_cache()
+            self._broadcast(message)
+
+    def _deliver_progress(self, message):
+        """Stuurt een voortgangsmelding met het oorspronkelijke token naar de eigen client."""
+        params = message.get("params")
+        token = params.get("progressToken") if isinstance(params, dict) else None
+        with self._routes_lock:
+            route = self._progress.get(token) if isinstance(token, (str, int)) else None
+        if route is None:
+            log("DEBUG", f"Voortgang voor onbekend token genegeerd: {token}")
+            return
+        session, downstream_token = route
+        session.send(dict(message, params=dict(params, progressToken=downstream_token)))
+
+    def _route_progress(self, session, params):
+        """Vervangt het progressToken door een uniek upstream token dat naar de sessie wijst.
+
+        Clients kiezen hun tokens zelf, dus twee clients kunnen hetzelfde token gebruiken.
+
+        Args:
+            session (_DownstreamSession): De client van het verzoek (None bij HTTP)
+            params: De parameters van het verzoek
+
+        Returns:
+            tuple: (parameters voor upstream, upstream token of None)
+        """
+        meta = params.get("_meta") if isinstance(params, dict) else None
+        if not isinstance(meta, dict) or "progressToken" not in meta:
+            return params, None
+        meta = dict(meta)
+        token = meta.pop("progressToken")
+        if session is None:
+            # Zonder sessie (HTTP) kan de proxy geen voortgang afleveren
+            return dict(params, _meta=meta), None
+        upstream_token = next(self._progress_tokens)
+        meta["progressToken"] = upstream_token
+        with self._routes_lock:
+            self._progress[upstream_token] = (session, token)
+        return dict(params, _meta=meta), upstream_token
+
+    def _forward_cancel(self, session, params):
+        """Stuurt een annulering door met het upstream id van het geannuleerde verzoek."""
+        request_id = params.get("requestId") if isinstance(params, dict) else None
+        with self._routes_lock:
+            route = session.requests.get(request_id) if session is not None else None
+        if route is None:
+            log("DEBUG", f"Annulering voor onbekend of afgerond verzoek genegeerd: {request_id}")
+            return
+        client, upstream_id = route
+        client.notify("notifications/cancelled", dict(params, requestId=upstream_id))
+
+    def _broadcast(self, message):
+        """Stuurt een bericht naar alle verbonden downstream clients."""
+        with self._sessions_lock:
+            sessions = list(self._sessions)
+        for session in sessions:
+            session.send(message)
+
+    def invalidate_cache(self):
+        """Leegt de cache met gedeelde resultaten."""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _cache_key(self, method, params):
+        if not self.cache_enabled or method not in CACHEABLE_METHODS:
+            return None
+        return method, json.dumps(params, sort_keys=True)
+
+    def handle_message(self, message, session=None):
+        """Verwerkt één downstream bericht en geeft het antwoord terug.
+
+        De handshake en 'ping' worden door de proxy zelf beantwoord; overige verzoeken
+        gaan via een upstream verbinding (met een nieuw id) naar de server.
+
+        Args:
+            message (dict): Het JSON-RPC bericht van de downstream client
+            session (_DownstreamSession, optional): De client die het bericht stuurde; nodig
+                                                    voor annuleringen en voortgang
+
+        Returns:
+            dict: De JSON-RPC response met het id van de client, of None voor notificaties
+        """
+        if isinstance(message, dict) and ("result" in message or "error" in message):
+            return None  # Antwoord op een serververzoek; die geeft de proxy niet door
+        if not isinstance(message, dict) or "method" not in message:
+            return _error(message.get("id") if isinstance(message, dict) else None,
+                          INVALID_REQUEST, "Ongeldig JSON-RPC verzoek.")
+        method = message["method"]
+        params = message.get("params")
+        if "id" not in message:
+            # De upstream handshake is al afgerond; overige notificaties gaan door
+            if method == "notifications/cancelled":
+                self._forward_cancel(session, params)
+            elif method != "notifications/initialized":
+                self._pick_upstream().notify(method, params)
+            return None
+
+        request_id = message["id"]
+        self._count("requests")
+        if method == "initialize":
+            return {"jsonrpc": "2.0", "id": request_id, "result": self.upstreams[0].server_info}
+        if method == "ping":
+            return {"jsonrpc": "2.0", "id": request_id, "result": {}}
+
+        key = self._cache_key(method, params)
+        if key is not None:
+            with self._cache_lock:
+                result = self._cache.get(key)
+            if result is not None:
+                self._count("cache_hits")
+                return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+        client = self._pick_upstream()
+        upstream_id = client.new_request_id()
+        params, progress_token = self._route_progress(session, params)
+        if session is not None:
+            with self._routes_lock:
+                session.requests[request_id] = (client, upstream_id)
+        try:
+            response = client.call(method, params, request_id=upstream_id)
+        except RequestTimeoutError as e:
+            self._count("errors")
+            return _error(request_id, INTERNAL_ERROR, f"Upstream time-out: {e}")
+        except MCPClientError as e:
+            self._count("errors")
+            return _error(request_id, INTERNAL_ERROR, f"Upstream fout: {e}")
+        finally:
+            with self._routes_lock:
+                if session is not None:
+                    session.requests.pop(request_id, None)
+                self._progress.pop(progress_token, None)
+
+        if key is not None and "result" in response:
+            with self._cache_lock:
+                self._cache[key] = response["result"]
+        # Geef het antwoord terug onder het id van de downstream client
+        response = dict(response)
+        response["id"] = request_id
+        return response
+
+    def serve_session(self, lines, write):
+        """Bedient één downstream client die JSON-regels stuurt en ontvangt.
+
+        Verzoeken worden gelijktijdig afgehandeld; antwoorden gaan terug zodra ze
+        binnen zijn, dus niet noodzakelijk in dezelfde volgorde.
+
+        Args:
+            lines: Iterable met ontvangen regels (str of bytes)
+            write (callable): Schrijft één gecodeerde regel (bytes) naar de client
+        """
+        session = _DownstreamSession(write)
+        with self._sessions_lock:
+            self._sessions.add(session)
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    log("DEBUG", f"Genegeerd (geen JSON): {line[:200]}")
+                    continue
+                self._executor.submit(self._respond, session, message)
+                if session.closed or self._stop_event.is_set():
+                    break
+        finally:
+            with self._sessions_lock:
+                self._sessions.discard(session)
+
+    def _respond(self, session, message):
+        """Handelt een verzoek af en stuurt het antwoord naar de sessie."""
+        try:
+            response = self.handle_message(message, session)
+        except Exception as e:
+            log("ERROR", f"Fout in proxy: {e}")
+            response = _error(message.get("id"), INTERNAL_ERROR, str(e)) if "id" in message else None
+        if response is not None:
+            session.send(response)
+
+
+def _error(request_id, code, text):
+    """Stelt een JSON-RPC foutantwoord samen."""
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": text}}
+
+
+def serve_stdio(proxy, stdin=None, stdout=None):
+    """Laat de proxy één downstream client bedienen via STDIN/STDOUT.
+
+    Args:
+        proxy (MCPProxy): De gestarte proxy
+        stdin: Invoerstroom (standaard sys.stdin)
+        stdout: Binaire uitvoerstroom (standaard sys.stdout.buffer)
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout.buffer
+
+    def write(data):
+        stdout.write(data)
+        stdout.flush()
+
+    proxy.serve_session(stdin, write)
+
+
+def _reserve_stdout():
+    """Reserveert STDOUT voor het protocol; al het andere (zoals logs) gaat daarna naar STDERR.
+
+    log() en print() schrijven naar STDOUT. In de STDIO-modus zouden die regels tussen de
+    JSON-RPC berichten voor de downstream client terechtkomen, dus fd 1 wijst voortaan naar
+    STDERR en het protocol gaat via een kopie van de oorspronkelijke STDOUT.
+
+    Returns:
+        file: Binaire uitvoerstroom naar de oorspronkelijke STDOUT
+    """
+    sys.stdout.flush()
+    stdout_fd = sys.stdout.fileno()
+    protocol = os.fdopen(os.dup(stdout_fd), "wb")
+    os.dup2(sys.stderr.fileno(), stdout_fd)
+    return protocol
+
+
+class _ReusableTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+def create_socket_server(proxy, address):
+    """Maakt een socketserver waarmee veel downstream clients de proxy delen.
+
+    Args:
+        proxy (MCPProxy): De gestarte proxy
+        address (str): Het socketadres ('unix:/pad' of 'tcp://host:poort')
+
+    Returns:
+        socketserver.BaseServer: De socketserver; start met serve_forever(), stop met shutdown()
+    """
+    family, target = parse_socket_address(address)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            def write(data):
+                self.wfile.write(data)
+                self.wfile.flush()
+
+            proxy.serve_session(self.rfile, write)
+
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.unlink(target)
+        socket_server = socketserver.ThreadingUnixStreamServer(target, Handler)
+    else:
+        socket_server = _ReusableTCPServer(target, Handler)
+    socket_server.daemon_threads = True
+    return socket_server
+
+
+def create_http_server(proxy, host="127.0.0.1", port=0):
+    """Maakt een Streamable HTTP-server (alleen POST met JSON-antwoorden) voor de proxy.
+
+    Args:
+        proxy (MCPProxy): De gestarte proxy
+        host (str): Het adres waarop geluisterd wordt
+        port (int): De poort (0 kiest een vrije poort)
+
+    Returns:
+        ThreadingHTTPServer: De HTTP-server; start met serve_forever(), stop met shutdown()
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            except (ValueError, json.JSONDecodeError):
+                self._reply(400, _error(None, INVALID_REQUEST, "Ongeldige JSON."))
+                return
+            if isinstance(payload, list):
+                responses = [r for r in map(proxy.handle_message, payload) if r is not None]
+                result = responses or None
+            else:
+                result = proxy.handle_message(payload)
+            if result is None:
+                self._reply(202)
+            else:
+                self._reply(200, result)
+
+        def do_DELETE(self):
+            self._reply(200)
+
+        def do_GET(self):
+            # Geen serverstream: notificaties worden alleen via sockets en STDIO doorgegeven
+            self._reply(405)
+
+        def _reply(self, status, body=None):
+            data = json.dumps(body).encode("utf-8") if body is not None else b""
+            self.send_response(status)
+            if body is not None:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            log("DEBUG", f"HTTP {self.address_string()}: {format % args}")
+
+    http_server = ThreadingHTTPServer((host, port), Handler)
+    http_server.daemon_threads = True
+    return http_server
+
+
+def connect_upstream(spec, supervise=False):
+    """Maakt een verbonden MCPClient voor de upstream server.
+
+    Args:
+        spec (str): 'unix:/pad' of 'tcp://host:poort' (socket), 'http(s)://...'
+                    (Streamable HTTP) of anders een commando voor STDIO
+        supervise (bool): Herstart een lokaal proces automatisch na een crash
+
+    Returns:
+        MCPClient: De verbonden client
+
+    Raises:
+        MCPClientError: Als de verbinding mislukt
+    """
+    client = MCPClient()
+    if spec.startswith(("unix:", "tcp://")):
+        success = client.connect_socket(spec)
+    elif spec.startswith(("http://", "https://")):
+        success = client.connect_http(spec)
+    else:
+        success = client.connect_stdio(spec, supervise=supervise)
+    if not success:
+        raise MCPClientError(f"Verbinden met upstream server mislukt: {spec}")
+    return client
+
+
+def main():
+    """Start de proxy met een pool upstream verbindingen."""
+    parser = argparse.ArgumentParser(description="MCP Proxy")
+    parser.add_argument(
+        "--upstream", type=str, default=os.getenv("MCP_LOCAL_COMMAND"),
+        help="Upstream server: command (STDIO), unix:/path, tcp://host:port or http(s) URL "
+             "(default: MCP_LOCAL_COMMAND)"
+    )
+    parser.add_argument("--pool", type=int, default=1, help="Number of upstream connections")
+    parser.add_argument("--supervise", action="store_true", help="Restart a local upstream after a crash")
+    parser.add_argument("--cache", action="store_true", help="Share list/read results between clients")
+    parser.add_argument(
+        "--listen", type=str,
+        help="Serve downstream clients on unix:/path, tcp://host:port or http://host:port "
+             "(default: a single client on STDIO)"
+    )
+    args = parser.parse_args()
+    # Zonder --listen is STDOUT het protocolkanaal voor de downstream client
+    protocol_stdout = None if args.listen else _reserve_stdout()
+    if not args.upstream:
+        log("ERROR", "Geen upstream server opgegeven (--upstream of MCP_LOCAL_COMMAND).")
+        sys.exit(1)
+
+    try:
+        upstreams = [connect_upstream(args.upstream, args.supervise) for _ in range(max(1, args.pool))]
+        proxy = MCPProxy(upstreams, cache=args.cache)
+        proxy.start()
+    except MCPClientError as e:
+        log("ERROR", str(e))
+        sys.exit(1)
+
+    try:
+        if not args.listen:
+            serve_stdio(proxy, stdout=protocol_stdout)
+            return
+        if args.listen.startswith("http://"):
+            url = urlparse(args.listen)
+            server = create_http_server(proxy, url.hostname or "127.0.0.1", url.port or 8080)
+        else:
+            server = create_socket_server(proxy, args.listen)
+        log("INFO", f"Proxy luistert op {args.listen}")
+        with server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        proxy.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+MCP Params - Al gecodeerde parameters versturen zonder ze te parsen
+
+Grote parameters (zoals een document als tool-argument) hoeven niet eerst met json.loads
+ingelezen en daarna met json.dumps weer gecodeerd te worden. RawParams bevat de parameters
+als JSON-bytes, bijvoorbeeld een bestand dat met mmap in het geheugen is gemapt; bij het
+versturen worden die bytes in stukken achter de rest van het bericht geschreven. Zo blijft
+het extra geheugengebruik ongeveer constant, ook bij honderden megabytes.
+
+De inhoud wordt niet gecontroleerd: ongeldige JSON levert een parse error van de server op.
+"""
+
+import json
+import mmap
+
+# Aantal bytes dat per keer van de parameters wordt geschreven
+CHUNK_SIZE = 1024 * 1024
+
+# Regeleinden buiten strings zijn witruimte; in geldige JSON staan ze binnen strings altijd
+# als \n. Vervangen door spaties houdt één bericht per regel bij STDIO en sockets.
+_NEWLINES = bytes.maketrans(b"\r\n", b"  ")
+
+
+class RawParams:
+    """Parameters als al gecodeerde JSON (een object of array).
+
+    Args:
+        data (bytes/bytearray/mmap): De JSON-tekst van de parameters (UTF-8)
+
+    Raises:
+        ValueError: Als de data niet met een JSON-object of -array begint
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self._mmap = None
+        # Een UTF-8 BOM aan het begin van een bestand hoort niet in het bericht
+        self._start = 3 if bytes(data[:3]) == b"\xef\xbb\xbf" else 0
+        if _first_token(data, self._start) not in (b"{", b"["):
+            raise ValueError("Parameters moeten een JSON-object of -array zijn.")
+
+    @classmethod
+    def from_file(cls, path):
+        """Mapt een JSON-bestand in het geheugen, zonder het in te lezen.
+
+        Args:
+            path (str): Het pad van het bestand
+
+        Returns:
+            RawParams: De parameters; sluit ze met close() (of gebruik 'with')
+
+        Raises:
+            OSError: Als het bestand niet kan worden geopend
+            ValueError: Als het bestand leeg is of geen JSON-object of -array bevat
+        """
+        with open(path, "rb") as f:
+            if not f.seek(0, 2):
+                raise ValueError(f"Parameterbestand {path} is leeg.")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            params = cls(mapped)
+        except ValueError:
+            mapped.close()
+            raise
+        params._mmap = mapped
+        return params
+
+    def __len__(self):
+        return len(self.data) - self._start
+
+    def __repr__(self):
+        return f"RawParams({len(self)} bytes)"
+
+    def chunks(self, single_line=False):
+        """Levert de JSON-tekst in stukken van CHUNK_SIZE bytes.
+
+        Args:
+            single_line (bool, optional): Vervang regeleinden door spaties (voor berichten per regel)
+        """
+        # Verstuurde pagina's van een gemapt bestand direct vrijgeven, zodat ook het
+        # geheugengebruik van het proces (RSS) niet met de bestandsgrootte meegroeit
+        release = self._mmap is not None and hasattr(mmap, "MADV_DONTNEED")
+        for start in range(self._start, len(self.data), CHUNK_SIZE):
+            chunk = bytes(self.data[start:start + CHUNK_SIZE])
+            yield chunk.translate(_NEWLINES) if single_line else chunk
+            if release and self._mmap is not None:
+                aligned = start - start % mmap.PAGESIZE
+                self._mmap.madvise(mmap.MADV_DONTNEED, aligned, start + len(chunk) - aligned)
+
+    def decode(self):
+        """Parset de parameters (voor in-process servers; kost wel geheugen)."""
+        return json.loads(bytes(self.data[self._start:]))
+
+    def close(self):
+        """Sluit een gemapt bestand."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _first_token(data, start=0):
+    """Geeft het eerste teken na witruimte, zonder alles te lezen."""
+    position = start
+    while position < len(data):
+        head = bytes(data[position:position + CHUNK_SIZE]).lstrip(b" \t\r\n")
+        if head:
+            return head[:1]
+        position += CHUNK_SIZE
+    return b""
+
+
+def has_raw_params(message):
+    """Geeft True terug als een bericht RawParams bevat."""
+    return isinstance(message, dict) and isinstance(message.get("params"), RawParams)
+
+
+def message_chunks(message, single_line=False):
+    """Codeert een bericht met RawParams in stukken, zonder de parameters te kopiëren.
+
+    Args:
+        message (dict): Het JSON-RPC bericht met RawParams als params
+        single_line (bool, optional): Eén regel zonder regeleinden (zie RawParams.chunks)
+
+    Returns:
+        list: De stukken (bytes); de parameters als iterator van stukken ertussen
+    """
+    envelope = {key: value for key, value in message.items() if key != "params"}
+    prefix = (json.dumps(envelope)[:-1] + ", " if envelope else "{") + '"params": '
+    return [prefix.encode("utf-8"), message["params"].chunks(single_line), b"}"]
+
+
+def iter_message(message, single_line=False):
+    """Levert alle bytes van een bericht met RawParams, stuk voor stuk (zie message_chunks)."""
+    prefix, params, suffix = message_chunks(message, single_line)
+    yield prefix
+    yield from params
+    yield suffix
+
+
+class MessageBody:
+    """Body voor een HTTP POST met RawParams: bekende lengte, gestreamd verstuurd.
+
+    Omdat de lengte vooraf bekend is, stuurt requests een Content-Length header en schrijft
+    het de stukken één voor één naar de socket.
+    """
+
+    def __init__(self, message):
+        self.message = message
+        prefix, _, suffix = message_chunks(message)
+        self._length = len(prefix) + len(message["params"]) + len(suffix)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return iter_message(self.message)
@@ -0,0 +1,82 @@
+"""
+MCP Profiling - Tijdsverdeling per fase van verbinden, handshake en verzoeken
+
+Deze module bevat een lichte profiler die de duur van benoemde fasen verzamelt
+(bijvoorbeeld 'connect', 'initialize' of 'tools/call: wait') en als tabel kan tonen.
+Optioneel draait cProfile mee en wordt een pstats-bestand weggeschreven.
+"""
+
+import cProfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Profiler:
+    """Verzamelt per fase het aantal metingen, de totale en de maximale duur."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._phases = {}  # naam -> [aantal, totaal, maximum]
+        self._cprofile = None
+
+    @contextmanager
+    def phase(self, name):
+        """Meet de duur van een codeblok als fase `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, duration):
+        """Voegt een meting van `duration` seconden toe aan fase `name`."""
+        with self._lock:
+            stats = self._phases.get(name)
+            if stats is None:
+                self._phases[name] = [1, duration, duration]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = max(stats[2], duration)
+
+    def summary(self):
+        """Geeft de metingen per fase terug, in de volgorde waarin de fasen voor het eerst voorkwamen.
+
+        Returns:
+            dict: Per fase count, total, mean en max (in seconden)
+        """
+        with self._lock:
+            return {
+                name: {"count": count, "total": total, "mean": total / count, "max": maximum}
+                for name, (count, total, maximum) in self._phases.items()
+            }
+
+    def format_summary(self):
+        """Geeft de metingen terug als leesbare tabel (tijden in milliseconden)."""
+        summary = self.summary()
+        width = max([len(name) for name in summary] + [4])
+        lines = [f"{'Fase':<{width}}  {'aantal':>6}  {'totaal ms':>10}  {'gem. ms':>9}  {'max ms':>9}"]
+        for name, stats in summary.items():
+            lines.append(
+                f"{name:<{width}}  {stats['count']:>6}  {stats['total'] * 1000:>10.2f}  "
+                f"{stats['mean'] * 1000:>9.2f}  {stats['max'] * 1000:>9.2f}"
+            )
+        return "\n".join(lines)
+
+    def start_cprofile(self):
+        """Start cProfile voor de huidige thread."""
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def stop_cprofile(self, path):
+        """Stopt cProfile en schrijft de statistieken als pstats-bestand.
+
+        Args:
+            path (str): Het pad van het pstats-bestand (te bekijken met python -m pstats)
+        """
+        if self._cprofile is None:
+            return
+        self._cprofile.disable()
+        self._cprofile.dump_stats(path)
+        self._cprofile = None
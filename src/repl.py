@@ -0,0 +1,343 @@
+"""
+MCP REPL - Niet-blokkerende interactieve modus voor de CLI
+
+Elk commando krijgt een handle (#1, #2, ...) en loopt op de achtergrond, zodat er direct een
+volgend commando kan worden ingetypt terwijl een trage tool nog bezig is. Antwoorden en
+notificaties (zoals voortgangsmeldingen) worden getoond zodra ze binnenkomen. Met readline
+(niet op elk platform beschikbaar) worden methoden en toolnamen met Tab aangevuld; de
+toolnamen komen uit een lokaal bewaarde tools/list.
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.formatting import write_pretty, write_response
+from src.mcp_client import log, MCPClientError
+
+try:
+    import readline
+except ImportError:  # Bijvoorbeeld Windows zonder pyreadline
+    readline = None
+
+PROMPT = "> "
+
+# Standaard MCP-methoden voor het aanvullen met Tab
+KNOWN_METHODS = (
+    "initialize",
+    "ping",
+    "tools/list",
+    "tools/call",
+    "resources/list",
+    "resources/read",
+    "resources/templates/list",
+    "prompts/list",
+    "prompts/get",
+)
+
+COMMANDS = ("exit", "quit", "help", "clear", "jobs", "wait")
+
+HELP_TEXT = """
+Beschikbare commando's:
+  exit, quit, q   - Sluit de MCP CLI af (wacht niet op lopende verzoeken)
+  help, h, ?      - Toon deze hulp
+  clear, cls      - Maak het scherm leeg
+  jobs            - Toon de lopende verzoeken
+  wait [n]        - Wacht op verzoek #n, of op alle lopende verzoeken
+
+JSON-RPC-verzoeken (lopen op de achtergrond, het antwoord verschijnt met het handle):
+  methodNaam [params als JSON]
+  Bijvoorbeeld: tools/call {"name": "echo", "arguments": {"message": "hoi"}}
+  Begin met 'initialize' (de handshake, inclusief notifications/initialized).
+  Tab vult methoden aan, en na de handshake ook toolnamen.
+"""
+
+
+class InteractiveSession:
+    """Interactieve sessie waarin verzoeken op de achtergrond lopen.
+
+    Args:
+        client (MCPClient): De verbonden client
+        raw (bool, optional): Toon antwoorden ongewijzigd (passthrough-modus)
+        max_workers (int, optional): Maximaal aantal verzoeken tegelijk
+        output (file, optional): Waar antwoorden heen gaan (standaard STDOUT)
+        output_format (str, optional): Uitvoerformaat van antwoorden, zoals bij --format
+        path (str, optional): jq-achtig pad; alleen de geselecteerde waarden worden getoond
+    """
+
+    def __init__(self, client, raw=False, max_workers=8, output=None, output_format="pretty", path=None):
+        self.client = client
+        self.raw = raw
+        self.output_format = output_format
+        self.path = path
+        self.output = output or sys.stdout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp-repl")
+        self._print_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._jobs = {}  # handle -> (methode, future)
+        self._next_handle = 1
+        self._tool_names = []  # Toolnamen uit de laatst opgehaalde tools/list
+
+    # Uitvoer
+
+    def _print(self, text):
+        """Toont tekst zonder de regel te verstoren die de gebruiker aan het typen is."""
+        with self._print_lock:
+            interactive = readline is not None and self.output is sys.stdout and sys.stdout.isatty()
+            if interactive:
+                # Wis de promptregel, toon de tekst en zet prompt plus invoer terug
+                self.output.write("\r\033[K" + text + "\n" + PROMPT + readline.get_line_buffer())
+            else:
+                self.output.write(text + "\n")
+            self.output.flush()
+
+    def _format(self, response):
+        """Zet een antwoord om naar tekst, met dezelfde formatter als de niet-interactieve modus.
+
+        In de passthrough-modus blijft het antwoord ongewijzigd.
+        """
+        if isinstance(response, bytes):
+            return response.decode("utf-8", "replace")
+        if isinstance(response, str):
+            return response
+        buffer = io.StringIO()
+        error_only = self.output_format == "result" and self.path is None
+        if error_only and isinstance(response, dict) and "error" in response:
+            # write_response schrijft de fout dan naar STDERR; hier hoort hij bij het handle
+            write_pretty(response["error"], buffer)
+        else:
+            try:
+                write_response(response, self.output_format, self.path, stream=buffer)
+            except ValueError as e:
+                return f"Kan uitvoer niet formatteren: {e}"
+        return buffer.getvalue().rstrip("\n")
+
+    # Verzoeken
+
+    def submit(self, method, params=None):
+        """Verstuurt een verzoek op de achtergrond.
+
+        Bij een dict met parameters wordt het handle als progressToken meegestuurd, zodat
+        voortgangsmeldingen van de server bij het juiste verzoek worden getoond.
+
+        Args:
+            method (str): De JSON-RPC methode
+            params (dict/list, optional): De parameters
+
+        Returns:
+            int: Het handle van het verzoek
+        """
+        handle = self._next_handle
+        self._next_handle += 1
+        if isinstance(params, dict) and method == "tools/call":
+            meta = dict(params.get("_meta") or {})
+            meta.setdefault("progressToken", handle)
+            params = dict(params, _meta=meta)
+        self._print(f"[#{handle}] {method} verstuurd")
+        future = self._executor.submit(self._run, handle, method, params)
+        self._jobs[handle] = (method, future)
+        return handle
+
+    def _run(self, handle, method, params):
+        """Voert een verzoek uit en toont het antwoord met het handle."""
+        try:
+            if method == "initialize":
+                response = self._initialize(params)
+            elif self.raw:
+                response = self.client.call_raw(method, params)
+            else:
+                response = self.client.call(method, params)
+        except MCPClientError as e:
+            log("ERROR", f"Fout bij uitvoeren {method}: {e}")
+            response = {"error": str(e)}
+        first_page = not (isinstance(params, dict) and params.get("cursor"))
+        if method == "tools/list" and isinstance(response, dict) and first_page:
+            self._remember_tools(response)
+        self._print(f"[#{handle}] {method}:\n{self._format(response)}")
+        if method == "initialize" and isinstance(response, dict) and "result" in response:
+            # Pas na de handshake mag tools/list; haal de toolnamen op voor het aanvullen
+            self._refresh_tools()
+        return response
+
+    def _initialize(self, params):
+        """Voert de handshake uit via de client, zodat ook notifications/initialized wordt verstuurd."""
+        params = params if isinstance(params, dict) else {}
+        return self.client.initialize(
+            capabilities=params.get("capabilities"),
+            client_info=params.get("clientInfo"),
+            protocol_version=params.get("protocolVersion"),
+        )
+
+    def wait(self, handle=None, timeout=None):
+        """Wacht op één verzoek of op alle lopende verzoeken."""
+        jobs = [self._jobs[handle]] if handle is not None else list(self._jobs.values())
+        for _, future in jobs:
+            future.exception(timeout)  # Wacht zonder de exception op te werpen
+
+    def running(self):
+        """Geeft de handles en methoden van de verzoeken die nog lopen."""
+        return [(handle, method) for handle, (method, future) in self._jobs.items() if not future.done()]
+
+    # Notificaties
+
+    def _notification_loop(self):
+        """Toont notificaties van de server zodra ze binnenkomen."""
+        while not self._stop_event.is_set():
+            message = self.client.next_notification(timeout=0.2)
+            if message is None:
+                continue
+            if isinstance(message, dict) and message.get("method") == "notifications/tools/list_changed":
+                self._executor.submit(self._refresh_tools)
+            self._print(self._format_notification(message))
+
+    def _format_notification(self, message):
+        """Zet een notificatie om naar één leesbare regel."""
+        if not isinstance(message, dict):
+            return f"[notificatie] {message}"
+        method = message.get("method")
+        params = message.get("params") or {}
+        if method == "notifications/progress" and isinstance(params, dict):
+            total = params.get("total")
+            progress = params.get("progress")
+            text = f"{progress}/{total}" if total is not None else f"{progress}"
+            if params.get("message"):
+                text += f" {params['message']}"
+            return f"[#{params.get('progressToken')}] voortgang: {text}"
+        if method is None:
+            return f"[bericht] {json.dumps(message)}"
+        return f"[notificatie] {method} {json.dumps(params) if params else ''}".rstrip()
+
+    # Aanvullen met Tab
+
+    def complete(self, text, state):
+        """Readline-completer voor methoden, commando's en toolnamen."""
+        buffer = readline.get_line_buffer() if readline is not None else text
+        options = self.completions(buffer, text)
+        return options[state] if state < len(options) else None
+
+    def completions(self, buffer, text):
+        """Geeft de aanvullingen voor het woord `text` in de invoerregel `buffer`.
+
+        Args:
+            buffer (str): De hele invoerregel tot nu toe
+            text (str): Het woord dat wordt aangevuld
+
+        Returns:
+            list: De mogelijke aanvullingen
+        """
+        if " " not in buffer.lstrip():
+            candidates = list(KNOWN_METHODS) + list(COMMANDS)
+            return sorted(option for option in set(candidates) if option.startswith(text))
+        method = buffer.split(" ", 1)[0]
+        if method != "tools/call":
+            return []
+        # Tool-aanroep: vul de naam aan tot een begin van de parameters
+        arguments = buffer.split(" ", 1)[1].lstrip()
+        if text.startswith('"'):
+            # Binnen de JSON: alleen de toolnaam zelf aanvullen
+            return [f'"{name}"' for name in self._tool_names if name.startswith(text[1:])]
+        if arguments != text:
+            return []
+        return [f'{{"name": "{name}", "arguments": {{' for name in self._tool_names if name.startswith(text)]
+
+    def _setup_readline(self):
+        """Activeert Tab-aanvulling als readline beschikbaar is."""
+        if readline is None:
+            return
+        readline.set_completer(self.complete)
+        readline.set_completer_delims(" ")
+        readline.parse_and_bind("tab: complete")
+
+    def _remember_tools(self, response):
+        """Bewaart de toolnamen uit een tools/list-antwoord voor het aanvullen."""
+        result = response.get("result")
+        tools = result.get("tools") if isinstance(result, dict) else None
+        if not isinstance(tools, list):
+            return
+        self._tool_names = sorted(tool["name"] for tool in tools if isinstance(tool, dict) and "name" in tool)
+
+    def _refresh_tools(self):
+        """Haalt alle pagina's van tools/list op voor het aanvullen (fouten worden genegeerd)."""
+        try:
+            tools = list(self.client.iter_paginated("tools/list"))
+        except MCPClientError as e:
+            log("INFO", f"Toolnamen voor aanvullen niet opgehaald (tools/list): {e}")
+            return
+        self._tool_names = sorted(tool["name"] for tool in tools if isinstance(tool, dict) and "name" in tool)
+
+    # Invoerlus
+
+    def handle_line(self, line):
+        """Verwerkt één ingevoerde regel.
+
+        Returns:
+            bool: False als de sessie moet stoppen
+        """
+        cmd = line.strip()
+        lowered = cmd.lower()
+        if lowered in ("exit", "quit", "q"):
+            return False
+        if lowered in ("help", "h", "?"):
+            self._print(HELP_TEXT)
+        elif lowered in ("clear", "cls"):
+            os.system('cls' if os.name == 'nt' else 'clear')
+        elif lowered == "jobs":
+            running = self.running()
+            self._print("\n".join(f"[#{handle}] {method}" for handle, method in running) or "Geen lopende verzoeken.")
+        elif lowered == "wait" or lowered.startswith("wait "):
+            argument = cmd[4:].strip().lstrip("#")
+            if argument and not (argument.isdigit() and int(argument) in self._jobs):
+                self._print(f"Onbekend verzoek: {argument}")
+            else:
+                self.wait(int(argument) if argument else None)
+        elif cmd:
+            # Parse command: method [params as JSON]
+            parts = cmd.split(" ", 1)
+            method = parts[0]
+            params = None
+            if len(parts) > 1:
+                try:
+                    params = json.loads(parts[1])
+                except json.JSONDecodeError as e:
+                    log("ERROR", f"Ongeldige JSON in params: {parts[1]}")
+                    self._print(f"Fout bij parsen van JSON: {e}\n"
+                                "Voorbeeld van geldige JSON: '{\"key\": \"value\"}' of '[1, 2, 3]'")
+                    return True
+            self.submit(method, params)
+        return True
+
+    def run(self, input_func=input):
+        """Start de sessie en leest commando's totdat de gebruiker stopt.
+
+        Args:
+            input_func (callable, optional): Leest één regel invoer (standaard input)
+        """
+        self._setup_readline()
+        threading.Thread(target=self._notification_loop, daemon=True).start()
+        if self.client.server_info is not None:
+            # Al geïnitialiseerd (bijvoorbeeld een hervatte sessie)
+            self._executor.submit(self._refresh_tools)
+        self._print("MCP CLI Interactive Mode. Type 'help' voor commando's of 'exit' om af te sluiten.")
+        try:
+            while True:
+                try:
+                    line = input_func(PROMPT)
+                except KeyboardInterrupt:
+                    self._print("\nProgramma onderbroken met Ctrl+C")
+                    break
+                except (EOFError, OSError):
+                    # Bij gesloten invoer: wacht nog op lopende verzoeken
+                    self.wait()
+                    self._print("\nEinde van input (EOF)")
+                    break
+                try:
+                    if not self.handle_line(line):
+                        break
+                except Exception as e:
+                    log("ERROR", f"Onverwachte fout: {e}")
+        finally:
+            self._stop_event.set()
+            self._executor.shutdown(wait=False)
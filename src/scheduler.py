@@ -0,0 +1,200 @@
+"""
+MCP Scheduler - Rate limiting en prioriteitsbanen voor verzoeken
+
+Deze module bevat een scheduler die vóór de transports van MCPClient staat. Elk verzoek
+wacht op een token uit een token bucket (per server en optioneel per methode) en op een
+plek binnen het maximum aantal gelijktijdige verzoeken. Interactieve verzoeken gaan
+daarbij altijd voor bulkverzoeken. Een 429-antwoord met Retry-After pauzeert de bucket.
+"""
+
+import threading
+import time
+from collections import deque
+
+from src.mcp_client import RequestTimeoutError
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+
+class TokenBucket:
+    """Een token bucket: gemiddeld `rate` verzoeken per seconde, met pieken tot `burst`.
+
+    Args:
+        rate (float): Aantal tokens dat per seconde wordt aangevuld (None = onbeperkt,
+                      alleen pauzes na een 429 gelden dan)
+        burst (float, optional): Maximaal aantal opgespaarde tokens (standaard max(1, rate))
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate) if rate else None
+        self.burst = float(burst if burst is not None else max(1.0, self.rate or 1.0))
+        self.tokens = self.burst
+        self.paused_until = 0.0
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        """Vult de bucket aan op basis van de verstreken tijd."""
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rate is None:
+            self.tokens = self.burst
+        else:
+            self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+
+    def delay(self, now=None):
+        """Geeft het aantal seconden terug tot er een token beschikbaar is (0 = direct)."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate is None or self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        """Neemt één token uit de bucket (na een delay() van 0)."""
+        self.tokens -= 1
+
+    def pause(self, seconds):
+        """Pauzeert de bucket, bijvoorbeeld na een 429 met Retry-After."""
+        now = time.monotonic()
+        self._refill(now)
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class RequestScheduler:
+    """Bepaalt wanneer een verzoek verstuurd mag worden.
+
+    Args:
+        rate (float, optional): Maximaal aantal verzoeken per seconde naar de server
+        burst (float, optional): Maximale piek boven het gemiddelde
+        method_rates (dict, optional): Limiet per methode, bijvoorbeeld {"tools/call": 5}
+        max_in_flight (int, optional): Maximaal aantal gelijktijdig openstaande verzoeken
+    """
+
+    def __init__(self, rate=None, burst=None, method_rates=None, max_in_flight=8):
+        self.max_in_flight = max_in_flight
+        # Zonder rate is er geen limiet, maar wel een bucket om 429-pauzes in te verwerken
+        self._bucket = TokenBucket(rate, burst)
+        self._method_buckets = {
+            method: TokenBucket(method_rate) for method, method_rate in (method_rates or {}).items()
+        }
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._waiting = {lane: deque() for lane in LANES}
+        self._metrics = {lane: {"requests": 0, "wait_total": 0.0, "wait_max": 0.0} for lane in LANES}
+        self.rate_limited = 0
+
+    def _is_next(self, ticket, lane):
+        """Een verzoek is aan de beurt als het vooraan zijn baan staat en geen hogere baan wacht."""
+        for other in LANES:
+            if other == lane:
+                return self._waiting[lane][0] is ticket
+            if self._waiting[other]:
+                return False
+        return False
+
+    def _token_delay(self, method):
+        """Wachttijd tot zowel de serverbucket als de methodebucket een token hebben."""
+        now = time.monotonic()
+        delay = self._bucket.delay(now)
+        method_bucket = self._method_buckets.get(method)
+        if method_bucket is not None:
+            delay = max(delay, method_bucket.delay(now))
+        return delay
+
+    def acquire(self, method, lane=INTERACTIVE, timeout=None):
+        """Wacht tot het verzoek verstuurd mag worden.
+
+        Na afloop moet release() worden aangeroepen.
+
+        Args:
+            method (str): De JSON-RPC methode van het verzoek
+            lane (str): De prioriteitsbaan ("interactive" of "bulk")
+            timeout (float, optional): Maximale wachttijd in seconden
+
+        Raises:
+            ValueError: Bij een onbekende prioriteitsbaan
+            RequestTimeoutError: Als het verzoek niet binnen de time-out aan de beurt is
+        """
+        if lane not in self._waiting:
+            raise ValueError(f"Onbekende prioriteitsbaan: {lane}")
+        ticket = object()
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        with self._condition:
+            self._waiting[lane].append(ticket)
+            try:
+                while True:
+                    wait = None
+                    if self._is_next(ticket, lane) and self._in_flight < self.max_in_flight:
+                        wait = self._token_delay(method)
+                        if wait <= 0:
+                            break
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise RequestTimeoutError("Time-out in de wachtrij van de scheduler.")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._condition.wait(wait)
+            except BaseException:
+                self._waiting[lane].remove(ticket)
+                self._condition.notify_all()
+                raise
+
+            self._waiting[lane].popleft()
+            self._bucket.consume()
+            method_bucket = self._method_buckets.get(method)
+            if method_bucket is not None:
+                method_bucket.consume()
+            self._in_flight += 1
+            waited = time.monotonic() - started
+            metrics = self._metrics[lane]
+            metrics["requests"] += 1
+            metrics["wait_total"] += waited
+            metrics["wait_max"] = max(metrics["wait_max"], waited)
+            self._condition.notify_all()
+
+    def release(self):
+        """Geeft de plek van een afgerond verzoek vrij."""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def penalize(self, retry_after, method=None):
+        """Verwerkt een 429-antwoord: pauzeer de bucket voor de opgegeven tijd.
+
+        Args:
+            retry_after (float): Aantal seconden uit de Retry-After header
+            method (str, optional): Pauzeer alleen de bucket van deze methode, als die bestaat
+        """
+        with self._condition:
+            self.rate_limited += 1
+            bucket = self._method_buckets.get(method, self._bucket)
+            bucket.pause(retry_after)
+            self._condition.notify_all()
+
+    def stats(self):
+        """Geeft de wachttijdstatistieken per prioriteitsbaan terug.
+
+        Returns:
+            dict: Per baan het aantal verzoeken, de gemiddelde en maximale wachttijd in
+                  seconden en het aantal wachtende verzoeken, plus in_flight en rate_limited
+        """
+        with self._condition:
+            stats = {}
+            for lane in LANES:
+                metrics = self._metrics[lane]
+                requests = metrics["requests"]
+                stats[lane] = {
+                    "requests": requests,
+                    "queued": len(self._waiting[lane]),
+                    "wait_avg": metrics["wait_total"] / requests if requests else 0.0,
+                    "wait_max": metrics["wait_max"],
+                }
+            stats["in_flight"] = self._in_flight
+            stats["rate_limited"] = self.rate_limited
+            return stats
@@ -0,0 +1,107 @@
+"""
+MCP Supervisor - Automatisch herstarten van lokale MCP-servers
+
+Deze module bewaakt een lokaal MCP-serverproces dat via STDIO is verbonden. Stopt het
+proces onverwacht, dan wordt het met exponentiële backoff opnieuw gestart, wordt de
+MCP initialize-handshake herhaald en worden openstaande idempotente verzoeken opnieuw
+verstuurd. Een circuit breaker stopt het herstarten zodra het proces in een crash-loop zit.
+"""
+
+import threading
+import time
+from collections import deque
+
+from src.mcp_client import log, MCPClientError
+
+
+class RestartPolicy:
+    """Backoff- en circuit breaker-instellingen voor het herstarten van een proces.
+
+    Args:
+        initial_delay (float): Wachttijd voor de eerste herstart in seconden
+        max_delay (float): Maximale wachttijd tussen herstarts in seconden
+        max_restarts (int): Maximaal aantal herstarts binnen het tijdvenster
+        window (float): Lengte van het tijdvenster in seconden
+    """
+
+    def __init__(self, initial_delay=0.5, max_delay=30.0, max_restarts=5, window=60.0):
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.max_restarts = max_restarts
+        self.window = window
+        self._restarts = deque()
+
+    def _prune(self):
+        """Vergeet herstarts die buiten het tijdvenster vallen."""
+        now = time.monotonic()
+        while self._restarts and now - self._restarts[0] > self.window:
+            self._restarts.popleft()
+
+    def allow_restart(self):
+        """Geeft False terug als de circuit breaker open staat (te veel recente herstarts)."""
+        self._prune()
+        return len(self._restarts) < self.max_restarts
+
+    def next_delay(self):
+        """Berekent de wachttijd voor de volgende herstart (exponentiële backoff)."""
+        self._prune()
+        return min(self.initial_delay * (2 ** len(self._restarts)), self.max_delay)
+
+    def record_restart(self):
+        """Registreert een herstartpoging."""
+        self._restarts.append(time.monotonic())
+
+
+class StdioSupervisor:
+    """Herstart het lokale MCP-serverproces van een MCPClient na een crash.
+
+    Args:
+        client (MCPClient): De client waarvan het STDIO-proces wordt bewaakt
+        command (str): Het commando waarmee het proces wordt gestart
+        policy (RestartPolicy, optional): Backoff- en circuit breaker-instellingen
+    """
+
+    def __init__(self, client, command, policy=None):
+        self.client = client
+        self.command = command
+        self.policy = policy or RestartPolicy()
+        self.restart_count = 0
+        self._restarting = threading.Lock()
+
+    def handle_crash(self, reason):
+        """Start een herstart op de achtergrond, tenzij er al een bezig is.
+
+        Args:
+            reason (str): Omschrijving van de reden waarom het proces stopte
+        """
+        if not self._restarting.acquire(blocking=False):
+            return
+        threading.Thread(target=self._restart_loop, args=(reason,), daemon=True).start()
+
+    def _restart_loop(self, reason):
+        """Probeert het proces te herstarten totdat het lukt of de circuit breaker opent."""
+        stop_event = self.client._stop_event
+        try:
+            while not stop_event.is_set():
+                if not self.policy.allow_restart():
+                    self.client._connection_failed_permanently(
+                        f"Lokaal proces is {self.policy.max_restarts} keer herstart binnen "
+                        f"{self.policy.window:.0f} seconden; herstarten is gestopt. Laatste fout: {reason}"
+                    )
+                    return
+                delay = self.policy.next_delay()
+                self.policy.record_restart()
+                log("INFO", f"Herstart lokaal MCP proces over {delay:.1f} seconden.")
+                if stop_event.wait(delay):
+                    return
+                try:
+                    self.client._restart_stdio(self.command)
+                except MCPClientError as e:
+                    reason = str(e)
+                    log("ERROR", f"Herstart mislukt: {e}")
+                    continue
+                self.restart_count += 1
+                log("INFO", "Lokaal MCP proces is herstart.")
+                return
+        finally:
+            self._restarting.release()
@@ -0,0 +1,267 @@
+"""
+MCP Traffic - Verkeer opnemen en afspelen voor reproduceerbare belastingstests
+
+Met een TrafficRecorder legt de client elk verstuurd en ontvangen bericht vast, met de tijd
+sinds het begin van de opname. Het opnamebestand bevat één compacte JSON-regel per bericht
+en wordt alleen aangevuld, zodat meerdere opnames achter elkaar in hetzelfde bestand passen:
+
+    {"capture":1,"started":1760000000.0}
+    [0.000412,">",{"jsonrpc":"2.0","id":1,"method":"initialize","params":{...}}]
+    [0.003150,"<",{"jsonrpc":"2.0","id":1,"result":{...}}]
+
+Een ongedecodeerd ontvangen bericht (passthrough-modus) staat als JSON-tekst in de regel.
+Met replay worden de verstuurde verzoeken van een opname opnieuw naar een server gestuurd,
+op de oorspronkelijke snelheid, N keer zo snel of zo snel mogelijk, waarna de latencies
+met de opname worden vergeleken.
+"""
+
+import codecs
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.mcp_client import MCPClientError, ConfigurationError
+from src.params import has_raw_params, iter_message
+
+CAPTURE_VERSION = 1
+
+OUT = ">"
+IN = "<"
+
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+class TrafficRecorder:
+    """Schrijft verstuurde en ontvangen berichten met relatieve tijden naar een bestand.
+
+    Args:
+        path (str): Het opnamebestand (wordt aangevuld als het al bestaat)
+
+    Raises:
+        ConfigurationError: Als het bestand niet kan worden geopend
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self._file = open(path, "a", encoding="utf-8")
+        except OSError as e:
+            raise ConfigurationError(f"Kan opnamebestand {path} niet openen: {e}")
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._file.write(_encoder.encode({"capture": CAPTURE_VERSION, "started": time.time()}) + "\n")
+
+    def record(self, direction, message):
+        """Legt één bericht vast.
+
+        Args:
+            direction (str): OUT (verstuurd) of IN (ontvangen)
+            message (dict/str/bytes): Het bericht, of de ongedecodeerde JSON-tekst. RawParams
+                                      worden ongeparst in stukken weggeschreven.
+        """
+        if isinstance(message, bytes):
+            message = message.decode("utf-8", "replace")
+        elapsed = round(time.perf_counter() - self._started, 6)
+        if has_raw_params(message):
+            self._record_raw_params(elapsed, direction, message)
+            return
+        line = _encoder.encode([elapsed, direction, message]) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+
+    def _record_raw_params(self, elapsed, direction, message):
+        """Schrijft een bericht met RawParams in stukken weg, zonder de parameters te parsen."""
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(_encoder.encode([elapsed, direction])[:-1] + ",")
+            for chunk in iter_message(message, single_line=True):
+                self._file.write(decoder.decode(chunk))
+            self._file.write(decoder.decode(b"", final=True) + "]\n")
+
+    def close(self):
+        """Schrijft de buffer weg en sluit het bestand."""
+        with self._lock:
+            self._file.close()
+
+
+def load_capture(path):
+    """Leest een opnamebestand.
+
+    Args:
+        path (str): Het opnamebestand
+
+    Returns:
+        list: Per opname een lijst van (tijd, richting, bericht), met bericht als dict
+
+    Raises:
+        ConfigurationError: Als het bestand niet leesbaar is of geen geldige opname bevat
+    """
+    sessions = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if isinstance(entry, dict) and "capture" in entry:
+                    sessions.append([])
+                    continue
+                if not sessions:
+                    raise ValueError(f"regel {number} staat vóór de eerste opname")
+                elapsed, direction, message = entry
+                if isinstance(message, str):
+                    message = json.loads(message)  # Ongedecodeerd vastgelegd bericht
+                sessions[-1].append((elapsed, direction, message))
+    except (OSError, ValueError, TypeError) as e:
+        raise ConfigurationError(f"Kan opname {path} niet lezen: {e}")
+    return sessions
+
+
+def recorded_latencies(session):
+    """Bepaalt per verstuurd verzoek de latency in de opname.
+
+    Args:
+        session (list): Eén opname uit load_capture
+
+    Returns:
+        dict: Per request-id de latency in seconden (alleen verzoeken met een antwoord)
+    """
+    sent = {}
+    latencies = {}
+    for elapsed, direction, message in session:
+        for item in (message if isinstance(message, list) else [message]):
+            if not isinstance(item, dict) or "id" not in item:
+                continue
+            if direction == OUT and "method" in item:
+                sent[item["id"]] = elapsed
+            elif direction == IN and "method" not in item and item["id"] in sent:
+                latencies[item["id"]] = elapsed - sent.pop(item["id"])
+    return latencies
+
+
+def replay(client, sessions, speed=1.0, concurrency=32, timeout=None):
+    """Speelt de verstuurde berichten van een opname opnieuw af via een verbonden client.
+
+    Verzoeken worden verstuurd op hun opgenomen tijd gedeeld door `speed`, zonder op
+    eerdere antwoorden te wachten, zodat ook overlappende verzoeken overlappen. Met speed
+    0 of None gaat alles zo snel mogelijk; alleen op 'initialize' wordt dan gewacht, zodat
+    de server de handshake heeft gezien voordat de rest binnenkomt. Antwoorden van de
+    client op verzoeken van de server worden niet afgespeeld.
+
+    Args:
+        client (MCPClient): De verbonden client
+        sessions (list): De opnames uit load_capture (na elkaar afgespeeld)
+        speed (float, optional): Afspeelsnelheid (1 = zoals opgenomen)
+        concurrency (int, optional): Maximaal aantal verzoeken tegelijk
+        timeout (float, optional): Maximale wachttijd per verzoek in seconden
+
+    Returns:
+        list: Per verzoek een dict met method, recorded en replayed (latency in seconden,
+              recorded is None zonder antwoord in de opname) en error (of None)
+    """
+    results = []
+    lock = threading.Lock()
+
+    def call(message, recorded):
+        started = time.perf_counter()
+        error = None
+        try:
+            response = client.call(message["method"], message.get("params"), timeout=timeout)
+            if isinstance(response, dict) and "error" in response:
+                error = str(response["error"])
+        except MCPClientError as e:
+            error = str(e)
+        result = {"method": message["method"], "recorded": recorded,
+                  "replayed": time.perf_counter() - started, "error": error}
+        with lock:
+            results.append(result)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="mcp-replay")
+    try:
+        for session in sessions:
+            latencies = recorded_latencies(session)
+            started = time.perf_counter()
+            for elapsed, direction, message in session:
+                if direction != OUT:
+                    continue
+                for item in (message if isinstance(message, list) else [message]):
+                    if not isinstance(item, dict) or "method" not in item:
+                        continue
+                    if speed:
+                        delay = started + elapsed / speed - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                    if "id" not in item:
+                        try:
+                            client.notify(item["method"], item.get("params"))
+                        except MCPClientError as e:
+                            results.append({"method": item["method"], "recorded": None,
+                                            "replayed": 0.0, "error": str(e)})
+                        continue
+                    future = executor.submit(call, item, latencies.get(item["id"]))
+                    if not speed and item["method"] == "initialize":
+                        future.result()
+    finally:
+        executor.shutdown(wait=True)
+    return results
+
+
+def _percentile(values, fraction):
+    """Geeft het percentiel (nearest rank) van een gesorteerde lijst."""
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def summarize(results):
+    """Vat de afspeelresultaten per methode samen.
+
+    Returns:
+        dict: Per methode count, errors en de p50/p95 van recorded en replayed (in seconden)
+    """
+    grouped = {}
+    for result in results:
+        grouped.setdefault(result["method"], []).append(result)
+    summary = {}
+    for method, items in grouped.items():
+        recorded = sorted(item["recorded"] for item in items if item["recorded"] is not None)
+        replayed = sorted(item["replayed"] for item in items if item["error"] is None)
+        summary[method] = {
+            "count": len(items),
+            "errors": sum(1 for item in items if item["error"] is not None),
+            "recorded_p50": _percentile(recorded, 0.5),
+            "recorded_p95": _percentile(recorded, 0.95),
+            "replayed_p50": _percentile(replayed, 0.5),
+            "replayed_p95": _percentile(replayed, 0.95),
+        }
+    return summary
+
+
+def format_report(summary):
+    """Geeft de samenvatting terug als leesbare tabel (tijden in milliseconden)."""
+    def ms(value):
+        return f"{value * 1000:.2f}" if value is not None else "-"
+
+    def delta(before, after):
+        if before is None or after is None:
+            return "-"
+        return f"{(after - before) * 1000:+.2f}"
+
+    width = max([len(method) for method in summary] + [7])
+    lines = [f"{'Methode':<{width}}  {'aantal':>6}  {'fouten':>6}  {'opn. p50':>9}  {'nu p50':>9}  "
+             f"{'verschil':>9}  {'opn. p95':>9}  {'nu p95':>9}  {'verschil':>9}"]
+    for method, stats in summary.items():
+        lines.append(
+            f"{method:<{width}}  {stats['count']:>6}  {stats['errors']:>6}  "
+            f"{ms(stats['recorded_p50']):>9}  {ms(stats['replayed_p50']):>9}  "
+            f"{delta(stats['recorded_p50'], stats['replayed_p50']):>9}  "
+            f"{ms(stats['recorded_p95']):>9}  {ms(stats['replayed_p95']):>9}  "
+            f"{delta(stats['recorded_p95'], stats['replayed_p95']):>9}"
+        )
+    return "\n".join(lines)
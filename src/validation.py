@@ -0,0 +1,210 @@
+"""
+MCP Validation - Lokale controle van tool-argumenten tegen het inputSchema
+
+Deze module compileert een JSON Schema (zoals het inputSchema uit tools/list) één keer tot
+een keten van kleine controlefuncties. Daarmee kunnen argumenten voor tools/call lokaal
+worden gecontroleerd, zonder eerst een verzoek naar de server te sturen.
+
+Alleen de gangbare sleutelwoorden worden gecontroleerd (type, enum, const, required,
+properties, patternProperties, additionalProperties, items, lengtes, pattern en grenzen, allOf/anyOf/oneOf).
+Onbekende sleutelwoorden en $ref worden genegeerd: bij twijfel beslist de server.
+"""
+
+import re
+
+_PYTHON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "null": type(None),
+}
+
+
+def _is_type(value, expected):
+    """Controleert één JSON Schema-type; bool telt niet als getal."""
+    if expected == "boolean":
+        return isinstance(value, bool)
+    if expected == "integer":
+        return (isinstance(value, int) and not isinstance(value, bool)) or (
+            isinstance(value, float) and value.is_integer())
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    python_type = _PYTHON_TYPES.get(expected)
+    return python_type is None or isinstance(value, python_type)
+
+
+def _accept(value, path):
+    return None
+
+
+def _compile_pattern(pattern):
+    """Compileert een pattern; None als het geen geldige Python-regex is.
+
+    JSON Schema gebruikt ECMA-262 regexen. Een patroon dat re niet begrijpt (zoals \\p{L})
+    wordt niet gecontroleerd, zodat de lokale controle geen verzoek weigert dat de server
+    wel zou accepteren.
+    """
+    if not isinstance(pattern, str):
+        return None
+    try:
+        return re.compile(pattern)
+    except re.error:
+        return None
+
+
+def _compile(schema):
+    """Compileert een (deel)schema tot een functie check(value, path) -> foutmelding of None."""
+    if not isinstance(schema, dict):
+        return _accept  # true/false-schema's en ongeldige schema's laten we aan de server
+    checks = []
+
+    expected = schema.get("type")
+    if expected is not None:
+        types = expected if isinstance(expected, list) else [expected]
+        label = " of ".join(types)
+
+        def check_type(value, path):
+            if not any(_is_type(value, t) for t in types):
+                return f"{path}: verwacht {label}, kreeg {type(value).__name__}"
+        checks.append(check_type)
+
+    if "enum" in schema:
+        options = schema["enum"]
+
+        def check_enum(value, path):
+            if value not in options:
+                return f"{path}: waarde moet een van {options} zijn"
+        checks.append(check_enum)
+
+    if "const" in schema:
+        constant = schema["const"]
+
+        def check_const(value, path):
+            if value != constant:
+                return f"{path}: waarde moet {constant!r} zijn"
+        checks.append(check_const)
+
+    required = schema.get("required") or []
+    properties = {key: _compile(sub) for key, sub in (schema.get("properties") or {}).items()}
+    patterns = [(_compile_pattern(regex), _compile(sub))
+                for regex, sub in (schema.get("patternProperties") or {}).items()]
+    additional = schema.get("additionalProperties", True)
+    extra = None if additional is False else (_compile(additional) if isinstance(additional, dict) else _accept)
+    if any(regex is None for regex, _ in patterns):
+        extra = _accept  # welke velden extra zijn, weten we niet zeker: dat beslist de server
+    patterns = [(regex, check) for regex, check in patterns if regex is not None]
+    if required or properties or patterns or extra is not _accept:
+        def check_object(value, path):
+            if not isinstance(value, dict):
+                return None
+            for key in required:
+                if key not in value:
+                    return f"{path}: verplicht veld '{key}' ontbreekt"
+            for key, item in value.items():
+                # Een veld uit properties of patternProperties is geen additionalProperty
+                checks_for_key = [check for regex, check in patterns if regex.search(key)]
+                if key in properties:
+                    checks_for_key.append(properties[key])
+                elif not checks_for_key:
+                    if extra is None:
+                        return f"{path}: onbekend veld '{key}'"
+                    checks_for_key.append(extra)
+                for check in checks_for_key:
+                    error = check(item, f"{path}.{key}")
+                    if error:
+                        return error
+        checks.append(check_object)
+
+    items = schema.get("items")
+    min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+    if isinstance(items, dict) or min_items is not None or max_items is not None:
+        item_check = _compile(items) if isinstance(items, dict) else _accept
+
+        def check_array(value, path):
+            if not isinstance(value, list):
+                return None
+            if min_items is not None and len(value) < min_items:
+                return f"{path}: minimaal {min_items} items verwacht"
+            if max_items is not None and len(value) > max_items:
+                return f"{path}: maximaal {max_items} items toegestaan"
+            for index, item in enumerate(value):
+                error = item_check(item, f"{path}[{index}]")
+                if error:
+                    return error
+        checks.append(check_array)
+
+    min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+    pattern = _compile_pattern(schema.get("pattern"))
+    if min_length is not None or max_length is not None or pattern is not None:
+        def check_string(value, path):
+            if not isinstance(value, str):
+                return None
+            if min_length is not None and len(value) < min_length:
+                return f"{path}: minimaal {min_length} tekens verwacht"
+            if max_length is not None and len(value) > max_length:
+                return f"{path}: maximaal {max_length} tekens toegestaan"
+            if pattern is not None and not pattern.search(value):
+                return f"{path}: voldoet niet aan patroon {pattern.pattern!r}"
+        checks.append(check_string)
+
+    bounds = [(schema.get(key), key) for key in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")]
+    bounds = [(limit, key) for limit, key in bounds if isinstance(limit, (int, float)) and not isinstance(limit, bool)]
+    if bounds:
+        def check_number(value, path):
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return None
+            for limit, key in bounds:
+                if ((key == "minimum" and value < limit) or (key == "maximum" and value > limit)
+                        or (key == "exclusiveMinimum" and value <= limit)
+                        or (key == "exclusiveMaximum" and value >= limit)):
+                    return f"{path}: waarde {value} buiten grens {key}={limit}"
+        checks.append(check_number)
+
+    for combinator in ("allOf", "anyOf", "oneOf"):
+        subschemas = schema.get(combinator)
+        if not isinstance(subschemas, list) or not subschemas:
+            continue
+        compiled = [_compile(sub) for sub in subschemas]
+        if combinator == "allOf":
+            def check_all(value, path, compiled=compiled):
+                for check in compiled:
+                    error = check(value, path)
+                    if error:
+                        return error
+            checks.append(check_all)
+        else:
+            # oneOf wordt als anyOf gecontroleerd: lokaal alleen afwijzen wat zeker fout is
+            def check_any(value, path, compiled=compiled):
+                errors = [check(value, path) for check in compiled]
+                if all(errors):
+                    return errors[0]
+            checks.append(check_any)
+
+    if not checks:
+        return _accept
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all_keywords(value, path):
+        for check in checks:
+            error = check(value, path)
+            if error:
+                return error
+    return check_all_keywords
+
+
+def compile_schema(schema):
+    """Compileert een JSON Schema tot een validatiefunctie.
+
+    Args:
+        schema (dict): Het JSON Schema, bijvoorbeeld het inputSchema van een tool
+
+    Returns:
+        callable: validate(value, path="arguments") die een foutmelding teruggeeft,
+                  of None als de waarde geldig is
+    """
+    check = _compile(schema)
+
+    def validate(value, path="arguments"):
+        return check(value, path)
+    return validate
@@ -0,0 +1,216 @@
+"""
+MCP Workflow - Een DAG van afhankelijke verzoeken over één verbinding uitvoeren
+
+Een workflow is een JSON-bestand met benoemde stappen. De parameters van een stap kunnen
+verwijzen naar het antwoord van een eerdere stap met ${stap.result.pad}. Stappen die niet
+van elkaar afhangen worden parallel uitgevoerd; het antwoord van elke stap wordt
+teruggegeven zodra het binnen is.
+
+Voorbeeld:
+
+    {
+      "initialize": true,
+      "steps": [
+        {"name": "tools", "method": "tools/list"},
+        {"name": "echo", "method": "tools/call",
+         "params": {"name": "echo", "arguments": {"message": "${tools.result.tools[0].name}"}}}
+      ]
+    }
+"""
+
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.mcp_client import MCPClientError, ConfigurationError
+
+# ${stap.pad} met een pad van sleutels en [index]-en, bijvoorbeeld ${list.result.tools[0].name}
+_REFERENCE = re.compile(r"\$\{([A-Za-z0-9_-]+)((?:\.[^.\[\]}]+|\[\d+\])*)\}")
+_PATH_PART = re.compile(r"\.([^.\[\]}]+)|\[(\d+)\]")
+
+
+class WorkflowError(ConfigurationError):
+    """Ongeldige workflow: onbekende stap, ontbrekende methode of een kringverwijzing."""
+    pass
+
+
+def load_workflow(path):
+    """Leest een workflow uit een JSON-bestand.
+
+    Args:
+        path (str): Het pad van het workflowbestand
+
+    Returns:
+        dict: De workflow
+
+    Raises:
+        WorkflowError: Als het bestand niet leesbaar of geen geldige JSON is
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise WorkflowError(f"Kan workflow {path} niet lezen: {e}")
+
+
+def _references(value):
+    """Geeft de namen van alle stappen terug waarnaar een waarde verwijst."""
+    if isinstance(value, str):
+        return {match.group(1) for match in _REFERENCE.finditer(value)}
+    if isinstance(value, dict):
+        return set().union(*(_references(item) for item in value.values())) if value else set()
+    if isinstance(value, list):
+        return set().union(*(_references(item) for item in value)) if value else set()
+    return set()
+
+
+def _lookup(responses, step, path):
+    """Zoekt het pad op in het antwoord van een stap."""
+    value = responses[step]
+    for key, index in _PATH_PART.findall(path):
+        try:
+            value = value[int(index)] if index else value[key]
+        except (KeyError, IndexError, TypeError):
+            raise WorkflowError(f"Verwijzing ${{{step}{path}}} bestaat niet in het antwoord van '{step}'.")
+    return value
+
+
+def _substitute(value, responses):
+    """Vult de verwijzingen in een waarde in met de antwoorden van eerdere stappen.
+
+    Een string die uit precies één verwijzing bestaat krijgt de waarde zelf (met het
+    oorspronkelijke type); verwijzingen binnen een langere tekst worden als tekst ingevoegd.
+    """
+    if isinstance(value, str):
+        match = _REFERENCE.fullmatch(value)
+        if match:
+            return _lookup(responses, match.group(1), match.group(2))
+
+        def replace(match):
+            found = _lookup(responses, match.group(1), match.group(2))
+            return found if isinstance(found, str) else json.dumps(found)
+        return _REFERENCE.sub(replace, value)
+    if isinstance(value, dict):
+        return {key: _substitute(item, responses) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute(item, responses) for item in value]
+    return value
+
+
+def parse_workflow(workflow):
+    """Controleert een workflow en bepaalt de afhankelijkheden van elke stap.
+
+    Args:
+        workflow (dict): De workflow, met 'steps' als lijst (met 'name') of als dict per naam
+
+    Returns:
+        dict: Per stapnaam een dict met method, params en depends (set van stapnamen),
+              in de volgorde van het bestand
+
+    Raises:
+        WorkflowError: Bij een ongeldige stap, een onbekende verwijzing of een kringverwijzing
+    """
+    steps = workflow.get("steps") if isinstance(workflow, dict) else None
+    if isinstance(steps, dict):
+        steps = [dict(step, name=name) for name, step in steps.items()]
+    if not isinstance(steps, list) or not steps:
+        raise WorkflowError("Een workflow heeft een niet-lege lijst 'steps' nodig.")
+
+    parsed = {}
+    for step in steps:
+        name = step.get("name") if isinstance(step, dict) else None
+        if not isinstance(name, str) or not name:
+            raise WorkflowError(f"Stap zonder naam: {step}")
+        if name in parsed:
+            raise WorkflowError(f"Stap '{name}' komt meer dan eens voor.")
+        if not isinstance(step.get("method"), str):
+            raise WorkflowError(f"Stap '{name}' heeft geen 'method'.")
+        params = step.get("params")
+        depends = _references(params) | set(step.get("after") or [])
+        parsed[name] = {"method": step["method"], "params": params, "depends": depends}
+
+    for name, step in parsed.items():
+        unknown = step["depends"] - parsed.keys()
+        if unknown:
+            raise WorkflowError(f"Stap '{name}' verwijst naar onbekende stap(pen): {', '.join(sorted(unknown))}")
+
+    # Kringverwijzingen opsporen (Kahn: wat overblijft zit in een kring)
+    remaining = {name: set(step["depends"]) for name, step in parsed.items()}
+    ready = [name for name, depends in remaining.items() if not depends]
+    while ready:
+        done = ready.pop()
+        del remaining[done]
+        for name, depends in remaining.items():
+            if done in depends:
+                depends.discard(done)
+                if not depends:
+                    ready.append(name)
+    if remaining:
+        raise WorkflowError(f"Kringverwijzing tussen de stappen: {', '.join(sorted(remaining))}")
+    return parsed
+
+
+def run_workflow(client, workflow, concurrency=8, timeout=None):
+    """Voert een workflow uit en levert het antwoord van elke stap zodra het binnen is.
+
+    Elke stap start zodra alle stappen waarvan hij afhangt geslaagd zijn, met maximaal
+    `concurrency` verzoeken tegelijk over de bestaande verbinding. Mislukt een stap (een
+    exception of een JSON-RPC foutantwoord), dan worden de stappen die ervan afhangen
+    overgeslagen; de overige stappen lopen gewoon door.
+
+    Args:
+        client (MCPClient): De verbonden client
+        workflow (dict): De workflow (zie parse_workflow)
+        concurrency (int, optional): Maximaal aantal stappen tegelijk
+        timeout (float, optional): Maximale wachttijd per stap in seconden
+
+    Yields:
+        tuple: (stapnaam, response); bij een fout of overgeslagen stap een dict met een error-sleutel
+
+    Raises:
+        WorkflowError: Als de workflow ongeldig is
+    """
+    steps = parse_workflow(workflow)
+    if workflow.get("initialize"):
+        client.initialize(timeout=timeout)
+
+    responses = {}  # stapnaam -> geslaagd antwoord
+    finished = set()
+    in_flight = {}  # future -> stapnaam
+
+    def call(name):
+        step = steps[name]
+        params = _substitute(step["params"], responses)
+        return client.call(step["method"], params, timeout=timeout)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="mcp-workflow")
+    try:
+        while len(finished) < len(steps):
+            # Stappen zonder (geslaagde) voorgangers die nog niet lopen
+            started = set(in_flight.values())
+            for name, step in steps.items():
+                if name in finished or name in started:
+                    continue
+                failed = [dep for dep in step["depends"] if dep in finished and dep not in responses]
+                if failed:
+                    finished.add(name)
+                    yield name, {"error": f"Overgeslagen: stap '{failed[0]}' is mislukt."}
+                elif step["depends"] <= responses.keys() and len(in_flight) < concurrency:
+                    in_flight[executor.submit(call, name)] = name
+            if not in_flight:
+                continue  # Alleen overgeslagen stappen in deze ronde; opnieuw bekijken
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = in_flight.pop(future)
+                finished.add(name)
+                try:
+                    response = future.result()
+                except MCPClientError as e:
+                    response = {"error": str(e)}
+                if isinstance(response, dict) and "error" not in response:
+                    responses[name] = response
+                yield name, response
+    finally:
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=False)
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from src.mcp_client import MCPClient, ConfigurationError
+from src.bench import LatencyHistogram, parse_mix, run_closed_loop, run_open_loop, format_report
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Test cases voor het latency-histogram."""
+
+    def test_percentiles_within_bucket_precision(self):
+        """Test dat percentielen binnen de bucketprecisie van de exacte waarde liggen."""
+        rng = random.Random(1)
+        values = sorted(rng.expovariate(1 / 0.005) for _ in range(20000))
+        histograms = [LatencyHistogram(), LatencyHistogram()]
+        for number, value in enumerate(values):
+            histograms[number % 2].record(value)
+        histogram = histograms[0]
+        histogram.merge(histograms[1])
+
+        self.assertEqual(histogram.count, len(values))
+        for percentile in (50, 90, 99, 99.9):
+            exact = values[int(percentile / 100 * len(values) + 0.5) - 1]
+            self.assertAlmostEqual(histogram.percentile(percentile), exact, delta=exact / 60 + 1e-6)
+        self.assertAlmostEqual(histogram.percentile(100), values[-1], delta=1e-6)
+
+    def test_empty(self):
+        """Test dat een leeg histogram geen percentielen geeft."""
+        self.assertIsNone(LatencyHistogram().percentile(50))
+        self.assertIsNone(LatencyHistogram().mean())
+
+
+class TestBench(unittest.TestCase):
+    """Test cases voor closed- en open-loop benchmarks."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        patcher = patch('src.mcp_client.log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _connect(self, server="src.demo_server:DemoServer"):
+        client = MCPClient()
+        self.assertTrue(client.connect_inproc(server))
+        self.addCleanup(client.close)
+        return client
+
+    def test_parse_mix(self):
+        """Test dat een ongeldige mix wordt geweigerd."""
+        self.assertEqual(parse_mix([{"method": "ping"}]), [("ping", None, 1)])
+        for mix in ([], [{"params": {}}], [{"method": "ping", "weight": 0}]):
+            with self.subTest(mix=mix):
+                with self.assertRaises(ConfigurationError):
+                    parse_mix(mix)
+
+    def test_closed_loop(self):
+        """Test een closed-loop run met een vast aantal verzoeken en fouten per soort."""
+        mix = parse_mix([{"method": "ping", "weight": 3}, {"method": "bestaat/niet"}])
+
+        result = run_closed_loop(self._connect(), mix, concurrency=4, requests=200, seed=1)
+
+        self.assertEqual(result["requests"], 200)
+        self.assertEqual(set(result["errors"]), {"rpc_error"})
+        self.assertTrue(20 < result["errors"]["rpc_error"] < 80)
+        self.assertEqual(result["histogram"].count, 200 - result["errors"]["rpc_error"])
+        self.assertGreater(result["throughput"], 0)
+        self.assertIn("closed loop, concurrency 4", format_report(result))
+
+    def test_open_loop_counts_queueing_delay(self):
+        """Test dat een overbelaste server in open loop de wachttijd in de latency laat zien."""
+        def slow(message):
+            # In-process berichten worden één voor één verwerkt: maximaal 50 per seconde
+            time.sleep(0.02)
+            return {"jsonrpc": "2.0", "id": message["id"], "result": {}}
+
+        result = run_open_loop(self._connect(slow), parse_mix([{"method": "ping"}]), rate=100, duration=0.3)
+
+        self.assertEqual(result["requests"], 30)
+        self.assertGreaterEqual(result["latency"]["min"], 0.019)
+        # Het laatste verzoek wacht op de 29 eerdere: ruim boven de 20 ms per verzoek
+        self.assertGreater(result["latency"]["p99"], 0.2)
+        self.assertIn("open loop, 100 verzoeken/s", format_report(result))
+
+
+
+class TestBenchCli(unittest.TestCase):
+    """Test cases voor --bench in de CLI."""
+
+    def test_no_log_line_per_request(self):
+        """Test dat --bench op het standaard logniveau geen logregel per verzoek toont."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            with open(os.path.join(tempdir, ".env"), "w") as f:
+                f.write(f"MCP_LOCAL_COMMAND={sys.executable} -m src.demo_server\n")
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            env = dict(os.environ, PYTHONPATH=root)
+            env.pop("LOG_LEVEL", None)
+            result = subprocess.run(
+                [sys.executable, "-m", "src.mcp_cli", "--local", "--bench", "--method", "ping", "--requests", "50"],
+                cwd=tempdir, capture_output=True, text=True, timeout=60, env=env,
+            )
+
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("Verzoeken:    50", result.stdout)
+        self.assertIn("[INFO] Closed-loop benchmark", result.stderr)
+        self.assertNotIn("Verzoek verzonden", result.stdout + result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
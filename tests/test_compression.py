@@ -0,0 +1,134 @@
+import unittest
+from unittest.mock import patch
+import gzip
+import json
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src import compression
+from src.mcp_client import MCPClient, ConfigurationError
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Streamable HTTP-server die gzip-verzoeken accepteert en gecomprimeerd antwoordt."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        encoding = self.headers.get("Content-Encoding")
+        self.server.received.append(encoding)
+        if encoding and self.server.reject_compressed:
+            self.send_response(415)
+            self.send_header("Accept-Encoding", "identity")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if encoding == "gzip":
+            body = gzip.decompress(body)
+        message = json.loads(body)
+        response = {"jsonrpc": "2.0", "id": message["id"], "result": {"echo": message.get("params")}}
+        if message["method"] == "stream":
+            content_type = "text/event-stream"
+            payload = b'event: message\r\ndata: ' + json.dumps(response).encode() + b'\r\n\r\n'
+        else:
+            content_type = "application/json"
+            payload = json.dumps(response).encode()
+        payload = gzip.compress(payload)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Accept-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestCompressionHelpers(unittest.TestCase):
+    """Test cases voor de compressiehulpfuncties."""
+
+    def test_streamed_decompression(self):
+        """Test dat gzip en beide varianten van deflate stuk voor stuk worden uitgepakt."""
+        data = json.dumps({"items": list(range(2000))}).encode()
+        encoded = {
+            "gzip": compression.compress(data, "gzip"),
+            "deflate": zlib.compress(data),
+        }
+        raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        encoded["raw deflate"] = raw.compress(data) + raw.flush()
+        for name, body in encoded.items():
+            with self.subTest(encoding=name):
+                decoder = compression.decoder(name.split()[-1])
+                chunks = [decoder.decompress(body[i:i + 100]) for i in range(0, len(body), 100)]
+                self.assertEqual(b"".join(chunks), data)
+        self.assertIsNone(compression.decoder("br"))
+
+    def test_iter_lines(self):
+        """Test het splitsen in regels over stukgrenzen heen, ook met CRLF."""
+        chunks = [b"event: a\r", b"\ndata: 1", b"23\n\nda", b"ta: x"]
+        self.assertEqual(list(compression.iter_lines(chunks)), [b"event: a", b"data: 123", b"", b"data: x"])
+
+    def test_parse_accept_encoding(self):
+        """Test dat coderingen met q=0 worden genegeerd."""
+        self.assertEqual(compression.parse_accept_encoding("gzip, zstd;q=0, Deflate;q=0.5"), {"gzip", "deflate"})
+
+
+class TestHttpCompression(unittest.TestCase):
+    """Test cases voor compressie over een echte HTTP-verbinding."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        patcher = patch('src.mcp_client.log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.received = []
+        self.server.reject_compressed = False
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/mcp"
+
+    def _connect(self, mode="gzip"):
+        client = MCPClient(request_compression=mode, compression_threshold=1000, heartbeat_interval=0)
+        self.assertTrue(client.connect_http(self.url))
+        self.addCleanup(client.close)
+        return client
+
+    def test_compressed_request_and_response(self):
+        """Test dat grote verzoeken gzip krijgen en antwoorden gestreamd worden uitgepakt."""
+        client = self._connect()
+        params = {"text": "abc" * 2000}
+
+        self.assertEqual(client.call("echo", {"text": "kort"})["result"]["echo"], {"text": "kort"})
+        self.assertEqual(client.call("echo", params)["result"]["echo"], params)
+        self.assertEqual(client.call("stream", params)["result"]["echo"], params)
+
+        self.assertEqual(self.server.received, [None, "gzip", "gzip"])
+        stats = client.compression.stats()
+        self.assertEqual(stats["requests_compressed"], 2)
+        self.assertEqual(stats["responses_compressed"], 3)
+        self.assertLess(stats["request_wire_bytes"], stats["request_bytes"] / 10)
+        self.assertGreater(stats["bytes_saved"], 20000)
+
+    def test_rejected_compression_falls_back(self):
+        """Test dat compressie na een 415 wordt uitgeschakeld en het verzoek wordt herhaald."""
+        self.server.reject_compressed = True
+        client = self._connect("auto")
+        params = {"text": "abc" * 2000}
+
+        self.assertEqual(client.call("echo", params)["result"]["echo"], params)
+        self.assertEqual(client.call("echo", params)["result"]["echo"], params)
+
+        self.assertEqual(self.server.received, ["gzip", None, None])
+        self.assertEqual(client.request_compression, "off")
+
+    def test_invalid_mode(self):
+        """Test dat een onbekende compressie-instelling wordt geweigerd."""
+        with self.assertRaises(ConfigurationError):
+            MCPClient(request_compression="brotli")
+
+
+if __name__ == '__main__':
+    unittest.main()
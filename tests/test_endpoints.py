@@ -0,0 +1,143 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import threading
+import time
+import requests
+from src.mcp_client import MCPClient
+from src.endpoints import EndpointPool
+
+
+class TestEndpointPool(unittest.TestCase):
+    """Test cases voor de EndpointPool class."""
+
+    def test_select_fastest(self):
+        """Test dat eerst ongemeten endpoints en daarna het snelste endpoint worden gekozen."""
+        pool = EndpointPool(["http://a", "http://b", "http://c"])
+        self.assertEqual(pool.select(), "http://a")
+        pool.record_success("http://a", 0.2)
+        pool.record_success("http://b", 0.05)
+        pool.record_success("http://c", 0.1)
+        self.assertEqual(pool.select(), "http://b")
+
+        # Het gemiddelde volgt nieuwe metingen geleidelijk
+        pool.record_success("http://b", 0.5)
+        self.assertAlmostEqual(pool.stats()[1]["latency_ms"], 185.0)
+        self.assertEqual(pool.select(), "http://c")
+        self.assertEqual(pool.select(exclude={"http://c"}), "http://b")
+
+    def test_circuit_breaker(self):
+        """Test dat het circuit na herhaalde fouten opent en na de reset-tijd een proefpoging toelaat."""
+        pool = EndpointPool(["http://a", "http://b"], failure_threshold=2, reset_timeout=0.05)
+        self.assertFalse(pool.record_failure("http://a"))
+        self.assertTrue(pool.record_failure("http://a"))
+        self.assertEqual(pool.select(), "http://b")
+        self.assertIsNone(pool.select(exclude={"http://b"}))
+        self.assertEqual(pool.fallback(), "http://b")
+
+        time.sleep(0.06)
+        self.assertEqual(pool.stats()[0]["state"], "half-open")
+        # Een mislukte proefpoging opent het circuit direct weer
+        self.assertTrue(pool.record_failure("http://a"))
+        time.sleep(0.06)
+        pool.record_success("http://a", 0.01)
+        self.assertEqual(pool.stats()[0]["state"], "closed")
+
+
+class TestClientFailover(unittest.TestCase):
+    """Test cases voor failover tussen meerdere endpoints in de client."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        for target, value in (('src.mcp_client.check_config', True), ('src.mcp_client.API_KEY', None)):
+            patcher = patch(target, value) if value is None else patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch('src.mcp_client.log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('src.mcp_client.requests.Session')
+    def test_http_failover(self, mock_session_class):
+        """Test dat een onbereikbaar HTTP-endpoint wordt overgeslagen voor een idempotent verzoek."""
+        def post(url, **kwargs):
+            if url == "http://a/mcp":
+                raise requests.exceptions.ConnectionError("geweigerd")
+            response = MagicMock()
+            response.status_code = 200
+            response.headers = {"Content-Type": "application/json"}
+            response.content = b'{"jsonrpc": "2.0", "id": 1, "result": {}}'
+            response.__enter__.return_value = response
+            return response
+
+        mock_session_class.return_value.post.side_effect = post
+        client = MCPClient()
+        self.assertTrue(client.connect_http("http://a/mcp, http://b/mcp"))
+        self.addCleanup(client.close)
+
+        response = client.call("ping", timeout=5)
+
+        self.assertEqual(response["result"], {})
+        self.assertEqual(client.post_url, "http://b/mcp")
+        stats = {entry["url"]: entry for entry in client.endpoints.stats()}
+        self.assertEqual(stats["http://a/mcp"]["errors"], 1)
+        self.assertIsNotNone(stats["http://b/mcp"]["latency_ms"])
+
+    @patch('src.mcp_client.requests.Session')
+    def test_sse_failover_in_flight(self, mock_session_class):
+        """Test dat een weggevallen SSE-stream direct naar een ander endpoint overschakelt."""
+        drop = threading.Event()
+        stay_open = threading.Event()
+        self.addCleanup(stay_open.set)
+        self.addCleanup(drop.set)
+
+        def stream(session_id, until):
+            def iter_lines():
+                yield b"event: endpoint"
+                yield f"data: /messages?session_id={session_id}".encode()
+                yield b""
+                until.wait(5)
+            response = MagicMock()
+            response.status_code = 200
+            response.iter_lines.side_effect = iter_lines
+            return response
+
+        streams = {"http://a/sse": ("a1", drop), "http://b/sse": ("b1", stay_open)}
+        mock_session = mock_session_class.return_value
+        mock_session.get.side_effect = lambda url, **kwargs: stream(*streams[url])
+        posted = []
+
+        def post(url, json=None, **kwargs):
+            posted.append((url, json))
+            response = MagicMock()
+            response.status_code = 202
+            return response
+
+        mock_session.post.side_effect = post
+        client = MCPClient()
+        self.assertTrue(client.connect_sse(["http://a/sse", "http://b/sse"]))
+        self.addCleanup(client.close)
+        self.assertEqual(client.server_url, "http://a/sse")
+
+        result = {}
+        caller = threading.Thread(target=lambda: result.update(client.call("ping", timeout=5)))
+        caller.start()
+        deadline = time.monotonic() + 2
+        while not posted and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        started = time.monotonic()
+        drop.set()  # Endpoint a valt weg terwijl 'ping' openstaat
+        while len(posted) < 2 and time.monotonic() < deadline + 2:
+            time.sleep(0.01)
+
+        # Zonder backoff overgeschakeld; het openstaande verzoek is opnieuw verstuurd naar b
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(posted[1][0], "http://b/messages?session_id=b1")
+        self.assertEqual(posted[1][1]["id"], posted[0][1]["id"])
+        client._dispatch({"jsonrpc": "2.0", "id": posted[0][1]["id"], "result": {}})
+        caller.join(5)
+        self.assertEqual(result["result"], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
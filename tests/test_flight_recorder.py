@@ -0,0 +1,136 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
+from src.mcp_client import MCPClient, CommunicationError, RequestTimeoutError
+from src.flight_recorder import FlightRecorder, install_signal_handler
+
+
+class TestFlightRecorder(unittest.TestCase):
+    """Test cases voor de FlightRecorder class."""
+
+    def test_ring_buffer_keeps_last_entries(self):
+        """Test dat alleen de laatste `size` verzoeken bewaard blijven."""
+        recorder = FlightRecorder(size=3)
+        for request_id in range(5):
+            recorder.record((request_id, "ping", 10, 20, 1.0, 1.5, "ok"))
+
+        entries = recorder.entries()
+
+        self.assertEqual([entry["id"] for entry in entries], [2, 3, 4])
+        self.assertEqual(entries[0]["duration"], 0.5)
+
+
+class TestClientFlightRecorder(unittest.TestCase):
+    """Test cases voor de flight recorder in de client."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        patcher = patch('src.mcp_client.log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client(self, handler, **kwargs):
+        """Maakt een client met een in-process server."""
+        client = MCPClient(**kwargs)
+        self.assertTrue(client.connect_inproc(handler))
+        self.addCleanup(client.close)
+        return client
+
+    def test_outcomes_recorded(self):
+        """Test dat geslaagde, mislukte en verlopen verzoeken worden vastgelegd."""
+        def handler(message):
+            if message["method"] == "stil":
+                return None
+            if message["method"] == "kapot":
+                raise RuntimeError("kapot")
+            return {"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32601, "message": "?"}}
+
+        client = self._client(handler)
+        client.call("onbekend", timeout=1)
+        with self.assertRaises(RequestTimeoutError):
+            client.call("stil", timeout=0.05)
+        with self.assertRaises(CommunicationError):
+            client.call("kapot", timeout=1)
+
+        recent = client.flight_recorder_snapshot()["recent"]
+
+        self.assertEqual([entry["method"] for entry in recent], ["onbekend", "stil", "kapot"])
+        self.assertEqual([entry["outcome"] for entry in recent], ["error", "timeout", "send_failed"])
+        self.assertIsNotNone(recent[0]["duration"])
+        self.assertIsNone(recent[1]["received_at"])
+
+    def test_in_flight_and_dump(self):
+        """Test dat openstaande verzoeken met hun leeftijd in de dump staan."""
+        release = threading.Event()
+
+        def handler(message):
+            release.wait(5)
+            return {"jsonrpc": "2.0", "id": message["id"], "result": {}}
+
+        client = self._client(handler)
+        caller = threading.Thread(target=client.call, args=("tools/list",), kwargs={"timeout": 5})
+        caller.start()
+        deadline = time.monotonic() + 2
+        while not client._pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "flight.json")
+            client.dump_flight_recorder(path)
+            release.set()
+            caller.join(5)
+            with open(path, encoding="utf-8") as f:
+                dump = json.load(f)
+
+        in_flight = dump["clients"][0]["in_flight"]
+        self.assertEqual(in_flight[0]["method"], "tools/list")
+        self.assertGreaterEqual(in_flight[0]["age"], 0)
+        self.assertEqual(client.flight_recorder_snapshot()["recent"][0]["outcome"], "ok")
+
+    def test_automatic_dump_on_timeout(self):
+        """Test dat een time-out de flight recorder naar flight_recorder_file schrijft."""
+        client = self._client(lambda message: None)
+        with tempfile.TemporaryDirectory() as tempdir:
+            client.flight_recorder_file = os.path.join(tempdir, "flight.json")
+            with self.assertRaises(RequestTimeoutError):
+                client.call("ping", timeout=0.05)
+            with open(client.flight_recorder_file, encoding="utf-8") as f:
+                dump = json.load(f)
+
+        self.assertEqual(dump["clients"][0]["recent"][0]["outcome"], "timeout")
+
+    def test_disabled(self):
+        """Test dat een grootte van 0 de flight recorder uitschakelt."""
+        client = self._client("src.demo_server:DemoServer", flight_recorder_size=0)
+        client.call("ping", timeout=1)
+
+        self.assertIsNone(client.flight_recorder)
+        self.assertEqual(client.flight_recorder_snapshot()["recent"], [])
+
+    @unittest.skipUnless(hasattr(signal, "SIGUSR1"), "SIGUSR1 is niet beschikbaar")
+    def test_signal_dump(self):
+        """Test dat SIGUSR1 de flight recorders van alle clients wegschrijft."""
+        client = self._client("src.demo_server:DemoServer")
+        client.call("ping", timeout=1)
+        previous = signal.getsignal(signal.SIGUSR1)
+        self.addCleanup(signal.signal, signal.SIGUSR1, previous)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "flight.json")
+            self.assertTrue(install_signal_handler(path=path))
+            os.kill(os.getpid(), signal.SIGUSR1)
+            with open(path, encoding="utf-8") as f:
+                dump = json.load(f)
+
+        self.assertEqual(dump["pid"], os.getpid())
+        methods = [entry["method"] for snapshot in dump["clients"] for entry in snapshot["recent"]]
+        self.assertIn("ping", methods)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+from unittest.mock import patch
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from src import formatting
+from src.formatting import parse_path, extract_path, write_response
+
+
+class TestPaths(unittest.TestCase):
+    """Test cases voor jq-achtige paden."""
+
+    def test_extract_path(self):
+        """Test sleutels, indexen (ook negatief), iteratie en ontbrekende waarden."""
+        value = {"result": {"tools": [{"name": "echo"}, {"name": "add"}], "my-key": 1}}
+
+        self.assertEqual(list(extract_path(value, ".")), [value])
+        self.assertEqual(list(extract_path(value, ".result.tools[].name")), ["echo", "add"])
+        self.assertEqual(list(extract_path(value, ".result.tools[-1].name")), ["add"])
+        self.assertEqual(list(extract_path(value, '.result["my-key"]')), [1])
+        self.assertEqual(list(extract_path(value, ".result.tools[5]")), [None])
+        self.assertEqual(list(extract_path(value, ".error.message")), [None])
+
+    def test_invalid_paths(self):
+        """Test dat ongeldige paden en paden die niet op de waarde passen worden geweigerd."""
+        for expression in ("result", ".result[", ".a..b[x]"):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    parse_path(expression)
+        with self.assertRaises(ValueError):
+            list(extract_path({"result": [1]}, ".result.name"))
+
+
+class TestWriteResponse(unittest.TestCase):
+    """Test cases voor de uitvoerformaten."""
+
+    response = {"jsonrpc": "2.0", "id": 1, "result": {"tools": [{"name": "echo"}, {"name": "é"}]}}
+
+    def _write(self, response, output_format, path=None):
+        stream = io.StringIO()
+        ok = write_response(response, output_format, path, stream=stream)
+        return ok, stream.getvalue()
+
+    def test_pretty_matches_json_dumps(self):
+        """Test dat de gestreamde uitvoer gelijk is aan json.dumps, ook over meerdere stukken."""
+        large = {"result": {"items": [{"index": i, "text": "é" * 50} for i in range(2000)]}}
+        with patch.object(formatting, "WRITE_CHUNK_SIZE", 1024):
+            ok, output = self._write(large, "pretty")
+
+        self.assertTrue(ok)
+        self.assertEqual(output, json.dumps(large, indent=2, ensure_ascii=False) + "\n")
+
+    def test_compact_and_ndjson(self):
+        """Test compacte uitvoer en één regel per item van de resultaatlijst."""
+        _, compact = self._write(self.response, "compact")
+        _, ndjson = self._write(self.response, "ndjson")
+        _, names = self._write(self.response, "ndjson", ".result.tools[].name")
+
+        self.assertEqual(compact, '{"jsonrpc":"2.0","id":1,"result":{"tools":[{"name":"echo"},{"name":"é"}]}}\n')
+        self.assertEqual(ndjson, '{"name":"echo"}\n{"name":"é"}\n')
+        self.assertEqual(names, '"echo"\n"é"\n')
+
+    def test_result_mode(self):
+        """Test dat alleen het resultaat wordt getoond en een fout naar STDERR gaat."""
+        ok, output = self._write({"jsonrpc": "2.0", "id": 1, "result": {"value": 3}}, "result")
+        self.assertTrue(ok)
+        self.assertEqual(json.loads(output), {"value": 3})
+
+        stderr = io.StringIO()
+        with patch("sys.stderr", stderr):
+            ok, output = self._write({"jsonrpc": "2.0", "id": 1, "error": {"code": -32601}}, "result")
+        self.assertFalse(ok)
+        self.assertEqual(output, "")
+        self.assertEqual(json.loads(stderr.getvalue()), {"code": -32601})
+
+
+class TestCliOutput(unittest.TestCase):
+    """Test cases voor de uitvoer van de CLI met --format."""
+
+    def _cli(self, *args, transport="--inproc"):
+        """Voert de CLI uit met de demo server, op het standaard logniveau."""
+        with tempfile.TemporaryDirectory() as tempdir:
+            with open(os.path.join(tempdir, ".env"), "w") as f:
+                f.write(f"MCP_LOCAL_COMMAND={sys.executable} -m src.demo_server\n")
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            env = dict(os.environ, PYTHONPATH=root)
+            env.pop("LOG_LEVEL", None)
+            return subprocess.run(
+                [sys.executable, "-m", "src.mcp_cli", transport, *args], cwd=tempdir,
+                capture_output=True, text=True, timeout=60, env=env,
+            )
+
+    def test_error_exit_code(self):
+        """Test dat een foutantwoord in elk formaat een exitcode ongelijk aan 0 geeft."""
+        for output_format in ("pretty", "compact", "result"):
+            with self.subTest(output_format=output_format):
+                self.assertEqual(self._cli("--method", "unknown/method", "--format", output_format).returncode, 1)
+        self.assertEqual(self._cli("--method", "ping", "--format", "result").returncode, 0)
+
+    def test_raw_output_is_server_bytes(self):
+        """Test dat STDOUT bij --raw precies het antwoord van de server bevat (logs op STDERR)."""
+        from src.demo_server import DemoServer
+        result = self._cli("--raw", "--method", "tools/list", transport="--local")
+        request_id = json.loads(result.stdout)["id"]
+        expected = DemoServer().handle_message({"jsonrpc": "2.0", "id": request_id, "method": "tools/list"})
+
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, json.dumps(expected) + "\n")
+        self.assertIn("[INFO]", result.stderr)
+
+    def test_line_formats_parse_per_line(self):
+        """Test dat STDOUT bij compact en ndjson op het standaard logniveau alleen JSON-regels bevat."""
+        compact = self._cli("--method", "tools/list", "--format", "compact")
+        ndjson = self._cli("--method", "tools/list", "--format", "ndjson")
+
+        self.assertEqual(compact.returncode, 0)
+        self.assertEqual(len(compact.stdout.splitlines()), 1)
+        tools = json.loads(compact.stdout)["result"]["tools"]
+        self.assertEqual(ndjson.returncode, 0)
+        self.assertEqual([json.loads(line) for line in ndjson.stdout.splitlines()], tools)
+
+    def test_raw_with_format_rejected(self):
+        """Test dat --raw niet samen met --format of --path kan."""
+        result = self._cli("--raw", "--method", "ping", "--path", ".result")
+        self.assertEqual(result.returncode, 2)
+        self.assertIn("--raw", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
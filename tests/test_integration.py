@@ -5,8 +5,10 @@ import os
 import io
 import sys
 import tempfile
+import threading
+import time
 from pathlib import Path
-from src.mcp_client import MCPClient
+from src.mcp_client import MCPClient, ConnectionError, CommunicationError
 import src.mcp_cli as mcp_cli
 
 class TestIntegration(unittest.TestCase):
@@ -76,19 +78,32 @@ class TestIntegration(unittest.TestCase):
         process_mock.stdin.write.assert_called_once_with(json.dumps(expected_request) + "\n")
         process_mock.stdin.flush.assert_called_once()
         
-    @patch('src.mcp_client.requests.get')
-    @patch('src.mcp_client.requests.post')
-    def test_send_request_via_sse(self, mock_post, mock_get):
-        """Test het versturen van een verzoek via SSE."""
-        # Mock de requests.get functie voor een succesvolle verbinding
+    def _mock_sse_session(self, session_id):
+        """Maakt een gemockte HTTP-sessie met een open SSE-stream en endpoint-event."""
+        stream_open = threading.Event()
+        self.addCleanup(stream_open.set)
+
+        def iter_lines():
+            yield b"event: endpoint"
+            yield f"data: /messages?session_id={session_id}".encode()
+            yield b""
+            stream_open.wait(5)
+
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
-        
-        # Mock de requests.post functie voor een succesvolle POST
+        mock_response.iter_lines.side_effect = iter_lines
+        mock_session = MagicMock()
+        mock_session.get.return_value = mock_response
         mock_post_response = MagicMock()
-        mock_post_response.status_code = 200
-        mock_post.return_value = mock_post_response
+        mock_post_response.status_code = 202
+        mock_session.post.return_value = mock_post_response
+        return mock_session
+
+    @patch('src.mcp_client.requests.Session')
+    def test_send_request_via_sse(self, mock_session_class):
+        """Test het versturen van een verzoek via SSE."""
+        mock_session = self._mock_sse_session("abc")
+        mock_session_class.return_value = mock_session
         
         # Simuleer een antwoord via de response queue
         expected_response = {
@@ -111,10 +126,10 @@ class TestIntegration(unittest.TestCase):
         # Controleer resultaten
         self.assertEqual(response, expected_response)
         
-        # Controleer dat requests.post is aangeroepen met het juiste verzoek
-        mock_post.assert_called_once()
-        args, kwargs = mock_post.call_args
-        self.assertEqual(args[0], 'http://test.server/sse')  # URL
+        # Controleer dat de POST naar het geadverteerde endpoint gaat
+        mock_session.post.assert_called_once()
+        args, kwargs = mock_session.post.call_args
+        self.assertEqual(args[0], 'http://test.server/messages?session_id=abc')  # URL
         self.assertEqual(kwargs['headers'], {"Content-Type": "application/json", "Authorization": "Bearer test_api_key"})
         
         expected_request = {
@@ -123,6 +138,28 @@ class TestIntegration(unittest.TestCase):
             "method": "getVersion"
         }
         self.assertEqual(kwargs['json'], expected_request)
+        # Er is maar één stream geopend
+        mock_session.get.assert_called_once()
+        client.close()
+
+    @patch('src.mcp_client.requests.Session')
+    def test_clients_with_different_urls(self, mock_session_class):
+        """Test dat meerdere clients met verschillende URLs naast elkaar werken."""
+        sessions = [self._mock_sse_session("one"), self._mock_sse_session("two")]
+        mock_session_class.side_effect = sessions
+        
+        first = MCPClient()
+        second = MCPClient()
+        self.assertTrue(first.connect_sse("http://one.example/sse"))
+        self.assertTrue(second.connect_sse("http://two.example/sse"))
+        
+        first._send_message({"jsonrpc": "2.0", "method": "ping"})
+        second._send_message({"jsonrpc": "2.0", "method": "ping"})
+        
+        self.assertEqual(sessions[0].post.call_args[0][0], "http://one.example/messages?session_id=one")
+        self.assertEqual(sessions[1].post.call_args[0][0], "http://two.example/messages?session_id=two")
+        first.close()
+        second.close()
         
     @patch('sys.argv', ['mcp_cli.py', '--local', '--method', 'getVersion'])
     @patch('src.mcp_client.subprocess.Popen')
@@ -165,5 +202,252 @@ class TestIntegration(unittest.TestCase):
         finally:
             sys.stdout = sys.__stdout__  # Reset stdout
 
+    @patch('src.mcp_client.log')
+    def test_inproc_demo_server(self, mock_log):
+        """Test de in-process verbinding met de demo server via een entry point."""
+        client = MCPClient()
+        self.assertTrue(client.connect_inproc("src.demo_server:DemoServer"))
+        
+        self.assertIn("result", client.initialize())
+        self.assertTrue(client.connection.initialized)
+        response = client.send_request("tools/call", {"name": "add", "arguments": {"a": 1, "b": 2}})
+        
+        self.assertEqual(response["result"]["content"][0]["text"], "3")
+        client.close()
+        self.assertIsNone(client.transport)
+
+    @patch('src.mcp_client.log')
+    def test_inproc_serialize(self, mock_log):
+        """Test dat serialize=True berichten als JSON heen en weer codeert."""
+        received = []
+
+        def handler(message):
+            received.append(message)
+            return {"jsonrpc": "2.0", "id": message["id"], "result": {"tuple": (1, 2)}}
+
+        client = MCPClient()
+        params = {"values": (1, 2)}
+        self.assertTrue(client.connect_inproc(handler, serialize=True))
+        response = client.send_request("echo", params)
+        
+        # Tuples worden lijsten, zoals bij een echte JSON-verbinding
+        self.assertEqual(received[0]["params"], {"values": [1, 2]})
+        self.assertEqual(response["result"], {"tuple": [1, 2]})
+
+    @patch('src.mcp_client.log')
+    def test_inproc_server_exception(self, mock_log):
+        """Test dat een exception in de in-process server als fout terugkomt."""
+        def handler(message):
+            raise RuntimeError("kapot")
+
+        client = MCPClient()
+        self.assertTrue(client.connect_inproc(handler))
+        response = client.send_request("ping")
+        self.assertIn("kapot", response["error"])
+
+    @patch('src.mcp_client.log')
+    def test_map_preserves_order(self, mock_log):
+        """Test dat map alle antwoorden in de volgorde van de invoer teruggeeft."""
+        client = MCPClient()
+        self.assertTrue(client.connect_inproc("src.demo_server:DemoServer"))
+        params = ({"name": "echo", "arguments": {"message": str(i)}} for i in range(20))
+        
+        texts = [r["result"]["content"][0]["text"] for r in client.map("tools/call", params, concurrency=4)]
+        
+        self.assertEqual(texts, [str(i) for i in range(20)])
+        client.close()
+
+    @patch('src.mcp_client.log')
+    def test_imap_unordered_errors_and_backpressure(self, mock_log):
+        """Test dat fouten per item worden gemeld en de invoer lui wordt gelezen."""
+        def handler(message):
+            if message["params"]["n"] == 3:
+                raise ValueError("kapot")
+            return {"jsonrpc": "2.0", "id": message["id"], "result": message["params"]}
+        
+        pulled = []
+        def params():
+            n = 0
+            while True:  # Oneindige invoer
+                pulled.append(n)
+                yield {"n": n}
+                n += 1
+        
+        client = MCPClient()
+        self.assertTrue(client.connect_inproc(handler))
+        results = {}
+        for index, response in client.imap_unordered("echo", params(), concurrency=2):
+            results[index] = response
+            if len(results) >= 6 and 3 in results:
+                break
+        
+        self.assertIn("kapot", results[3]["error"])
+        for index, response in results.items():
+            if index != 3:
+                self.assertEqual(response["result"], {"n": index})
+        # Er worden nooit meer dan `concurrency` items vooruit gelezen
+        self.assertLessEqual(len(pulled), len(results) + 2)
+        client.close()
+
+    @patch('src.mcp_client.log')
+    def test_iter_paginated_prefetch(self, mock_log):
+        """Test dat iter_paginated alle pagina's volgt en begrensd vooruit ophaalt."""
+        from src.demo_server import DemoServer
+        server = DemoServer(resource_count=25, page_size=2)
+        requested = []
+        
+        def handler(message):
+            requested.append(message.get("params", {}).get("cursor"))
+            return server.handle_message(message)
+        
+        client = MCPClient()
+        self.assertTrue(client.connect_inproc(handler))
+        items = client.iter_paginated("resources/list", prefetch=1)
+        first = next(items)
+        time.sleep(0.2)
+        
+        # Eén pagina in gebruik, één klaar en één die wacht op ruimte
+        self.assertEqual(first["uri"], "demo://text/0")
+        self.assertLessEqual(len(requested), 3)
+        rest = list(items)
+        self.assertEqual(len(rest), 25)
+        self.assertEqual(rest[-1]["uri"], "demo://blob/bytes")
+        client.close()
+
+    @patch('src.mcp_client.log')
+    def test_inproc_invalid_entry_point(self, mock_log):
+        """Test een ongeldig entry point voor de in-process server."""
+        client = MCPClient()
+        self.assertFalse(client.connect_inproc("src.demo_server:Bestaat.Niet"))
+        self.assertIsNone(client.transport)
+
+    @patch('src.mcp_client.log')
+    def test_demo_server_over_stdio(self, mock_log):
+        """Test de demo server als los proces via STDIO."""
+        client = MCPClient()
+        self.assertTrue(client.connect_stdio(f"{sys.executable} -m src.demo_server"))
+        try:
+            response = client.call("resources/list", timeout=10)
+            self.assertEqual(len(response["result"]["resources"]), 10)
+            self.assertEqual(response["result"]["nextCursor"], "10")
+        finally:
+            client.close()
+
+    def _start_socket_server(self, address):
+        """Start een gedeelde demo server op een socket in een achtergrondthread."""
+        from src.demo_server import create_socket_server
+        socket_server = create_socket_server(address)
+        threading.Thread(target=socket_server.serve_forever, daemon=True).start()
+        self.addCleanup(socket_server.server_close)
+        self.addCleanup(socket_server.shutdown)
+        return socket_server
+
+    @patch('src.mcp_client.log')
+    def test_socket_clients_share_server(self, mock_log):
+        """Test dat meerdere clients via een Unix socket één server delen."""
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        address = f"unix:{os.path.join(tempdir.name, 'mcp.sock')}"
+        self._start_socket_server(address)
+        
+        clients = [MCPClient(), MCPClient()]
+        for client in clients:
+            self.assertTrue(client.connect_socket(address))
+            self.addCleanup(client.close)
+        
+        clients[0].initialize(timeout=5)
+        response = clients[1].call("tools/call", {"name": "echo", "arguments": {"message": "hoi"}}, timeout=5)
+        
+        self.assertEqual(response["result"]["content"][0]["text"], "hoi")
+        self.assertEqual(clients[0].server_info["serverInfo"]["name"], "mcp-demo-server")
+
+    @patch('src.mcp_client.log')
+    def test_socket_raw_passthrough(self, mock_log):
+        """Test de passthrough-modus: het antwoord komt als originele bytes terug."""
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        address = f"unix:{os.path.join(tempdir.name, 'mcp.sock')}"
+        self._start_socket_server(address)
+        
+        client = MCPClient(raw=True)
+        self.assertTrue(client.connect_socket(address))
+        self.addCleanup(client.close)
+        
+        client.initialize(timeout=5)
+        raw = client.call_raw("resources/read", {"uri": "demo://text/1"}, timeout=5)
+        response = client.call("ping", timeout=5)
+        
+        self.assertIsInstance(raw, bytes)
+        self.assertEqual(json.loads(raw)["result"]["contents"][0]["text"], "Inhoud van tekst 1")
+        self.assertEqual(response["result"], {})
+
+    @patch('src.mcp_client.log')
+    def test_socket_offload_decode(self, mock_log):
+        """Test dat grote berichten buiten de leesthread worden gedecodeerd en toch aankomen."""
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        address = f"unix:{os.path.join(tempdir.name, 'mcp.sock')}"
+        self._start_socket_server(address)
+        
+        client = MCPClient(decode_offload_threshold=1)  # Alles geldt als groot bericht
+        self.assertTrue(client.connect_socket(address))
+        self.addCleanup(client.close)
+        
+        client.initialize(timeout=5)
+        response = client.call("tools/list", timeout=5)
+        client._offload_decode(b'{"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}')
+        
+        self.assertEqual(len(response["result"]["tools"]), 2)
+        notification = client._response_queue.get(timeout=5)
+        self.assertEqual(notification["method"], "notifications/tools/list_changed")
+
+    @patch('src.mcp_client.log')
+    def test_read_resource_blob_streaming(self, mock_log):
+        """Test het stuksgewijs decoderen van een blob naar een bestand en een buffer."""
+        import hashlib
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        address = f"unix:{os.path.join(tempdir.name, 'mcp.sock')}"
+        self._start_socket_server(address)
+        client = MCPClient()
+        self.assertTrue(client.connect_socket(address))
+        self.addCleanup(client.close)
+        expected = bytes(range(256)) * 64
+        
+        path = os.path.join(tempdir.name, "blob.bin")
+        info = client.read_resource_blob("demo://blob/bytes", path, chunk_size=1000, timeout=5)
+        buffer = bytearray(len(expected))
+        client.read_resource_blob("demo://blob/bytes", buffer, timeout=5)
+        
+        self.assertEqual(Path(path).read_bytes(), expected)
+        self.assertEqual(bytes(buffer), expected)
+        self.assertEqual(info["size"], len(expected))
+        self.assertEqual(info["checksum"], hashlib.sha256(expected).hexdigest())
+        with self.assertRaises(CommunicationError):
+            client.read_resource_blob("demo://text/1", io.BytesIO(), timeout=5)
+        with self.assertRaises(CommunicationError):
+            client.read_resource_blob("demo://blob/bytes", bytearray(10), timeout=5)
+
+    @patch('src.mcp_client.log')
+    def test_socket_tcp_connection_lost(self, mock_log):
+        """Test dat een door de server gesloten TCP-verbinding direct wordt gemeld."""
+        import socket
+        listener = socket.create_server(("127.0.0.1", 0))
+        self.addCleanup(listener.close)
+        host, port = listener.getsockname()
+
+        def close_after_first_message():
+            connection, _ = listener.accept()
+            with connection:
+                connection.makefile("rb").readline()
+
+        threading.Thread(target=close_after_first_message, daemon=True).start()
+        client = MCPClient()
+        self.assertTrue(client.connect_socket(f"tcp://{host}:{port}"))
+        
+        with self.assertRaises(ConnectionError):
+            client.call("ping", timeout=5)
+        client.close()
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,7 +5,12 @@ import queue
 import io
 import os
 import threading
-from src.mcp_client import MCPClient, log, check_config, ConfigurationError, ConnectionError, CommunicationError
+import sys
+import time
+from src.mcp_client import (
+    MCPClient, log, check_config, ConfigurationError, ConnectionError, CommunicationError,
+    RequestTimeoutError, parse_socket_address, _iter_sse_events, _peek_response_id
+)
 
 class TestMCPClient(unittest.TestCase):
     """Test cases voor de MCPClient class."""
@@ -70,6 +75,17 @@ class TestMCPClient(unittest.TestCase):
                 log("DEBUG", "Test debug")
                 mock_print.assert_not_called()
                 
+    def test_log_function_formats_lazily(self):
+        """Test dat een bericht met args alleen wordt opgemaakt als de regel gelogd wordt."""
+        message = MagicMock()
+        message.__str__.return_value = "groot bericht"
+        with patch('src.mcp_client.current_log_level', 20):  # INFO niveau
+            with patch('builtins.print') as mock_print:
+                log("DEBUG", "Ontvangen: %s", message)
+                message.__str__.assert_not_called()
+                log("INFO", "Ontvangen: %s", message)
+                mock_print.assert_called_once_with("[INFO] Ontvangen: groot bericht")
+
     @patch('src.mcp_client.subprocess.Popen')
     def test_connect_stdio_success(self, mock_popen):
         """Test succesvolle verbinding via STDIO."""
@@ -119,26 +135,119 @@ class TestMCPClient(unittest.TestCase):
         self.assertFalse(result)
         self.assertIsNone(self.client.transport)
     
-    @patch('src.mcp_client.requests.get')
-    def test_connect_sse_success(self, mock_get):
+    @patch('src.mcp_client.requests.Session')
+    def test_connect_sse_success(self, mock_session_class):
         """Test succesvolle verbinding via SSE."""
-        # Mock de requests.get functie voor een succesvolle verbinding
+        # Mock de sessie: de stream stuurt een endpoint-event en blijft daarna open
+        stream_open = threading.Event()
+        self.addCleanup(stream_open.set)
+
+        def iter_lines():
+            yield b"event: endpoint"
+            yield b"data: /messages?session_id=abc123"
+            yield b""
+            stream_open.wait(5)
+
         mock_response = MagicMock()
         mock_response.status_code = 200
-        mock_get.return_value = mock_response
+        mock_response.iter_lines.side_effect = iter_lines
+        mock_session = mock_session_class.return_value
+        mock_session.get.return_value = mock_response
         
         result = self.client.connect_sse()
         
         # Controleer resultaten
         self.assertTrue(result)
         self.assertEqual(self.client.transport, "sse")
-        mock_get.assert_called_once_with(
+        # Er wordt precies één stream geopend
+        mock_session.get.assert_called_once_with(
             'http://test.server/sse', 
-            headers={'Authorization': 'Bearer test_api_key'}, 
+            headers={'Authorization': 'Bearer test_api_key', 'Accept': 'text/event-stream'}, 
             stream=True, 
-            timeout=5
+            timeout=(5, 300)
         )
-        
+        self.assertEqual(self.client.post_url, 'http://test.server/messages?session_id=abc123')
+        self.assertEqual(self.client.session_id, 'abc123')
+        self.client.close()
+
+    @patch('src.mcp_client.log')
+    @patch('src.mcp_client.requests.Session')
+    def test_sse_read_timeout_resumes_stream(self, mock_session_class, mock_log):
+        """Test dat een stille stream wordt hervat zonder openstaande verzoeken te laten mislukken."""
+        import requests
+        import urllib3
+        sent = []
+        posted = threading.Event()
+        stream_open = threading.Event()
+        self.addCleanup(stream_open.set)
+
+        def first_stream():
+            yield b"event: endpoint"
+            yield b"id: 1"
+            yield b"data: /messages?session_id=abc123"
+            yield b""
+            posted.wait(5)
+            # Zo meldt requests een read-time-out tijdens het lezen van de stream
+            raise requests.exceptions.ConnectionError(urllib3.exceptions.ReadTimeoutError(None, None, "Read timed out."))
+
+        def second_stream():
+            yield b"event: endpoint"
+            yield b"data: /messages?session_id=abc123"
+            yield b""
+            yield b"id: 2"
+            yield f'data: {{"jsonrpc": "2.0", "id": {sent[0]["id"]}, "result": {{"done": true}}}}'.encode()
+            yield b""
+            stream_open.wait(5)
+
+        responses = []
+        for stream in (first_stream, second_stream):
+            response = MagicMock()
+            response.status_code = 200
+            response.iter_lines.side_effect = stream
+            responses.append(response)
+        mock_session = mock_session_class.return_value
+        mock_session.get.side_effect = responses
+
+        def post(url, json=None, **kwargs):
+            sent.append(json)
+            posted.set()
+            return MagicMock(status_code=202)
+        mock_session.post.side_effect = post
+
+        client = MCPClient(heartbeat_interval=0)
+        self.assertTrue(client.connect_sse())
+        self.addCleanup(client.close)
+
+        response = client.call("tools/call", {"name": "slow"}, timeout=5)
+
+        self.assertEqual(response["result"], {"done": True})
+        self.assertEqual(mock_session.get.call_args[1]["headers"]["Last-Event-ID"], "1")
+
+    @patch('src.mcp_client.requests.Session')
+    def test_connect_sse_without_endpoint_event(self, mock_session_class):
+        """Test dat een server zonder endpoint-event niet op de time-out laat wachten."""
+        stream_open = threading.Event()
+        self.addCleanup(stream_open.set)
+
+        def iter_lines():
+            yield b'data: {"jsonrpc": "2.0", "method": "notifications/message", "params": {}}'
+            yield b""
+            stream_open.wait(5)
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_lines.side_effect = iter_lines
+        mock_session_class.return_value.get.return_value = mock_response
+
+        client = MCPClient(heartbeat_interval=0, sse_endpoint_timeout=30)
+        started = time.monotonic()
+        self.assertTrue(client.connect_sse())
+        self.addCleanup(client.close)
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertIsNone(client.post_url)
+        self.assertTrue(client._sse_legacy)
+
     def test_connect_sse_failure_no_url(self):
         """Test verbindingsfout via SSE bij ontbrekende URL."""
         # Test met een lege URL
@@ -158,11 +267,11 @@ class TestMCPClient(unittest.TestCase):
         self.assertFalse(result)
         self.assertIsNone(self.client.transport)
 
-    @patch('src.mcp_client.requests.get')
-    def test_connect_sse_request_exception(self, mock_get):
+    @patch('src.mcp_client.requests.Session')
+    def test_connect_sse_request_exception(self, mock_session_class):
         """Test verbindingsfout via SSE bij request exception."""
-        # Mock de requests.get functie om een exception te werpen
-        mock_get.side_effect = Exception("Test exception")
+        # Mock het openen van de stream om een exception te werpen
+        mock_session_class.return_value.get.side_effect = Exception("Test exception")
         
         result = self.client.connect_sse()
         
@@ -214,5 +323,313 @@ class TestMCPClient(unittest.TestCase):
         self.assertIsNone(self.client.transport)
         self.assertIsNone(self.client.connection)
 
+    def _mock_http_response(self, status_code=200, content_type="application/json",
+                            body=b"", lines=None, session_id=None):
+        """Maakt een gemockt Streamable HTTP-antwoord."""
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = {"Content-Type": content_type}
+        if session_id:
+            response.headers["Mcp-Session-Id"] = session_id
+        response.content = body
+        response.iter_lines.return_value = lines or []
+        response.__enter__.return_value = response
+        return response
+
+    @patch('src.mcp_client.requests.Session')
+    def test_http_json_response_and_session(self, mock_session_class):
+        """Test Streamable HTTP met een JSON-antwoord en sessie-id."""
+        mock_session = mock_session_class.return_value
+        mock_session.post.side_effect = [
+            self._mock_http_response(
+                body=b'{"jsonrpc": "2.0", "id": 1, "result": {"protocolVersion": "2024-11-05"}}',
+                session_id="sess-1"),
+            self._mock_http_response(status_code=202),
+            self._mock_http_response(body=b'{"jsonrpc": "2.0", "id": 2, "result": {}}'),
+        ]
+        self.assertTrue(self.client.connect_http("http://test.server/mcp"))
+
+        self.client.initialize()
+        response = self.client.call("ping")
+
+        self.assertEqual(response["result"], {})
+        self.assertEqual(self.client.session_id, "sess-1")
+        # Het sessie-id gaat mee met volgende verzoeken
+        _, kwargs = mock_session.post.call_args
+        self.assertEqual(kwargs["headers"]["Mcp-Session-Id"], "sess-1")
+        self.assertEqual(mock_session.post.call_args[0][0], "http://test.server/mcp")
+
+    @patch('src.mcp_client.requests.Session')
+    def test_http_event_stream_response(self, mock_session_class):
+        """Test Streamable HTTP met een SSE-stream als antwoord op een POST."""
+        mock_session = mock_session_class.return_value
+        mock_session.post.return_value = self._mock_http_response(
+            content_type="text/event-stream",
+            lines=[b'data: {"jsonrpc": "2.0", "method": "notifications/progress", "params": {}}', b"",
+                   b'data: {"jsonrpc": "2.0", "id": 1, "result": {"ok": true}}', b""])
+        self.assertTrue(self.client.connect_http("http://test.server/mcp"))
+
+        response = self.client.call("tools/call", {"name": "slow"})
+
+        self.assertEqual(response["result"], {"ok": True})
+        notification = self.client._response_queue.get_nowait()
+        self.assertEqual(notification["method"], "notifications/progress")
+
+    @patch('src.mcp_client.log')
+    @patch('src.mcp_client.requests.Session')
+    def test_http_expired_session(self, mock_session_class, mock_log):
+        """Test dat een verlopen HTTP-sessie als ConnectionError wordt gemeld."""
+        mock_session = mock_session_class.return_value
+        mock_session.post.return_value = self._mock_http_response(status_code=404)
+        self.assertTrue(self.client.connect_http("http://test.server/mcp"))
+        self.client.session_id = "old"
+
+        with self.assertRaises(ConnectionError):
+            self.client.call("ping")
+        self.assertIsNone(self.client.session_id)
+
+        self.client.close()
+        mock_session.delete.assert_not_called()
+        mock_session.close.assert_called_once()
+
+    @patch('src.mcp_client.log')
+    @patch('src.mcp_client.requests.Session')
+    def test_http_session_persisted_and_resumed(self, mock_session_class, mock_log):
+        """Test dat een bewaarde HTTP-sessie in een nieuwe client zonder handshake wordt hervat."""
+        import tempfile
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        session_file = os.path.join(tempdir.name, "session.json")
+        mock_session = mock_session_class.return_value
+        mock_session.post.side_effect = [
+            self._mock_http_response(
+                body=b'{"jsonrpc": "2.0", "id": 1, "result": {"protocolVersion": "2024-11-05"}}',
+                session_id="sess-1"),
+            self._mock_http_response(status_code=202),
+            self._mock_http_response(body=b'{"jsonrpc": "2.0", "id": 1, "result": {}}'),
+        ]
+        first = MCPClient(session_file=session_file)
+        self.assertTrue(first.connect_http("http://test.server/mcp"))
+        first.initialize()
+        first.close()
+        # De sessie blijft bestaan voor het volgende proces
+        mock_session.delete.assert_not_called()
+
+        second = MCPClient(session_file=session_file)
+        self.assertTrue(second.connect_http("http://test.server/mcp"))
+        response = second.initialize()
+        second.call("ping")
+
+        self.assertEqual(response["result"], {"protocolVersion": "2024-11-05"})
+        self.assertEqual(mock_session.post.call_count, 3)
+        _, kwargs = mock_session.post.call_args
+        self.assertEqual(kwargs["headers"]["Mcp-Session-Id"], "sess-1")
+
+    @patch('src.mcp_client.log')
+    @patch('src.mcp_client.requests.Session')
+    def test_http_expired_session_renewed(self, mock_session_class, mock_log):
+        """Test dat een verlopen sessie na een eerdere handshake automatisch wordt vernieuwd."""
+        mock_session = mock_session_class.return_value
+        mock_session.post.side_effect = [
+            self._mock_http_response(
+                body=b'{"jsonrpc": "2.0", "id": 1, "result": {}}', session_id="sess-1"),
+            self._mock_http_response(status_code=202),
+            self._mock_http_response(status_code=404),
+            self._mock_http_response(
+                body=b'{"jsonrpc": "2.0", "id": 3, "result": {}}', session_id="sess-2"),
+            self._mock_http_response(status_code=202),
+            self._mock_http_response(body=b'{"jsonrpc": "2.0", "id": 2, "result": {"ok": true}}'),
+        ]
+        self.assertTrue(self.client.connect_http("http://test.server/mcp"))
+        self.client.initialize()
+
+        response = self.client.call("tools/list")
+
+        self.assertEqual(response["result"], {"ok": True})
+        self.assertEqual(self.client.session_id, "sess-2")
+
+    def test_sse_resume_sends_last_event_id(self):
+        """Test dat een herverbinding de stream hervat vanaf het laatste event-id."""
+        session = MagicMock()
+        self.client._open_sse_stream(session, "http://test.server/sse", {}, last_event_id="42")
+        _, kwargs = session.get.call_args
+        self.assertEqual(kwargs["headers"]["Last-Event-ID"], "42")
+
+    def test_parse_socket_address(self):
+        """Test het omzetten van socketadressen."""
+        import socket
+        self.assertEqual(parse_socket_address("unix:/tmp/mcp.sock"), (socket.AF_UNIX, "/tmp/mcp.sock"))
+        self.assertEqual(parse_socket_address("/tmp/mcp.sock"), (socket.AF_UNIX, "/tmp/mcp.sock"))
+        self.assertEqual(parse_socket_address("tcp://localhost:9000"), (socket.AF_INET, ("localhost", 9000)))
+        with self.assertRaises(ConfigurationError):
+            parse_socket_address("localhost")
+
+    @patch('src.mcp_client.log')
+    def test_connect_socket_refused(self, mock_log):
+        """Test verbindingsfout bij een socket waar niemand luistert."""
+        result = self.client.connect_socket("unix:/nonexistent/mcp.sock")
+        self.assertFalse(result)
+        self.assertIsNone(self.client.transport)
+
+    def test_sse_events_parsed(self):
+        """Test het groeperen van SSE-regels tot events."""
+        lines = [b"event: endpoint", b"data: /messages", b"", b": ping", b"",
+                 b"id: 7", b"data: {\"a\":", b"data: 1}", b""]
+        events = list(_iter_sse_events(lines))
+        self.assertEqual(events, [("endpoint", "/messages", None), ("message", '{"a":\n1}', "7")])
+
+    def test_peek_response_id(self):
+        """Test het goedkoop uitlezen van het id uit een ruw antwoord."""
+        self.assertEqual(_peek_response_id('{"jsonrpc": "2.0", "id": 12, "result": {}}'), 12)
+        self.assertEqual(_peek_response_id(b'{"result": {"id": 3}, "id": "abc"}'), "abc")
+        # Een genest id zonder id op het hoogste niveau wordt niet herkend
+        self.assertIsNone(_peek_response_id(b'{"result": {"id": 3}}'))
+        # Berichten met een methode worden altijd volledig gedecodeerd
+        self.assertIsNone(_peek_response_id('{"jsonrpc": "2.0", "id": 1, "method": "ping"}'))
+
+    def test_raw_passthrough(self):
+        """Test dat een antwoord in de passthrough-modus ongewijzigd wordt doorgegeven."""
+        client = MCPClient(raw=True)
+        client.transport = "stdio"
+        raw = '{"jsonrpc": "2.0", "id": 1, "result": {"tools": []}}'
+        notification = '{"jsonrpc": "2.0", "method": "notifications/progress"}'
+
+        def reply(message, timeout=None):
+            client._dispatch_raw(notification)
+            client._dispatch_raw(raw)
+
+        with patch.object(client, '_send_message', side_effect=reply):
+            self.assertIs(client.call_raw("tools/list", timeout=1), raw)
+        # Notificaties worden wel gedecodeerd
+        self.assertEqual(client._response_queue.get_nowait()["method"], "notifications/progress")
+
+    def test_responses_routed_by_id(self):
+        """Test dat antwoorden op id bij het juiste wachtende verzoek terechtkomen."""
+        self.client.transport = "stdio"
+        sent = []
+        results = {}
+
+        def call(method):
+            results[method] = self.client.call(method, timeout=2)
+
+        with patch.object(self.client, '_send_message',
+                          side_effect=lambda message, timeout=None: sent.append(message)):
+            threads = [threading.Thread(target=call, args=(m,)) for m in ("first", "second")]
+            for thread in threads:
+                thread.start()
+            while len(sent) < 2:
+                time.sleep(0.01)
+            # Beantwoord in omgekeerde volgorde
+            for message in reversed(sent):
+                self.client._dispatch({"jsonrpc": "2.0", "id": message["id"], "result": message["method"]})
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results["first"]["result"], "first")
+        self.assertEqual(results["second"]["result"], "second")
+
+    def test_notification_goes_to_queue(self):
+        """Test dat berichten zonder wachtend verzoek in de response queue komen."""
+        notification = {"jsonrpc": "2.0", "method": "notifications/progress", "params": {}}
+        self.client._dispatch(notification)
+        self.assertEqual(self.client._response_queue.get_nowait(), notification)
+
+    def test_call_timeout(self):
+        """Test dat call een RequestTimeoutError geeft als er geen antwoord komt."""
+        self.client.transport = "stdio"
+        with patch.object(self.client, '_send_message'):
+            with self.assertRaises(RequestTimeoutError):
+                self.client.call("slow", timeout=0.05)
+        self.assertEqual(self.client._pending, {})
+
+    @patch('src.mcp_client.log')
+    def test_call_timeout_http(self, mock_log):
+        """Test dat de time-out per verzoek ook bij Streamable HTTP geldt, zonder failover."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class SlowHandler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                message = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(message.get("params", {}).get("delay", 0))
+                body = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": {}}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        servers = [ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler) for _ in range(2)]
+        for server in servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.addCleanup(server.server_close)
+            self.addCleanup(server.shutdown)
+        urls = [f"http://127.0.0.1:{server.server_address[1]}/mcp" for server in servers]
+
+        client = MCPClient(request_timeout=0.2, heartbeat_interval=0)
+        self.assertTrue(client.connect_http(urls))
+        self.addCleanup(client.close)
+        self.assertEqual(client.call("slow", {"delay": 0.5}, timeout=5)["result"], {})
+        url = client.post_url
+
+        with self.assertRaises(RequestTimeoutError):
+            client.call("slow", {"delay": 0.5}, timeout=0.1)
+        # Een traag antwoord is geen endpointstoring
+        self.assertEqual(client.post_url, url)
+        self.assertEqual(client.call("slow", timeout=5)["result"], {})
+
+    @patch('src.mcp_client.log')
+    def test_connection_lost_fails_pending_immediately(self, mock_log):
+        """Test dat openstaande verzoeken direct mislukken als de verbinding wegvalt."""
+        self.client.transport = "stdio"
+        errors = []
+
+        def call():
+            try:
+                self.client.call("slow", timeout=10)
+            except ConnectionError as e:
+                errors.append(e)
+
+        with patch.object(self.client, '_send_message'):
+            thread = threading.Thread(target=call)
+            thread.start()
+            while not self.client._pending:
+                time.sleep(0.01)
+            started = time.monotonic()
+            self.client._connection_lost("Proces gestopt")
+            thread.join(timeout=2)
+
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(len(errors), 1)
+        # Nieuwe verzoeken worden direct geweigerd
+        response = self.client.send_request("next")
+        self.assertEqual(response, {"error": "Proces gestopt"})
+
+    @patch('src.mcp_client.log')
+    def test_process_exit_detected(self, mock_log):
+        """Test dat een stoppend lokaal proces binnen een seconde wordt gedetecteerd."""
+        command = f"{sys.executable} -c __import__('time').sleep(0.2)"
+        self.assertTrue(self.client.connect_stdio(command))
+        started = time.monotonic()
+        with self.assertRaises(ConnectionError):
+            self.client.call("ping", timeout=10)
+        self.assertLess(time.monotonic() - started, 2)
+        self.client.close()
+
+    @patch('src.mcp_client.log')
+    def test_heartbeat_detects_unresponsive_server(self, mock_log):
+        """Test dat een uitblijvend hartslag-antwoord de verbinding als verbroken markeert."""
+        client = MCPClient(heartbeat_interval=0.05, heartbeat_timeout=0.05)
+        client.transport = "stdio"
+        with patch.object(client, '_send_message'):
+            client._start_heartbeat()
+            deadline = time.monotonic() + 2
+            while client._connection_error is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            client._stop_event.set()
+        self.assertIsInstance(client._connection_error, ConnectionError)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+from unittest.mock import patch
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.mcp_client import MCPClient
+from src.params import RawParams, iter_message
+from src.traffic import TrafficRecorder, load_capture
+
+
+def _read_body(handler):
+    """Leest een request body, ook met Transfer-Encoding: chunked."""
+    if handler.headers.get("Transfer-Encoding") != "chunked":
+        return handler.rfile.read(int(handler.headers["Content-Length"]))
+    body = b""
+    while True:
+        size = int(handler.rfile.readline().strip(), 16)
+        body += handler.rfile.read(size)
+        handler.rfile.readline()
+        if size == 0:
+            return body
+
+
+class _EchoHandler(BaseHTTPRequestHandler):
+    """Streamable HTTP-server die de parameters van elk verzoek teruggeeft."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.server.framing.append("chunked" if "Transfer-Encoding" in self.headers else "length")
+        body = _read_body(self)
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        message = json.loads(body)
+        payload = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": message["params"]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class TestRawParams(unittest.TestCase):
+    """Test cases voor al gecodeerde parameters."""
+
+    params = {"name": "echo", "arguments": {"message": "regel 1\nregel 2"}}
+
+    def setUp(self):
+        """Set up voor elke test."""
+        patcher = patch('src.mcp_client.log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.path = os.path.join(tempdir.name, "params.json")
+        # Ingesprongen, met een UTF-8 BOM: regeleinden en BOM horen niet in het bericht
+        with open(self.path, "w", encoding="utf-8-sig") as f:
+            json.dump(self.params, f, indent=2)
+
+    def _raw_params(self):
+        params = RawParams.from_file(self.path)
+        self.addCleanup(params.close)
+        return params
+
+    def test_message_encoding(self):
+        """Test dat het bericht zonder parsen wordt samengesteld, ook als één regel."""
+        message = {"jsonrpc": "2.0", "id": 7, "method": "tools/call", "params": self._raw_params()}
+
+        encoded = b"".join(iter_message(message))
+        single_line = b"".join(iter_message(message, single_line=True))
+
+        expected = dict(message, params=self.params)
+        self.assertEqual(json.loads(encoded), expected)
+        self.assertEqual(json.loads(single_line), expected)
+        self.assertNotIn(b"\n", single_line)
+        self.assertEqual(message["params"].decode(), self.params)
+
+    def test_invalid_params(self):
+        """Test dat lege bestanden en parameters zonder object of array worden geweigerd."""
+        for content in (b"", b"  \n", b'"tekst"'):
+            with self.subTest(content=content):
+                with open(self.path, "wb") as f:
+                    f.write(content)
+                with self.assertRaises(ValueError):
+                    RawParams.from_file(self.path)
+
+    def test_recorded_without_parsing(self):
+        """Test dat een opname de parameters ongeparst wegschrijft en weer leesbaar is."""
+        capture = self.path + ".traffic"
+        recorder = TrafficRecorder(capture)
+        message = {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": self._raw_params()}
+        with patch.object(RawParams, "decode", side_effect=AssertionError("geparst")):
+            recorder.record(">", message)
+        recorder.close()
+
+        [session] = load_capture(capture)
+        self.assertEqual(session[0][1:], (">", dict(message, params=self.params)))
+
+    def test_stdio_and_inproc(self):
+        """Test dat een lokaal proces en een in-process server dezelfde parameters ontvangen."""
+        local = MCPClient()
+        self.assertTrue(local.connect_stdio(f"{sys.executable} -m src.demo_server"))
+        self.addCleanup(local.close)
+        inproc = MCPClient()
+        self.assertTrue(inproc.connect_inproc("src.demo_server:DemoServer"))
+        self.addCleanup(inproc.close)
+
+        for client in (local, inproc):
+            with self.subTest(transport=client.transport):
+                response = client.call("tools/call", self._raw_params(), timeout=10)
+                self.assertEqual(response["result"]["content"][0]["text"], "regel 1\nregel 2")
+                # Het volgende bericht komt nog steeds los aan
+                self.assertEqual(client.call("ping", timeout=10)["result"], {})
+
+    def test_http_streamed_body(self):
+        """Test dat de body via HTTP gestreamd wordt, met bekende lengte of gecomprimeerd."""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _EchoHandler)
+        server.framing = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = f"http://127.0.0.1:{server.server_address[1]}/mcp"
+
+        for mode in ("off", "gzip"):
+            client = MCPClient(request_compression=mode, compression_threshold=10, heartbeat_interval=0)
+            self.assertTrue(client.connect_http(url))
+            self.addCleanup(client.close)
+            self.assertEqual(client.call("echo", self._raw_params(), timeout=10)["result"], self.params)
+
+        self.assertEqual(server.framing, ["length", "chunked"])
+        self.assertEqual(client.compression.stats()["requests_compressed"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
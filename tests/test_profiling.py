@@ -0,0 +1,53 @@
+import unittest
+from unittest.mock import patch
+import os
+import pstats
+import tempfile
+from src.mcp_client import MCPClient
+from src.profiling import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    """Test cases voor de Profiler class."""
+
+    def test_summary_aggregates_phases(self):
+        """Test dat metingen per fase worden samengevoegd."""
+        profiler = Profiler()
+        profiler.record("connect", 0.5)
+        profiler.record("tools/list: wait", 0.1)
+        profiler.record("tools/list: wait", 0.3)
+
+        summary = profiler.summary()
+
+        self.assertEqual(list(summary), ["connect", "tools/list: wait"])
+        self.assertEqual(summary["tools/list: wait"]["count"], 2)
+        self.assertAlmostEqual(summary["tools/list: wait"]["mean"], 0.2)
+        self.assertAlmostEqual(summary["tools/list: wait"]["max"], 0.3)
+        self.assertIn("tools/list: wait", profiler.format_summary())
+
+    def test_cprofile_dump(self):
+        """Test dat cProfile-statistieken als pstats-bestand worden weggeschreven."""
+        profiler = Profiler()
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = os.path.join(tempdir, "profile.pstats")
+            profiler.start_cprofile()
+            sum(range(1000))
+            profiler.stop_cprofile(path)
+            self.assertGreater(pstats.Stats(path).total_calls, 0)
+
+    @patch('src.mcp_client.log')
+    def test_client_records_phases(self, mock_log):
+        """Test dat een client met profile=True handshake en verzoeken meet."""
+        client = MCPClient(profile=True)
+        self.assertTrue(client.connect_inproc("src.demo_server:DemoServer", serialize=True))
+        client.initialize()
+        client.call("tools/list")
+        client.close()
+
+        summary = client.profiler.summary()
+        for phase in ("initialize", "tools/list: send", "tools/list: wait"):
+            self.assertIn(phase, summary)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from src.mcp_client import MCPClient
+from src.mcp_proxy import MCPProxy, create_socket_server, create_http_server
+
+
+class TestMCPProxy(unittest.TestCase):
+    """Test cases voor de multiplexende proxy."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        for target in ('src.mcp_client.log', 'src.mcp_proxy.log'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.upstream = MCPClient()
+        self.assertTrue(self.upstream.connect_inproc("src.demo_server:DemoServer"))
+        self.proxy = MCPProxy([self.upstream], cache=True)
+        self.proxy.start()
+        self.addCleanup(self.proxy.close)
+
+    def _serve(self, server):
+        """Start een server van de proxy in een achtergrondthread."""
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+    def _socket_client(self):
+        """Start de proxy op een Unix socket en verbindt een downstream client."""
+        if not hasattr(self, "address"):
+            tempdir = tempfile.TemporaryDirectory()
+            self.addCleanup(tempdir.cleanup)
+            self.address = f"unix:{os.path.join(tempdir.name, 'proxy.sock')}"
+            self._serve(create_socket_server(self.proxy, self.address))
+        client = MCPClient()
+        self.assertTrue(client.connect_socket(self.address))
+        self.addCleanup(client.close)
+        return client
+
+    def test_ids_rewritten_per_client(self):
+        """Test dat gelijke ids van verschillende clients bij de juiste client terugkomen."""
+        clients = [self._socket_client(), self._socket_client()]
+        results = {}
+
+        def call(index):
+            arguments = {"message": f"client {index}"}
+            results[index] = clients[index].call("tools/call", {"name": "echo", "arguments": arguments}, timeout=5)
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        for index in range(2):
+            self.assertEqual(results[index]["id"], 1)
+            self.assertEqual(results[index]["result"]["content"][0]["text"], f"client {index}")
+
+    def test_handshake_and_cache(self):
+        """Test dat de proxy de handshake zelf afhandelt en list-resultaten deelt."""
+        first, second = self._socket_client(), self._socket_client()
+        first.initialize(timeout=5)
+        self.assertEqual(first.server_info["serverInfo"]["name"], "mcp-demo-server")
+
+        first.call("tools/list", timeout=5)
+        response = second.call("tools/list", timeout=5)
+
+        self.assertEqual(len(response["result"]["tools"]), 2)
+        self.assertEqual(self.proxy.stats["cache_hits"], 1)
+
+    def test_notifications_broadcast_and_invalidate(self):
+        """Test dat upstream notificaties worden doorgegeven en de cache legen."""
+        client = self._socket_client()
+        client.call("tools/list", timeout=5)
+        self.assertTrue(self.proxy._cache)
+
+        self.upstream._dispatch({"jsonrpc": "2.0", "method": "notifications/tools/list_changed"})
+
+        notification = client._response_queue.get(timeout=5)
+        self.assertEqual(notification["method"], "notifications/tools/list_changed")
+        deadline = time.monotonic() + 2
+        while self.proxy._cache and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertFalse(self.proxy._cache)
+
+    def test_http_downstream(self):
+        """Test een downstream client via Streamable HTTP."""
+        http_server = create_http_server(self.proxy)
+        self._serve(http_server)
+        client = MCPClient()
+        host, port = http_server.server_address
+        self.assertTrue(client.connect_http(f"http://{host}:{port}/mcp"))
+        self.addCleanup(client.close)
+
+        client.initialize(timeout=5)
+        response = client.call("tools/call", {"name": "add", "arguments": {"a": 2, "b": 3}}, timeout=5)
+
+        self.assertEqual(response["result"]["content"][0]["text"], "5")
+
+
+    def _controlled_proxy(self):
+        """Maakt een proxy met een upstream die 'slow' pas beantwoordt na self.release.
+
+        Bij 'slow' stuurt de upstream eerst voortgang met het ontvangen progressToken en de
+        waarde van het argument 'n'. Alle ontvangen berichten komen in self.received.
+        """
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.received = []
+        upstream = MCPClient()
+
+        def handler(message):
+            self.received.append(message)
+            if "id" not in message:
+                return None
+            params = message.get("params") or {}
+            if params.get("name") != "slow":
+                return {"jsonrpc": "2.0", "id": message["id"], "result": {}}
+
+            def respond():
+                upstream._dispatch({"jsonrpc": "2.0", "method": "notifications/progress", "params": {
+                    "progressToken": params["_meta"]["progressToken"], "progress": params["arguments"]["n"]}})
+                self.release.wait(5)
+                upstream._dispatch({"jsonrpc": "2.0", "id": message["id"], "result": {"done": True}})
+            threading.Thread(target=respond, daemon=True).start()
+
+        self.assertTrue(upstream.connect_inproc(handler))
+        upstream.server_info = {"serverInfo": {"name": "controlled"}}
+        proxy = MCPProxy([upstream])
+        proxy.start()
+        self.addCleanup(proxy.close)
+        return proxy
+
+    def test_progress_routed_to_own_client(self):
+        """Test dat voortgang met hetzelfde token alleen bij de client van het verzoek komt."""
+        self.proxy = self._controlled_proxy()
+        clients = [self._socket_client(), self._socket_client()]
+        threads = []
+        for n, client in enumerate(clients, 1):
+            params = {"name": "slow", "arguments": {"n": n}, "_meta": {"progressToken": 1}}
+            threads.append(threading.Thread(target=client.call, args=("tools/call", params, 5)))
+            threads[-1].start()
+
+        progress = [client.next_notification(timeout=5) for client in clients]
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        for n, message in enumerate(progress, 1):
+            self.assertEqual(message["params"], {"progressToken": 1, "progress": n})
+        self.assertTrue(all(client.next_notification(timeout=0.2) is None for client in clients))
+        upstream_tokens = {m["params"]["_meta"]["progressToken"] for m in self.received if "id" in m}
+        self.assertEqual(len(upstream_tokens), 2)
+        self.assertFalse(self.proxy._progress)
+
+    def test_cancel_rewritten_to_upstream_id(self):
+        """Test dat een annulering het upstream id van het verzoek krijgt."""
+        self.proxy = self._controlled_proxy()
+        client = self._socket_client()
+        for _ in range(3):
+            client.new_request_id()  # Zodat het downstream id afwijkt van het upstream id
+        request_id = client.new_request_id()
+        params = {"name": "slow", "arguments": {"n": 1}, "_meta": {"progressToken": "p"}}
+        thread = threading.Thread(target=client.call, args=("tools/call", params, 5),
+                                  kwargs={"request_id": request_id})
+        thread.start()
+        client.next_notification(timeout=5)  # De voortgang: het verzoek is nu upstream
+
+        client.notify("notifications/cancelled", {"requestId": request_id, "reason": "gestopt"})
+        client.notify("notifications/cancelled", {"requestId": 999})
+        deadline = time.monotonic() + 5
+        while len(self.received) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.release.set()
+        thread.join(5)
+
+        upstream_request, cancel = self.received[:2]
+        self.assertNotEqual(upstream_request["id"], request_id)
+        self.assertEqual(cancel, {"jsonrpc": "2.0", "method": "notifications/cancelled",
+                                  "params": {"requestId": upstream_request["id"], "reason": "gestopt"}})
+        self.assertEqual(len(self.received), 2)
+
+    def test_stdio_stdout_only_protocol(self):
+        """Test dat in de STDIO-modus alleen JSON-RPC berichten op STDOUT staan (logs op STDERR)."""
+        requests = [
+            {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+            {"jsonrpc": "2.0", "id": 3, "method": "tools/call",
+             "params": {"name": "echo", "arguments": {"message": "hoi"}}},
+        ]
+        result = subprocess.run(
+            [sys.executable, "-m", "src.mcp_proxy", "--upstream", f"{sys.executable} -m src.demo_server"],
+            input="".join(json.dumps(request) + "\n" for request in requests),
+            capture_output=True, text=True, timeout=30,
+            env=dict(os.environ, LOG_LEVEL="DEBUG"),
+        )
+
+        messages = [json.loads(line) for line in result.stdout.splitlines()]
+        self.assertTrue(all(message.get("jsonrpc") == "2.0" for message in messages))
+        self.assertEqual(sorted(message["id"] for message in messages if "id" in message), [1, 2, 3])
+        self.assertIn("[INFO]", result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+from unittest.mock import patch
+import io
+import threading
+import time
+from src.mcp_client import MCPClient
+from src.repl import InteractiveSession
+
+
+class TestInteractiveSession(unittest.TestCase):
+    """Test cases voor de niet-blokkerende interactieve modus."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        for target in ('src.mcp_client.log', 'src.repl.log'):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.client = MCPClient()
+
+        def handler(message):
+            # 'slow' antwoordt pas na release, vanuit een andere thread (zoals een echte server)
+            if message["method"] != "slow":
+                return {"jsonrpc": "2.0", "id": message["id"], "result": message.get("params")}
+
+            def respond():
+                self.release.wait(5)
+                self.client._dispatch({"jsonrpc": "2.0", "id": message["id"], "result": {"done": True}})
+            threading.Thread(target=respond, daemon=True).start()
+
+        self.assertTrue(self.client.connect_inproc(handler))
+        self.addCleanup(self.client.close)
+        self.output = io.StringIO()
+        self.session = InteractiveSession(self.client, output=self.output)
+
+    def _wait_for(self, text):
+        """Wacht tot de tekst in de uitvoer staat."""
+        deadline = time.monotonic() + 5
+        while text not in self.output.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIn(text, self.output.getvalue())
+
+    def test_commands_do_not_block(self):
+        """Test dat een volgend commando antwoord krijgt terwijl een traag verzoek loopt."""
+        self.session.handle_line("slow {}")
+        self.session.handle_line("ping")
+        self._wait_for("[#2] ping:")
+
+        self.assertNotIn("[#1] slow:", self.output.getvalue())
+        self.assertEqual(self.session.running(), [(1, "slow")])
+        self.release.set()
+        self.session.wait()
+        self.assertIn('"done": true', self.output.getvalue())
+
+    def test_progress_notifications_live(self):
+        """Test dat voortgang direct wordt getoond met het handle van het verzoek."""
+        inputs = iter(['tools/call {"name": "echo", "arguments": {}}'])
+
+        def read(prompt):
+            line = next(inputs, None)
+            if line is None:
+                self.client._dispatch({"jsonrpc": "2.0", "method": "notifications/progress",
+                                       "params": {"progressToken": 1, "progress": 1, "total": 4}})
+                self._wait_for("voortgang")
+                raise EOFError
+            return line
+
+        self.session.run(input_func=read)
+
+        output = self.output.getvalue()
+        self.assertIn("[#1] tools/call verstuurd\n", output)
+        self.assertIn("[#1] voortgang: 1/4", output)
+        self.assertIn('"progressToken": 1', output)
+        self.assertIn("Einde van input (EOF)", output)
+
+    def test_list_params_and_output_format(self):
+        """Test dat lijst-parameters werken en antwoorden via het gekozen uitvoerformaat gaan."""
+        session = InteractiveSession(self.client, output=self.output, output_format="compact")
+        session.handle_line('tools/list ["a", "b"]')
+        session.wait()
+
+        self.assertIn('[#1] tools/list:\n{"jsonrpc":"2.0","id":', self.output.getvalue())
+        self.assertIn('"result":["a","b"]}', self.output.getvalue())
+
+    def test_completions(self):
+        """Test het aanvullen van methoden en toolnamen."""
+        self.session._remember_tools({"result": {"tools": [{"name": "echo"}, {"name": "add"}]}})
+
+        self.assertEqual(self.session.completions("tools/l", "tools/l"), ["tools/list"])
+        self.assertEqual(self.session.completions("tools/call e", "e"), ['{"name": "echo", "arguments": {'])
+        self.assertEqual(self.session.completions('tools/call {"name": "a', '"a'), ['"add"'])
+        self.assertEqual(self.session.completions("ping x", "x"), [])
+
+    def test_tools_refreshed_after_initialize(self):
+        """Test dat tools/list voor het aanvullen pas na een geslaagde handshake wordt verstuurd."""
+        from src.demo_server import DemoServer
+        server = DemoServer()
+        methods = []
+
+        def handler(message):
+            methods.append(message["method"])
+            return server.handle_message(message)
+
+        client = MCPClient()
+        self.assertTrue(client.connect_inproc(handler))
+        self.addCleanup(client.close)
+        session = InteractiveSession(client, output=self.output)
+        inputs = iter(["initialize"])
+
+        def read(prompt):
+            line = next(inputs, None)
+            if line is None:
+                raise EOFError
+            return line
+
+        session.run(input_func=read)
+
+        self.assertEqual(methods, ["initialize", "notifications/initialized", "tools/list"])
+        self.assertIn("echo", session._tool_names)
+
+
+if __name__ == '__main__':
+    unittest.main()
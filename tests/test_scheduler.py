@@ -0,0 +1,143 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import threading
+import time
+from src.mcp_client import MCPClient, RateLimitError, RequestTimeoutError
+from src.scheduler import TokenBucket, RequestScheduler
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test cases voor de TokenBucket class."""
+
+    def test_burst_then_rate(self):
+        """Test dat de bucket eerst de burst toelaat en daarna op het tempo aanvult."""
+        bucket = TokenBucket(rate=10, burst=2)
+        now = time.monotonic()
+        for _ in range(2):
+            self.assertEqual(bucket.delay(now), 0)
+            bucket.consume()
+        self.assertAlmostEqual(bucket.delay(now), 0.1, places=2)
+
+    def test_unlimited_bucket_pauses(self):
+        """Test dat een bucket zonder limiet alleen na een pauze wacht."""
+        bucket = TokenBucket(rate=None)
+        self.assertEqual(bucket.delay(), 0)
+        bucket.pause(5)
+        self.assertGreater(bucket.delay(), 4)
+
+
+class TestRequestScheduler(unittest.TestCase):
+    """Test cases voor de RequestScheduler class."""
+
+    def test_interactive_before_bulk(self):
+        """Test dat wachtende interactieve verzoeken voor bulkverzoeken gaan."""
+        scheduler = RequestScheduler(max_in_flight=1)
+        scheduler.acquire("tools/list")
+        order = []
+
+        def worker(name, lane):
+            scheduler.acquire("tools/call", lane)
+            order.append(name)
+            scheduler.release()
+
+        bulk = threading.Thread(target=worker, args=("bulk", "bulk"))
+        bulk.start()
+        time.sleep(0.05)
+        interactive = threading.Thread(target=worker, args=("interactive", "interactive"))
+        interactive.start()
+        time.sleep(0.05)
+        scheduler.release()
+        bulk.join(2)
+        interactive.join(2)
+
+        self.assertEqual(order, ["interactive", "bulk"])
+        stats = scheduler.stats()
+        self.assertEqual(stats["bulk"]["requests"], 1)
+        self.assertEqual(stats["interactive"]["requests"], 2)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_max_in_flight_timeout(self):
+        """Test dat een verzoek een time-out krijgt als alle plekken bezet blijven."""
+        scheduler = RequestScheduler(max_in_flight=1)
+        scheduler.acquire("ping")
+        with self.assertRaises(RequestTimeoutError):
+            scheduler.acquire("ping", timeout=0.05)
+        self.assertEqual(scheduler.stats()["interactive"]["queued"], 0)
+
+    def test_method_rate(self):
+        """Test dat een limiet per methode andere methoden niet afremt."""
+        scheduler = RequestScheduler(method_rates={"tools/call": 1})
+        scheduler.acquire("tools/call")
+        scheduler.release()
+        with self.assertRaises(RequestTimeoutError):
+            scheduler.acquire("tools/call", timeout=0.05)
+        scheduler.acquire("tools/list", timeout=0.05)
+        scheduler.release()
+
+    def test_unknown_lane(self):
+        """Test dat een onbekende prioriteitsbaan wordt geweigerd."""
+        with self.assertRaises(ValueError):
+            RequestScheduler().acquire("ping", lane="urgent")
+
+
+class TestClientRateLimiting(unittest.TestCase):
+    """Test cases voor het verwerken van 429-antwoorden in de client."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        self.patcher = patch('src.mcp_client.check_config', return_value=True)
+        self.patcher.start()
+        self.log_patcher = patch('src.mcp_client.log')
+        self.log_patcher.start()
+
+    def tearDown(self):
+        """Tear down na elke test."""
+        self.patcher.stop()
+        self.log_patcher.stop()
+
+    def _mock_http_response(self, status_code=200, body=b"", headers=None):
+        """Maakt een gemockt Streamable HTTP-antwoord."""
+        response = MagicMock()
+        response.status_code = status_code
+        response.headers = {"Content-Type": "application/json", **(headers or {})}
+        response.content = body
+        response.__enter__.return_value = response
+        return response
+
+    @patch('src.mcp_client.requests.Session')
+    def test_retry_after_429(self, mock_session_class):
+        """Test dat een 429 de scheduler pauzeert en het verzoek opnieuw wordt verstuurd."""
+        mock_session = mock_session_class.return_value
+        mock_session.post.side_effect = [
+            self._mock_http_response(status_code=429, headers={"Retry-After": "0.1"}),
+            self._mock_http_response(body=b'{"jsonrpc": "2.0", "id": 2, "result": {}}'),
+        ]
+        scheduler = RequestScheduler()
+        client = MCPClient(scheduler=scheduler)
+        self.assertTrue(client.connect_http("http://test.server/mcp"))
+
+        started = time.monotonic()
+        response = client.call("ping", timeout=5)
+
+        self.assertEqual(response["result"], {})
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+        self.assertEqual(scheduler.stats()["rate_limited"], 1)
+        client.close()
+
+    @patch('src.mcp_client.requests.Session')
+    def test_429_without_scheduler(self, mock_session_class):
+        """Test dat een 429 zonder scheduler als RateLimitError wordt opgeworpen."""
+        mock_session = mock_session_class.return_value
+        mock_session.post.return_value = self._mock_http_response(
+            status_code=429, headers={"Retry-After": "3"})
+        client = MCPClient()
+        self.assertTrue(client.connect_http("http://test.server/mcp"))
+
+        with self.assertRaises(RateLimitError) as context:
+            client.call("ping", timeout=5)
+        self.assertEqual(context.exception.retry_after, 3.0)
+        client.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
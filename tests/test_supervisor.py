@@ -0,0 +1,137 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import tempfile
+import textwrap
+import time
+from src.mcp_client import MCPClient, ConnectionError
+from src.supervisor import RestartPolicy
+
+# Een minimale STDIO-server die bij het eerste 'tools/list' crasht (zonder te antwoorden)
+CRASHING_SERVER = textwrap.dedent('''
+    import json, os, sys, time
+    marker = sys.argv[1]
+    initialized = False
+    for line in sys.stdin:
+        message = json.loads(line)
+        method = message.get("method")
+        if method == "initialize":
+            initialized = True
+            result = {"protocolVersion": "2024-11-05", "capabilities": {}, "serverInfo": {"name": "test"}}
+        elif method == "tools/list" and not os.path.exists(marker):
+            open(marker, "w").close()
+            sys.exit(1)
+        elif method == "crash":
+            sys.exit(1)
+        elif method == "hang":
+            time.sleep(60)  # Reageert niet meer, maar blijft draaien
+        elif "id" not in message:
+            continue
+        else:
+            result = {"initialized": initialized}
+        print(json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result}), flush=True)
+''')
+
+
+class TestRestartPolicy(unittest.TestCase):
+    """Test cases voor de RestartPolicy class."""
+
+    def test_exponential_backoff(self):
+        """Test dat de wachttijd verdubbelt tot het maximum."""
+        policy = RestartPolicy(initial_delay=1, max_delay=3, max_restarts=10)
+        delays = []
+        for _ in range(4):
+            delays.append(policy.next_delay())
+            policy.record_restart()
+        self.assertEqual(delays, [1, 2, 3, 3])
+
+    def test_circuit_breaker(self):
+        """Test dat de circuit breaker opent na te veel herstarts binnen het venster."""
+        policy = RestartPolicy(max_restarts=2, window=60)
+        self.assertTrue(policy.allow_restart())
+        policy.record_restart()
+        policy.record_restart()
+        self.assertFalse(policy.allow_restart())
+
+
+class TestStdioSupervisor(unittest.TestCase):
+    """Test cases voor het automatisch herstarten van een lokaal proces."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        self.patcher = patch('src.mcp_client.check_config', return_value=True)
+        self.patcher.start()
+        self.log_patcher = patch('src.mcp_client.log')
+        self.log_patcher.start()
+        self.supervisor_log_patcher = patch('src.supervisor.log')
+        self.supervisor_log_patcher.start()
+        self.tempdir = tempfile.TemporaryDirectory()
+        server_path = os.path.join(self.tempdir.name, "server.py")
+        with open(server_path, "w") as f:
+            f.write(CRASHING_SERVER)
+        marker_path = os.path.join(self.tempdir.name, "crashed")
+        self.command = f"{sys.executable} {server_path} {marker_path}"
+        self.client = MCPClient()
+
+    def tearDown(self):
+        """Tear down na elke test."""
+        self.client.close()
+        self.tempdir.cleanup()
+        self.patcher.stop()
+        self.log_patcher.stop()
+        self.supervisor_log_patcher.stop()
+
+    def test_restart_replays_idempotent_request(self):
+        """Test dat een idempotent verzoek na een crash en herstart alsnog wordt beantwoord."""
+        policy = RestartPolicy(initial_delay=0.01)
+        self.assertTrue(self.client.connect_stdio(self.command, supervise=True, restart_policy=policy))
+        self.assertIn("result", self.client.initialize(timeout=5))
+
+        response = self.client.call("tools/list", timeout=10)
+
+        # De handshake is herhaald in het nieuwe proces
+        self.assertEqual(response["result"], {"initialized": True})
+        # Het antwoord kan binnenkomen voordat de supervisor de herstart heeft geteld
+        deadline = time.monotonic() + 5
+        while self.client._supervisor.restart_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.client._supervisor.restart_count, 1)
+
+    def test_non_idempotent_request_fails(self):
+        """Test dat een niet-idempotent verzoek bij een crash direct mislukt."""
+        policy = RestartPolicy(initial_delay=0.01)
+        self.assertTrue(self.client.connect_stdio(self.command, supervise=True, restart_policy=policy))
+
+        with self.assertRaises(ConnectionError):
+            self.client.call("crash", timeout=10)
+
+    def test_hung_process_stopped_before_restart(self):
+        """Test dat een vastgelopen proces wordt gestopt voordat het vervangen wordt."""
+        self.client = MCPClient(heartbeat_interval=0.2, heartbeat_timeout=0.3)
+        policy = RestartPolicy(initial_delay=0.01)
+        self.assertTrue(self.client.connect_stdio(self.command, supervise=True, restart_policy=policy))
+        hung = self.client.connection
+
+        self.client.notify("hang")
+        deadline = time.monotonic() + 10
+        while self.client.connection is hung and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        self.assertIsNot(self.client.connection, hung)
+        self.assertIsNotNone(hung.poll())
+        with self.assertRaises(ProcessLookupError):
+            os.kill(hung.pid, 0)
+
+    def test_circuit_breaker_stops_restarts(self):
+        """Test dat een open circuit breaker alle wachtende verzoeken laat mislukken."""
+        policy = RestartPolicy(initial_delay=0.01, max_restarts=0)
+        self.assertTrue(self.client.connect_stdio(self.command, supervise=True, restart_policy=policy))
+
+        with self.assertRaises(ConnectionError) as context:
+            self.client.call("tools/list", timeout=10)
+        self.assertIn("herstarten is gestopt", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+from unittest.mock import patch
+import json
+import os
+import tempfile
+import time
+from src.mcp_client import MCPClient, ConfigurationError
+from src.traffic import load_capture, recorded_latencies, replay, summarize, format_report
+
+
+class TestTraffic(unittest.TestCase):
+    """Test cases voor het opnemen en afspelen van verkeer."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        patcher = patch('src.mcp_client.log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.path = os.path.join(tempdir.name, "capture.jsonl")
+
+    def _connect(self, traffic_file=None):
+        client = MCPClient(traffic_file=traffic_file)
+        self.assertTrue(client.connect_inproc("src.demo_server:DemoServer"))
+        self.addCleanup(client.close)
+        return client
+
+    def test_record(self):
+        """Test dat verstuurde en ontvangen berichten met tijden worden vastgelegd, per opname."""
+        for _ in range(2):
+            client = self._connect(self.path)
+            client.initialize()
+            client.call("tools/call", {"name": "echo", "arguments": {"message": "hoi"}})
+            client.close()
+
+        sessions = load_capture(self.path)
+
+        self.assertEqual(len(sessions), 2)
+        directions = [(direction, message.get("method")) for _, direction, message in sessions[0]]
+        self.assertEqual(directions, [(">", "initialize"), ("<", None), (">", "notifications/initialized"),
+                                      (">", "tools/call"), ("<", None)])
+        times = [elapsed for elapsed, _, _ in sessions[0]]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(set(recorded_latencies(sessions[0])), {1, 2})
+
+    def test_replay(self):
+        """Test dat de verzoeken opnieuw worden verstuurd en de latencies worden vergeleken."""
+        recorder = self._connect(self.path)
+        recorder.initialize()
+        recorder.call("tools/list")
+        recorder.call("tools/call", {"name": "onbekend", "arguments": {}})
+        recorder.close()
+
+        target = self._connect()
+        results = replay(target, load_capture(self.path), speed=0)
+
+        self.assertEqual([result["method"] for result in results][0], "initialize")
+        summary = summarize(results)
+        self.assertEqual(set(summary), {"initialize", "tools/list", "tools/call"})
+        self.assertEqual(summary["tools/list"]["errors"], 0)
+        self.assertIsNotNone(summary["tools/list"]["recorded_p50"])
+        self.assertEqual(summary["tools/call"]["errors"], 1)
+        self.assertIn("tools/list", format_report(summary))
+
+    def test_replay_speed(self):
+        """Test dat de opgenomen tijden worden gedeeld door de afspeelsnelheid."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('{"capture":1,"started":0}\n')
+            f.write(json.dumps([0.4, ">", {"jsonrpc": "2.0", "id": 1, "method": "ping"}]) + "\n")
+
+        started = time.perf_counter()
+        results = replay(self._connect(), load_capture(self.path), speed=4)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(results), 1)
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.35)
+
+    def test_invalid_capture(self):
+        """Test dat een bestand zonder opnamekop wordt geweigerd."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write('[0.1, ">", {"method": "ping"}]\n')
+
+        with self.assertRaises(ConfigurationError):
+            load_capture(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
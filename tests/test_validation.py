@@ -0,0 +1,141 @@
+import unittest
+from unittest.mock import patch
+from src.mcp_client import MCPClient, ValidationError
+from src.validation import compile_schema
+
+
+class TestCompileSchema(unittest.TestCase):
+    """Test cases voor compile_schema."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        self.validate = compile_schema({
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "minLength": 1},
+                "limit": {"type": "integer", "minimum": 1, "maximum": 100},
+                "mode": {"enum": ["fast", "exact"]},
+                "tags": {"type": "array", "items": {"type": "string"}, "maxItems": 2},
+            },
+            "required": ["query"],
+            "additionalProperties": False,
+        })
+
+    def test_valid_arguments(self):
+        """Test dat geldige argumenten worden geaccepteerd."""
+        self.assertIsNone(self.validate({"query": "mcp", "limit": 10, "mode": "fast", "tags": ["a"]}))
+        self.assertIsNone(self.validate({"query": "mcp", "limit": 10.0}))
+
+    def test_invalid_arguments(self):
+        """Test de foutmeldingen met het pad naar het ongeldige veld."""
+        cases = [
+            ({}, "arguments: verplicht veld 'query' ontbreekt"),
+            ({"query": ""}, "arguments.query: minimaal 1 tekens verwacht"),
+            ({"query": "x", "limit": True}, "arguments.limit: verwacht integer, kreeg bool"),
+            ({"query": "x", "limit": 500}, "arguments.limit: waarde 500 buiten grens maximum=100"),
+            ({"query": "x", "mode": "slow"}, "arguments.mode: waarde moet een van ['fast', 'exact'] zijn"),
+            ({"query": "x", "tags": ["a", 1]}, "arguments.tags[1]: verwacht string, kreeg int"),
+            ({"query": "x", "extra": 1}, "arguments: onbekend veld 'extra'"),
+            ("tekst", "arguments: verwacht object, kreeg str"),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(self.validate(value), expected)
+
+    def test_any_of_and_unknown_keywords(self):
+        """Test anyOf en dat onbekende sleutelwoorden niets afwijzen."""
+        validate = compile_schema({"anyOf": [{"type": "string"}, {"type": "null"}], "$ref": "#/x"})
+        self.assertIsNone(validate(None))
+        self.assertIsNotNone(validate(3))
+        self.assertIsNone(compile_schema({"x-custom": True})(3))
+
+    def test_pattern(self):
+        """Test pattern, en dat een ECMA-262 patroon dat re niet kent niets afwijst."""
+        validate = compile_schema({"type": "string", "pattern": "^[a-z]+$"})
+        self.assertIsNone(validate("mcp"))
+        self.assertIsNotNone(validate("MCP"))
+        self.assertIsNone(compile_schema({"type": "string", "pattern": "^\\p{L}+$"})("mcp"))
+
+
+    def test_pattern_properties(self):
+        """Test dat velden uit patternProperties geen onbekende velden zijn, maar wel worden gecontroleerd."""
+        validate = compile_schema({
+            "type": "object",
+            "properties": {"name": {"type": "string"}},
+            "patternProperties": {"^x-": {"type": "string"}},
+            "additionalProperties": False,
+        })
+        self.assertIsNone(validate({"x-a": "b"}))
+        self.assertIsNone(validate({"name": "mcp", "x-a": "b"}))
+        self.assertEqual(validate({"x-a": 1}), "arguments.x-a: verwacht string, kreeg int")
+        self.assertEqual(validate({"y": "b"}), "arguments: onbekend veld 'y'")
+        self.assertIsNone(compile_schema({
+            "patternProperties": {"^\\p{L}+$": {}}, "additionalProperties": False,
+        })({"mcp": 1}))
+
+class TestClientToolValidation(unittest.TestCase):
+    """Test cases voor de lokale controle van tools/call in de client."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        patcher = patch('src.mcp_client.log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.messages = []
+        from src.demo_server import DemoServer
+        server = DemoServer()
+
+        def handler(message):
+            self.messages.append(message["method"])
+            return server.handle_message(message)
+
+        self.client = MCPClient()
+        self.assertTrue(self.client.connect_inproc(handler))
+        self.addCleanup(self.client.close)
+
+    def test_invalid_call_not_sent(self):
+        """Test dat een ongeldige aanroep lokaal wordt geweigerd zonder verzoek naar de server."""
+        self.client.call("tools/list", timeout=5)
+
+        with self.assertRaises(ValidationError) as context:
+            self.client.call("tools/call", {"name": "add", "arguments": {"a": 1, "b": "twee"}}, timeout=5)
+        response = self.client.call("tools/call", {"name": "add", "arguments": {"a": 1, "b": 2}}, timeout=5)
+
+        self.assertIn("arguments.b", str(context.exception))
+        self.assertEqual(response["result"]["content"][0]["text"], "3")
+        self.assertEqual(self.messages, ["tools/list", "tools/call"])
+
+    def test_ecma_pattern_not_rejected(self):
+        """Test dat een schema met een ECMA-262 patroon de aanroep niet laat mislukken."""
+        self.client._cache_tool_schemas({"result": {"tools": [{"name": "echo", "inputSchema": {
+            "type": "object", "properties": {"message": {"type": "string", "pattern": "^\\p{L}+$"}}}}]}})
+
+        response = self.client.call("tools/call", {"name": "echo", "arguments": {"message": "hoi"}}, timeout=5)
+        results = list(self.client.imap_unordered(
+            "tools/call", [{"name": "echo", "arguments": {"message": "hoi"}}], timeout=5))
+
+        self.assertEqual(response["result"]["content"][0]["text"], "hoi")
+        self.assertEqual(results[0][1]["result"]["content"][0]["text"], "hoi")
+
+    def test_unknown_tool_and_list_changed(self):
+        """Test dat zonder bekend schema gewoon wordt verstuurd en list_changed de cache leegt."""
+        response = self.client.call("tools/call", {"name": "add", "arguments": {"a": 1}}, timeout=5)
+        self.assertIn("error", response)
+
+        self.client.call("tools/list", timeout=5)
+        self.client._dispatch({"jsonrpc": "2.0", "method": "notifications/tools/list_changed"})
+        self.client.call("tools/call", {"name": "add", "arguments": {"a": 1}}, timeout=5)
+
+        self.assertEqual(self.messages, ["tools/call", "tools/list", "tools/call"])
+
+    def test_validation_disabled(self):
+        """Test dat validate_tools=False de lokale controle uitschakelt."""
+        self.client.validate_tools = False
+        self.client.call("tools/list", timeout=5)
+        self.client.call("tools/call", {"name": "add", "arguments": {"a": 1}}, timeout=5)
+
+        self.assertEqual(self.messages, ["tools/list", "tools/call"])
+
+
+if __name__ == '__main__':
+    unittest.main()
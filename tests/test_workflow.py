@@ -0,0 +1,132 @@
+import unittest
+from unittest.mock import patch
+import io
+import json
+import os
+import tempfile
+import threading
+from contextlib import redirect_stdout
+from src.mcp_client import MCPClient
+from src.mcp_cli import print_workflow
+from src.workflow import parse_workflow, run_workflow, WorkflowError
+
+
+class TestParseWorkflow(unittest.TestCase):
+    """Test cases voor het controleren van workflows."""
+
+    def test_dependencies_from_references(self):
+        """Test dat afhankelijkheden uit verwijzingen en 'after' worden afgeleid."""
+        steps = parse_workflow({"steps": {
+            "a": {"method": "ping"},
+            "b": {"method": "tools/call", "params": {"name": "echo", "arguments": {"message": "${a.result.x[0]}"}}},
+            "c": {"method": "ping", "after": ["b"]},
+        }})
+
+        self.assertEqual(list(steps), ["a", "b", "c"])
+        self.assertEqual(steps["a"]["depends"], set())
+        self.assertEqual(steps["b"]["depends"], {"a"})
+        self.assertEqual(steps["c"]["depends"], {"b"})
+
+    def test_invalid_workflows(self):
+        """Test dat onbekende stappen, ontbrekende methoden en kringen worden geweigerd."""
+        invalid = [
+            {"steps": []},
+            {"steps": [{"name": "a"}]},
+            {"steps": [{"name": "a", "method": "ping", "params": "${b.result}"}]},
+            {"steps": [{"name": "a", "method": "ping", "after": ["b"]},
+                       {"name": "b", "method": "ping", "params": {"x": "${a.result}"}}]},
+        ]
+        for workflow in invalid:
+            with self.subTest(workflow=workflow):
+                with self.assertRaises(WorkflowError):
+                    parse_workflow(workflow)
+
+
+class TestRunWorkflow(unittest.TestCase):
+    """Test cases voor het uitvoeren van workflows."""
+
+    def setUp(self):
+        """Set up voor elke test."""
+        patcher = patch('src.mcp_client.log')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_parallel_steps_and_references(self):
+        """Test dat onafhankelijke stappen tegelijk lopen en verwijzingen worden ingevuld."""
+        client = MCPClient()
+        received = []
+        lock = threading.Lock()
+
+        def handler(message):
+            # Antwoord pas als 'a' en 'b' allebei openstaan: dat kan alleen als ze parallel lopen
+            with lock:
+                received.append(message)
+                if message["method"] == "sum":
+                    ready = [message]
+                elif len(received) == 2:
+                    ready = list(received)
+                else:
+                    ready = []
+            for item in ready:
+                params = item["params"]
+                result = {"value": params["a"] + params["b"]} if item["method"] == "sum" else {"value": params["n"]}
+                threading.Thread(target=client._dispatch,
+                                 args=({"jsonrpc": "2.0", "id": item["id"], "result": result},)).start()
+
+        self.assertTrue(client.connect_inproc(handler))
+        self.addCleanup(client.close)
+        workflow = {"steps": [
+            {"name": "a", "method": "number", "params": {"n": 2}},
+            {"name": "b", "method": "number", "params": {"n": 3}},
+            {"name": "total", "method": "sum", "params": {"a": "${a.result.value}", "b": "${b.result.value}"}},
+        ]}
+
+        results = list(run_workflow(client, workflow, timeout=5))
+
+        self.assertEqual([name for name, _ in results][-1], "total")
+        self.assertEqual(dict(results)["total"]["result"], {"value": 5})
+
+    def test_failed_step_skips_dependents(self):
+        """Test dat een mislukte stap alleen de stappen overslaat die ervan afhangen."""
+        client = MCPClient()
+        self.assertTrue(client.connect_inproc("src.demo_server:DemoServer"))
+        self.addCleanup(client.close)
+        workflow = {"steps": [
+            {"name": "bad", "method": "bestaat/niet"},
+            {"name": "after_bad", "method": "ping", "params": {"x": "${bad.result}"}},
+            {"name": "good", "method": "ping"},
+        ]}
+
+        results = dict(run_workflow(client, workflow, timeout=5))
+
+        self.assertIn("error", results["bad"])
+        self.assertIn("Overgeslagen", results["after_bad"]["error"])
+        self.assertEqual(results["good"]["result"], {})
+
+    def test_print_workflow(self):
+        """Test dat de CLI elke stap als JSON-regel wegschrijft."""
+        client = MCPClient()
+        self.assertTrue(client.connect_inproc("src.demo_server:DemoServer"))
+        self.addCleanup(client.close)
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        path = os.path.join(tempdir.name, "workflow.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"initialize": True, "steps": [
+                {"name": "tools", "method": "tools/list"},
+                {"name": "echo", "method": "tools/call", "params": {
+                    "name": "echo", "arguments": {"message": "tool: ${tools.result.tools[0].name}"}}},
+            ]}, f)
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            failed = print_workflow(client, path)
+
+        lines = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(failed, 0)
+        self.assertEqual([line["step"] for line in lines], ["tools", "echo"])
+        self.assertEqual(lines[1]["response"]["result"]["content"][0]["text"], "tool: echo")
+
+
+if __name__ == '__main__':
+    unittest.main()